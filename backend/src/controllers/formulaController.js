@@ -1,6 +1,7 @@
 import { Op } from "sequelize";
 import {
   runFormulaEngineService,
+  runFormulaEngineForDatesService,
   generateStrongBullishService,
   generateFollowThroughDayService,
   generateBuyDayService,
@@ -293,12 +294,37 @@ export const runFormulaEngine = async (req, res) => {
     const {
       trigger_source: triggerSource = null,
       trade_date: tradeDate = null,
+      trade_dates: tradeDates = null,
+      formulas = null,
+      exclude_formulas: excludeFormulas = null,
       targetDate = null
     } = req.body || {};
 
+    // Batched call: several trade dates in one request, one result per date
+    if (Array.isArray(tradeDates) && tradeDates.length) {
+      const startedAt = Date.now();
+      const results = await runFormulaEngineForDatesService({
+        tradeDates,
+        triggerSource,
+        formulas,
+        excludeFormulas
+      });
+
+      return res.status(200).json({
+        success: results.every((item) => item.success),
+        trigger_source: triggerSource,
+        trade_dates: results.map((item) => item.trade_date),
+        duration_ms: Date.now() - startedAt,
+        results,
+        message: 'Formula engine executed for batch'
+      });
+    }
+
     const result = await runFormulaEngineService({
       targetDate: tradeDate || targetDate,
-      triggerSource
+      triggerSource,
+      formulas,
+      excludeFormulas
     });
 
     return res.status(200).json({
@@ -979,30 +979,93 @@ const runFormulaStep = async ({ key, label, dependsOn, execute, completedSteps }
   }
 };
 
-// Queue concurrent formula-engine HTTP calls (daily + manual + range).
-let formulaEngineTail = Promise.resolve();
+// Bound concurrent formula-engine runs (daily + manual + range). Each run already
+// fans out FORMULA_ENGINE_CONCURRENCY formulas, so keep runs x formulas within DB_POOL_MAX.
+const FORMULA_ENGINE_MAX_RUNS = Math.max(
+  1,
+  Number(process.env.FORMULA_ENGINE_MAX_RUNS || 2)
+);
+let activeEngineRuns = 0;
+const engineRunWaiters = [];
+
+const acquireEngineRun = async () => {
+  if (activeEngineRuns < FORMULA_ENGINE_MAX_RUNS) {
+    activeEngineRuns += 1;
+    return;
+  }
+  await new Promise((resolve) => engineRunWaiters.push(resolve));
+};
+
+const releaseEngineRun = () => {
+  const next = engineRunWaiters.shift();
+  if (next) {
+    next();
+  } else {
+    activeEngineRuns -= 1;
+  }
+};
 
 export const runFormulaEngineService = async ({
   targetDate = null,
-  triggerSource = null
+  triggerSource = null,
+  formulas = null,
+  excludeFormulas = null
 } = {}) => {
-  let releaseQueue = () => {};
-  const previous = formulaEngineTail;
-  formulaEngineTail = new Promise((resolve) => {
-    releaseQueue = resolve;
-  });
-  await previous;
+  await acquireEngineRun();
 
   try {
-    return await runFormulaEngineServiceLocked({ targetDate, triggerSource });
+    return await runFormulaEngineServiceLocked({
+      targetDate,
+      triggerSource,
+      formulas,
+      excludeFormulas
+    });
   } finally {
-    releaseQueue();
+    releaseEngineRun();
+  }
+};
+
+/**
+ * Run the engine for several trade dates in one call, oldest first.
+ * A failing date is reported in its slot and does not stop later dates.
+ */
+export const runFormulaEngineForDatesService = async ({
+  tradeDates = [],
+  triggerSource = null,
+  formulas = null,
+  excludeFormulas = null
+} = {}) => {
+  const ordered = [...new Set(tradeDates.map(normalizeTradeDate).filter(Boolean))].sort();
+  const results = [];
+
+  for (const tradeDate of ordered) {
+    const startedAt = performance.now();
+    try {
+      const result = await runFormulaEngineService({
+        targetDate: tradeDate,
+        triggerSource,
+        formulas,
+        excludeFormulas
+      });
+      results.push({ ...result, trade_date: result.trade_date || tradeDate });
+    } catch (error) {
+      results.push({
+        success: false,
+        trade_date: tradeDate,
+        duration_ms: Math.round(performance.now() - startedAt),
+        error: error.message
+      });
+    }
   }
+
+  return results;
 };
 
 const runFormulaEngineServiceLocked = async ({
   targetDate = null,
-  triggerSource = null
+  triggerSource = null,
+  formulas = null,
+  excludeFormulas = null
 } = {}) => {
   const engineStartedAt = new Date();
   const startedAt = performance.now();
@@ -1198,7 +1261,20 @@ const runFormulaEngineServiceLocked = async ({
     }
   ];
 
-  const pending = [...steps];
+  const excluded = new Set(excludeFormulas || []);
+  const selectedSteps = steps.filter(
+    (step) => (!formulas || formulas.includes(step.key)) && !excluded.has(step.key)
+  );
+  // Formulas left out of this run are handled by another request (the caller
+  // schedules rolling-window formulas separately), so they count as done here.
+  for (const step of steps) {
+    if (!selectedSteps.includes(step)) {
+      processedSteps.add(step.key);
+      completedSteps.add(step.key);
+    }
+  }
+
+  const pending = [...selectedSteps];
   const FORMULA_CONCURRENCY = Math.max(
     1,
     Number(process.env.FORMULA_ENGINE_CONCURRENCY || 2)
@@ -1264,7 +1340,7 @@ const runFormulaEngineServiceLocked = async ({
     }
   }
 
-  const formulaResults = steps
+  const formulaResults = selectedSteps
     .map((step) => resultsByKey[step.key])
     .filter(Boolean);
 
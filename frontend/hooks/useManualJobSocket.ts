@@ -150,9 +150,16 @@ export function useManualJobSocket(
       ws.onmessage = (ev) => {
         try {
           const data = JSON.parse(ev.data) as ManualJobEvent;
-          if (data.type === "pong") return;
-          if (!matchesFilter(data, jobName, jobGroup)) return;
-          setEvents((prev) => [data, ...prev].slice(0, 150));
+          // Bursts arrive as one { type: "batch", events: [...] } frame, oldest first
+          const frame =
+            data.type === "batch" && Array.isArray(data.events)
+              ? (data.events as ManualJobEvent[])
+              : [data];
+          const fresh = frame
+            .filter((e) => e.type !== "pong" && matchesFilter(e, jobName, jobGroup))
+            .reverse();
+          if (!fresh.length) return;
+          setEvents((prev) => [...fresh, ...prev].slice(0, 150));
         } catch {
           // ignore malformed frames
         }
@@ -31,6 +31,24 @@ def env_bool(key: str) -> bool:
     return require_env(key).lower() in ("true", "1", "yes", "y")
 
 
+def optional_env_int(key: str, default: int, minimum: int = 0) -> int:
+    """Optional integer env var: ``default`` when unset or malformed, never below ``minimum``."""
+    try:
+        value = int(os.getenv(key) or default)
+    except ValueError:
+        value = default
+    return max(minimum, value)
+
+
+def optional_env_float(key: str, default: float, minimum: float = 0.0) -> float:
+    """Optional float env var: ``default`` when unset or malformed, never below ``minimum``."""
+    try:
+        value = float(os.getenv(key) or default)
+    except ValueError:
+        value = default
+    return max(minimum, value)
+
+
 class Config:
     # =====================================================
     # 🔐 API KEYS
@@ -49,6 +67,19 @@ class Config:
     DB_USER = require_env("DB_USER")
     DB_PASSWORD = require_env("DB_PASSWORD")
 
+    # Connection pool tuning (shared by every service / cron in the process)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in (
+        "true", "1", "yes", "y"
+    )
+    # Allow LOAD DATA LOCAL INFILE (bhavcopy bulk loader, BHAVCOPY_BULK_MODE=load_data)
+    DB_LOCAL_INFILE = os.getenv("DB_LOCAL_INFILE", "false").lower() in (
+        "true", "1", "yes", "y"
+    )
+
     # =====================================================
     # 🗄️ DATABASE NAMES
     # =====================================================
@@ -78,6 +109,25 @@ class Config:
         raise RuntimeError(
             f"Invalid NSE_BHAVCOPY_URL: '{NSE_BHAVCOPY_URL}'. Use https://nsearchives.nseindia.com/archives/equities/bhavcopy/pr/PR{{date}}.zip"
         )
+    # Local content-addressed cache of downloaded bhavcopy zips (replay without network)
+    BHAVCOPY_ARCHIVE_ENABLED = os.getenv("BHAVCOPY_ARCHIVE_ENABLED", "true").lower() in (
+        "true", "1", "yes", "y"
+    )
+    BHAVCOPY_ARCHIVE_DIR = os.getenv(
+        "BHAVCOPY_ARCHIVE_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "bhavcopy_archive"),
+    )
+    BHAVCOPY_ARCHIVE_MAX_MB = int(os.getenv("BHAVCOPY_ARCHIVE_MAX_MB", "2048"))
+    # Durable queue for Manual API background jobs (survives restarts)
+    BACKGROUND_JOB_DB = os.getenv(
+        "BACKGROUND_JOB_DB",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "background_jobs.sqlite3"),
+    )
+    # Resume point for the daily Screener scrape (deleted when a run completes)
+    SCREENER_CHECKPOINT_PATH = os.getenv(
+        "SCREENER_CHECKPOINT_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "screener_checkpoint.json"),
+    )
     NSE_LISTED_COMPANIES_URL = require_url("NSE_LISTED_COMPANIES_URL")
     SCREENER_BASE_URL = require_url("SCREENER_BASE_URL")
 
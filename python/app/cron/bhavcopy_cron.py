@@ -46,13 +46,15 @@ def _calendar_trade_datetime(for_date=None) -> Optional[datetime]:
 def _latest_missing_trade_date(within_days: int = 7) -> Optional[datetime]:
     """Most recent weekday still missing PR/eq bhavcopy (today first)."""
     today = _now_ist().date()
+    loaded = bhavcopy_service.loaded_dates(
+        today - timedelta(days=max(within_days - 1, 0)), today
+    )
     for days_back in range(within_days):
         day = today - timedelta(days=days_back)
         if day.weekday() >= 5:
             continue
-        date_obj = datetime.combine(day, datetime.min.time())
-        if not bhavcopy_service.is_trade_date_processed(date_obj):
-            return date_obj
+        if day not in loaded:
+            return datetime.combine(day, datetime.min.time())
     return None
 
 
@@ -514,12 +516,13 @@ def list_missing_bhavcopy_dates(start_date: str, end_date: str):
     """List weekdays in range that are missing PR/eq bhavcopy data."""
     start = datetime.strptime(start_date, "%Y-%m-%d")
     end = datetime.strptime(end_date, "%Y-%m-%d")
+    loaded = bhavcopy_service.loaded_dates(start.date(), end.date())
     missing = []
     present = []
     cursor = start
     while cursor <= end:
         if cursor.weekday() < 5:
-            if bhavcopy_service.is_trade_date_processed(cursor):
+            if cursor.date() in loaded:
                 present.append(str(cursor.date()))
             else:
                 missing.append(str(cursor.date()))
@@ -589,6 +592,59 @@ def manual_run_formulas_for_date(date_str: str):
     return manual_run_formulas_for_range(date_str, date_str)
 
 
+def manual_migrate_bhavcopy_schema(tables: Optional[List[str]] = None):
+    """Migrate legacy TEXT segment tables to the typed schema (natural key + indexes)."""
+    from app.services.bhavcopy_schema import SEGMENT_SCHEMAS
+
+    targets = [t.lower() for t in (tables or list(SEGMENT_SCHEMAS))]
+    with CronJobContext("bhavcopy_schema_migration", "bhavcopy") as context:
+        results = []
+        for index, table_name in enumerate(targets, start=1):
+            context.flush_progress(
+                phase="migrating",
+                table=table_name,
+                table_index=index,
+                table_total=len(targets),
+            )
+            try:
+                result = bhavcopy_service.migrate_table_schema(table_name)
+            except Exception as e:
+                logger.exception("Schema migration failed for %s", table_name)
+                result = {"table": table_name, "status": "ERROR", "message": str(e)}
+            results.append(result)
+            if result.get("status") != "ERROR":
+                context.add_record(processed=1, updated=result.get("rows", 0) or 0)
+
+        failed = sum(1 for r in results if r.get("status") == "ERROR")
+        context.set_data(results=results, failed=failed)
+        context.flush_progress(phase="done")
+        return {
+            "status": "SUCCESS" if failed == 0 else "PARTIAL",
+            "tables": targets,
+            "results": results,
+            "log_id": context.log_id,
+        }
+
+
+def manual_replay_bhavcopy_range(start_date: str, end_date: str, force_refresh: bool = True):
+    """Reload a range from the local bhavcopy zip archive only (no NSE requests)."""
+    with CronJobContext("bhavcopy_replay_range", "bhavcopy") as context:
+        context.flush_progress(phase="replaying", start_date=start_date, end_date=end_date)
+        result = bhavcopy_service.replay_range(start_date, end_date, force_refresh)
+        context.add_record(
+            processed=result.get("total_dates", 0),
+            updated=result.get("successful", 0),
+        )
+        context.set_data(
+            successful=result.get("successful"),
+            failed=result.get("failed"),
+            not_cached=result.get("not_cached"),
+        )
+        context.flush_progress(phase="done")
+        result["log_id"] = context.log_id
+        return result
+
+
 def clear_stuck_cron_logs(older_than_minutes: int = 120):
     return cron_logger.clear_stuck_running(older_than_minutes)
 
@@ -1,11 +1,11 @@
-import time
 import logging
 from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from app.database.connection import db_manager
 from app.config import config
-from app.services.screener_service import screener_service
+from app.services.screener_pipeline import ScreenerScrapeEngine
+from app.utils.cron_decorator import CronJobContext
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -55,36 +55,31 @@ class ScreenerScheduler:
 
         if total == 0:
             logger.warning("⚠️ No symbols found. Skipping screener job.")
-            return
+            return {"total": 0}
 
         logger.info(f"🕒 Screener CRON STARTED | Total symbols: {total}")
 
-        success = 0
-        failed = 0
+        with CronJobContext("screener_daily", "screener") as context:
+            # Anti-ban pacing now lives in the engine's shared token bucket
+            # (SCREENER_RATE_PER_SECOND), not in per-symbol sleeps.
+            engine = ScreenerScrapeEngine(context=context)
+            result = engine.run(symbol.replace(".NS", "") for symbol in symbols)
 
-        for idx, symbol in enumerate(symbols, start=1):
-            try:
-                clean_symbol = symbol.replace(".NS", "")
-
-                logger.info(f"[{idx}/{total}] Fetching screener: {clean_symbol}")
-
-                screener_service.fetch_and_save(
-                    clean_symbol,
-                    "consolidated"
-                )
-
-                success += 1
-                time.sleep(1.5)  # ⛔ anti-ban (DO NOT REMOVE)
-
-            except Exception as e:
-                failed += 1
-                logger.error(f"❌ Screener failed for {symbol}: {e}", exc_info=True)
+            context.add_record(
+                processed=result["changed"] + result["unchanged"],
+                inserted=result["rows_written"],
+            )
+            context.set_data(screener=result)
 
         logger.info(
             f"✅ Screener CRON FINISHED | "
-            f"Success: {success} | Failed: {failed} | "
+            f"Changed: {result['changed']} | Unchanged (writes skipped): {result['unchanged']} | "
+            f"Deferred: {result['deferred']} | Failed: {result['failed']} | "
+            f"Not found: {result['not_found']} | Resumed: {result['resumed']} | "
+            f"{result['symbols_per_minute']} symbols/min | "
             f"Time: {datetime.now()}"
         )
+        return result
 
     # ----------------------------------------------------
     # START
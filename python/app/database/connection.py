@@ -1,16 +1,72 @@
+import threading
 import pymysql
 import pandas as pd
 from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
+from typing import Any, Dict, Optional
 from urllib.parse import quote_plus
 from app.config import config
 
 
+class PooledConnection:
+    """
+    pymysql connection checked out of a SQLAlchemy pool.
+
+    Behaves like the raw pymysql connection callers already use
+    (cursor / commit / rollback / close / context manager), but
+    close() hands the connection back to the pool instead of
+    tearing down the TCP session.
+    """
+
+    def __init__(self, pooled, cursorclass):
+        self._pooled = pooled
+        self._cursorclass = cursorclass
+        self._closed = False
+
+    @property
+    def driver_connection(self):
+        return self._pooled.driver_connection
+
+    def cursor(self, cursor=None):
+        return self.driver_connection.cursor(cursor or self._cursorclass)
+
+    def commit(self):
+        self.driver_connection.commit()
+
+    def rollback(self):
+        self.driver_connection.rollback()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        # Pool resets (rolls back) on return, matching pymysql close semantics.
+        self._pooled.close()
+
+    @property
+    def open(self) -> bool:
+        return not self._closed and self.driver_connection.open
+
+    def __getattr__(self, name):
+        return getattr(self.driver_connection, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
 class DatabaseManager:
     def __init__(self):
         self.config = config
+        # One engine (= one bounded pool) per database for the whole process.
+        self._engines: Dict[str, Engine] = {}
+        self._engines_lock = threading.Lock()
+        self._stats = {"engines_created": 0, "checkouts": 0}
 
     # --------------------------------------------------
-    # PYMYSQL CONNECTION
+    # PYMYSQL CONNECTION (POOLED)
     # --------------------------------------------------
     def get_connection(self, db_name=None, dict_cursor=False):
         cursorclass = (
@@ -19,27 +75,73 @@ class DatabaseManager:
             else pymysql.cursors.Cursor
         )
 
-        return pymysql.connect(
-            host=self.config.DB_HOST,
-            user=self.config.DB_USER,
-            password=self.config.DB_PASSWORD,
-            database=db_name,
-            port=self.config.DB_PORT,
-            cursorclass=cursorclass,
-            autocommit=False
-        )
+        pooled = self.get_sqlalchemy_engine(db_name).raw_connection()
+        with self._engines_lock:
+            self._stats["checkouts"] += 1
+        return PooledConnection(pooled, cursorclass)
 
     # --------------------------------------------------
-    # SQLALCHEMY ENGINE
+    # SQLALCHEMY ENGINE (CACHED PER DATABASE)
     # --------------------------------------------------
-    def get_sqlalchemy_engine(self, db_name):
+    def _build_engine(self, db_name: Optional[str]) -> Engine:
         encoded_password = quote_plus(self.config.DB_PASSWORD)
         return create_engine(
             f"mysql+pymysql://{self.config.DB_USER}:{encoded_password}"
-            f"@{self.config.DB_HOST}:{self.config.DB_PORT}/{db_name}",
-            pool_pre_ping=True
+            f"@{self.config.DB_HOST}:{self.config.DB_PORT}/{db_name or ''}",
+            pool_size=self.config.DB_POOL_SIZE,
+            max_overflow=self.config.DB_POOL_MAX_OVERFLOW,
+            pool_recycle=self.config.DB_POOL_RECYCLE_SECONDS,
+            pool_timeout=self.config.DB_POOL_TIMEOUT_SECONDS,
+            pool_pre_ping=self.config.DB_POOL_PRE_PING,
+            # Keep plain pymysql rowcount semantics (affected, not matched rows)
+            # for the raw-connection callers that count inserts/updates.
+            connect_args={
+                "client_flag": 0,
+                "local_infile": self.config.DB_LOCAL_INFILE,
+            },
         )
 
+    def get_sqlalchemy_engine(self, db_name=None) -> Engine:
+        key = db_name or ""
+        engine = self._engines.get(key)
+        if engine is not None:
+            return engine
+
+        with self._engines_lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = self._build_engine(db_name)
+                self._engines[key] = engine
+                self._stats["engines_created"] += 1
+            return engine
+
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """Snapshot of every cached pool (size / in use / idle / overflow)."""
+        with self._engines_lock:
+            engines = dict(self._engines)
+            stats = dict(self._stats)
+
+        pools = {}
+        for key, engine in engines.items():
+            pool = engine.pool
+            pools[key or "<server>"] = {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "max_overflow": self.config.DB_POOL_MAX_OVERFLOW,
+            }
+
+        return {**stats, "pools": pools}
+
+    def dispose_engines(self):
+        """Close every pooled connection (shutdown / tests)."""
+        with self._engines_lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine in engines:
+            engine.dispose()
+
     # --------------------------------------------------
     # DATABASE
     # --------------------------------------------------
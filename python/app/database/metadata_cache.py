@@ -0,0 +1,101 @@
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import MetaData, Table, inspect
+
+from app.database.connection import db_manager
+
+
+class TableMetadataCache:
+    """
+    In-process cache of table metadata keyed by (db, table).
+
+    Holds the known column names, index names and the reflected SQLAlchemy
+    ``Table`` so hot ingest paths stop hitting information_schema on every
+    upsert. Entries are only dropped via ``invalidate`` (e.g. after a column
+    is added), never on a timer.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _entry(self, db_name: str, table_name: str) -> Optional[Dict[str, Any]]:
+        key = (db_name, table_name.lower())
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            self._count("hits")
+            return entry
+
+        self._count("misses")
+        inspector = inspect(db_manager.get_sqlalchemy_engine(db_name))
+        if not inspector.has_table(table_name):
+            return None  # absent tables are not cached; creation must be visible
+
+        columns = [col["name"] for col in inspector.get_columns(table_name)]
+        indexes = [ix["name"] for ix in inspector.get_indexes(table_name)]
+        entry = {
+            "columns": columns,
+            "columns_lower": {name.lower() for name in columns},
+            "indexes": set(indexes),
+            "table": None,
+        }
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def has_table(self, db_name: str, table_name: str) -> bool:
+        return self._entry(db_name, table_name) is not None
+
+    def get_columns(self, db_name: str, table_name: str) -> Optional[List[str]]:
+        entry = self._entry(db_name, table_name)
+        return list(entry["columns"]) if entry else None
+
+    def get_column_names_lower(self, db_name: str, table_name: str) -> Set[str]:
+        entry = self._entry(db_name, table_name)
+        return set(entry["columns_lower"]) if entry else set()
+
+    def get_index_names(self, db_name: str, table_name: str) -> Set[str]:
+        entry = self._entry(db_name, table_name)
+        return set(entry["indexes"]) if entry else set()
+
+    def get_table(self, db_name: str, table_name: str) -> Optional[Table]:
+        """Reflected ``Table``; reflection happens once per cache entry."""
+        entry = self._entry(db_name, table_name)
+        if entry is None:
+            return None
+        if entry["table"] is None:
+            engine = db_manager.get_sqlalchemy_engine(db_name)
+            entry["table"] = Table(table_name, MetaData(), autoload_with=engine)
+        return entry["table"]
+
+    def invalidate(self, db_name: str, table_name: Optional[str] = None):
+        with self._lock:
+            if table_name is None:
+                keys = [k for k in self._entries if k[0] == db_name]
+            else:
+                keys = [(db_name, table_name.lower())]
+            for key in keys:
+                self._entries.pop(key, None)
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+
+table_metadata_cache = TableMetadataCache()
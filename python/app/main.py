@@ -203,12 +203,21 @@ async def startup_event():
     from app.services.manual_job_hub import manual_job_hub
 
     manual_job_hub.set_loop(asyncio.get_running_loop())
+
+    from app.utils.blocking import loop_lag_monitor
+
+    loop_lag_monitor.start()
     
     # Initialize databases
     ensure_databases()
     
     # ✅ SAFE init
     get_yfinance_service().__init__()
+
+    # Only now: recovered jobs are claimed at once and need the databases above
+    from app.services.job_queue import background_jobs
+
+    background_jobs.start()
     
     # Warmup sessions
     warmup_bse_session()
@@ -238,6 +247,23 @@ async def shutdown_event():
         except Exception as err:
             logger.warning(f"⚠ Failed to shutdown {name} scheduler cleanly: {err}")
 
+    from app.utils.blocking import blocking_executor, loop_lag_monitor
+
+    loop_lag_monitor.stop()
+    blocking_executor.shutdown()
+
+    from app.services.job_queue import background_jobs
+
+    background_jobs.stop()
+
+    from app.services.cron_logger_service import cron_logger
+
+    cron_logger.flush_progress()
+
+    from app.database.connection import db_manager
+
+    db_manager.dispose_engines()
+
 # ---------------------------------------------------------
 # Pydantic Models for Swagger
 # ---------------------------------------------------------
@@ -322,6 +348,23 @@ async def api_status():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/db-pool", tags=["Health"])
+async def db_pool_metrics():
+    """Shared MySQL connection pool usage per database"""
+    from app.database.connection import db_manager
+
+    return db_manager.get_pool_metrics()
+
+@app.get("/loop-health", tags=["Health"])
+async def loop_health():
+    """Event-loop lag percentiles and per-family load of the blocking API executor"""
+    from app.utils.blocking import blocking_executor, loop_lag_monitor
+
+    return {
+        "event_loop": loop_lag_monitor.stats(),
+        "blocking_executor": blocking_executor.stats(),
+    }
+
 @app.get("/", response_model=RootResponse, tags=["Root"])
 async def root():
     """Root endpoint with basic info and documentation"""
@@ -3,7 +3,6 @@ from fastapi import APIRouter, Query, HTTPException, Body, WebSocket, WebSocketD
 from typing import Optional, List
 import math
 import logging
-import threading
 from datetime import datetime
 
 # ✅ FIXED IMPORT - Changed from 'bhavcopy' to 'bhavcopy_cron'
@@ -21,37 +20,31 @@ from app.cron.bhavcopy_cron import (
     clear_stuck_cron_logs,
     manual_run_formulas_for_range,
     manual_run_formulas_for_date,
+    manual_migrate_bhavcopy_schema,
+    manual_replay_bhavcopy_range,
 )
 
+from app.services.job_queue import background_jobs
 from app.services.manual_job_hub import manual_job_hub
+from app.utils.blocking import run_blocking
 
 router = APIRouter(tags=["Bhavcopy"])
 logger = logging.getLogger(__name__)
 
 
-def _spawn_background(job_label: str, fn, *args, **kwargs):
-    """Run long Manual API work off the request thread so the browser gets an immediate ack."""
+# Manual API background work runs on the durable queue; one lane per
+# resource the jobs would otherwise fight over (NSE session / formula engine).
+background_jobs.register("bhavcopy_fetch_date_with_formulas", manual_fetch_date_with_formulas, lane="bhavcopy")
+background_jobs.register("bhavcopy_fetch_range_with_formulas", manual_fetch_range_with_formulas, lane="bhavcopy")
+background_jobs.register("bhavcopy_replay_range", manual_replay_bhavcopy_range, lane="bhavcopy")
+background_jobs.register("bhavcopy_schema_migration", manual_migrate_bhavcopy_schema, lane="bhavcopy")
+background_jobs.register("formula_run_date", manual_run_formulas_for_date, lane="formula")
+background_jobs.register("formula_run_range", manual_run_formulas_for_range, lane="formula")
 
-    def _runner():
-        try:
-            manual_job_hub.emit(
-                "job_queued",
-                message=f"Background thread started: {job_label}",
-                job_label=job_label,
-            )
-            fn(*args, **kwargs)
-        except Exception as exc:
-            logger.exception("Background %s failed", job_label)
-            manual_job_hub.emit(
-                "job_failed",
-                message=str(exc),
-                job_label=job_label,
-                status="FAILED",
-            )
 
-    thread = threading.Thread(target=_runner, name=job_label, daemon=True)
-    thread.start()
-    return thread.name
+async def _enqueue_background(job_label: str, job_type: str, *args):
+    """Queue long Manual API work so the browser gets an immediate ack (identical pending jobs dedupe)."""
+    return await run_blocking("bhavcopy_read", background_jobs.enqueue, job_type, *args, label=job_label)
 
 
 @router.websocket("/manual-jobs/ws")
@@ -62,8 +55,10 @@ async def manual_jobs_websocket(websocket: WebSocket):
         while True:
             data = await websocket.receive_text()
             if data.strip().lower() == "ping":
-                await websocket.send_json(
-                    {"type": "pong", "timestamp": datetime.utcnow().isoformat() + "Z"}
+                # Through the client's channel so it never races the sender task
+                manual_job_hub.reply(
+                    websocket,
+                    {"type": "pong", "timestamp": datetime.utcnow().isoformat() + "Z"},
                 )
     except WebSocketDisconnect:
         pass
@@ -71,6 +66,12 @@ async def manual_jobs_websocket(websocket: WebSocket):
         manual_job_hub.disconnect(websocket)
 
 
+@router.get("/manual-jobs/ws-stats")
+async def api_manual_jobs_ws_stats():
+    """Per-client queue depth, coalesced/dropped events and send lag of the live feed"""
+    return manual_job_hub.stats()
+
+
 @router.get("/fetch-range")
 async def api_fetch_bhavcopy_range(
     start_date: str = Query(..., example="2025-10-01"),
@@ -82,7 +83,7 @@ async def api_fetch_bhavcopy_range(
     Useful for fetching historical data.
     """
     try:
-        result = manual_fetch_range(start_date, end_date, force_refresh)
+        result = await run_blocking("bhavcopy_ingest", manual_fetch_range, start_date, end_date, force_refresh)
         
         # Convert NaN/inf to None for JSON serialization
         def sanitize(obj):
@@ -108,7 +109,7 @@ async def api_fetch_bhavcopy_range(
 async def api_fetch_today_bhavcopy(force_refresh: bool = Query(False)):
     """Fetch today's bhavcopy data"""
     try:
-        result = manual_fetch_today(force_refresh)
+        result = await run_blocking("bhavcopy_ingest", manual_fetch_today, force_refresh)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -121,7 +122,7 @@ async def api_fetch_date_bhavcopy(
 ):
     """Fetch bhavcopy for a specific date (YYYY-MM-DD)"""
     try:
-        result = manual_fetch_bhavcopy(date, force_refresh)
+        result = await run_blocking("bhavcopy_ingest", manual_fetch_bhavcopy, date, force_refresh)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -139,9 +140,9 @@ async def api_fetch_date_with_formulas(
     """Fetch one trade date then run all formulas (same pipeline as daily cron)."""
     try:
         if background:
-            _spawn_background(
+            job = await _enqueue_background(
                 f"bhavcopy_manual_{date}",
-                manual_fetch_date_with_formulas,
+                "bhavcopy_fetch_date_with_formulas",
                 date,
                 force_refresh,
             )
@@ -154,13 +155,14 @@ async def api_fetch_date_with_formulas(
                     "Track in Master → Cron Logs: filter job name bhavcopy_manual "
                     "(stays RUNNING until formulas finish; View Details shows phase)."
                 ),
+                "job": job,
                 "track": {
                     "job_name": "bhavcopy_manual",
                     "job_group": "bhavcopy",
                     "target_date": date,
                 },
             }
-        return manual_fetch_date_with_formulas(date, force_refresh)
+        return await run_blocking("bhavcopy_ingest", manual_fetch_date_with_formulas, date, force_refresh)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -178,9 +180,9 @@ async def api_fetch_range_with_formulas(
     """Backfill missing weekdays then run formulas for each successful PR day."""
     try:
         if background:
-            _spawn_background(
+            job = await _enqueue_background(
                 f"bhavcopy_manual_range_{start_date}_{end_date}",
-                manual_fetch_range_with_formulas,
+                "bhavcopy_fetch_range_with_formulas",
                 start_date,
                 end_date,
                 force_refresh,
@@ -194,12 +196,15 @@ async def api_fetch_range_with_formulas(
                     "Range job started in background. Track Cron Logs as "
                     "job_name=bhavcopy_manual_range (RUNNING until all formulas finish)."
                 ),
+                "job": job,
                 "track": {
                     "job_name": "bhavcopy_manual_range",
                     "job_group": "bhavcopy",
                 },
             }
-        return manual_fetch_range_with_formulas(start_date, end_date, force_refresh)
+        return await run_blocking(
+            "bhavcopy_ingest", manual_fetch_range_with_formulas, start_date, end_date, force_refresh
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -211,7 +216,7 @@ async def api_missing_dates(
 ):
     """List weekdays in range that still need PR bhavcopy."""
     try:
-        return list_missing_bhavcopy_dates(start_date, end_date)
+        return await run_blocking("bhavcopy_read", list_missing_bhavcopy_dates, start_date, end_date)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -227,9 +232,9 @@ async def api_run_formulas_for_date(
     """Run formula engine for one trade date (preferred Manual API — streams on WebSocket)."""
     try:
         if background:
-            _spawn_background(
+            job = await _enqueue_background(
                 f"formula_manual_{date}",
-                manual_run_formulas_for_date,
+                "formula_run_date",
                 date,
             )
             return {
@@ -239,13 +244,14 @@ async def api_run_formulas_for_date(
                     "Formula job started in background. Watch Live progress "
                     "(WebSocket) or Cron Logs job_name=formula_manual_range."
                 ),
+                "job": job,
                 "track": {
                     "job_name": "formula_manual_range",
                     "job_group": "formula",
                     "trade_date": date,
                 },
             }
-        return manual_run_formulas_for_date(date)
+        return await run_blocking("bhavcopy_ingest", manual_run_formulas_for_date, date)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -265,9 +271,9 @@ async def api_run_formulas_for_range(
     """
     try:
         if background:
-            _spawn_background(
+            job = await _enqueue_background(
                 f"formula_manual_range_{start_date}_{end_date}",
-                manual_run_formulas_for_range,
+                "formula_run_range",
                 start_date,
                 end_date,
             )
@@ -279,12 +285,13 @@ async def api_run_formulas_for_range(
                     "Formula range started in background. Track Cron Logs as "
                     "job_name=formula_manual_range."
                 ),
+                "job": job,
                 "track": {
                     "job_name": "formula_manual_range",
                     "job_group": "formula",
                 },
             }
-        return manual_run_formulas_for_range(start_date, end_date)
+        return await run_blocking("bhavcopy_ingest", manual_run_formulas_for_range, start_date, end_date)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -295,11 +302,124 @@ async def api_clear_stuck_logs(
 ):
     """Mark stuck RUNNING cron logs as FAILED (after process crash / restart)."""
     try:
-        return clear_stuck_cron_logs(older_than_minutes)
+        return await run_blocking("bhavcopy_read", clear_stuck_cron_logs, older_than_minutes)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/migrate-schema")
+async def api_migrate_schema(
+    tables: Optional[List[str]] = Query(
+        None,
+        description="Segment tables to migrate (default: every registered segment)",
+    ),
+    background: bool = Query(
+        True,
+        description="If true (default), return immediately; track job_name=bhavcopy_schema_migration",
+    ),
+):
+    """
+    Online migration of legacy TEXT bhavcopy tables to typed columns with a
+    unique natural key. The old table is kept as <table>__text_<timestamp>.
+    """
+    try:
+        if background:
+            job = await _enqueue_background(
+                "bhavcopy_schema_migration",
+                "bhavcopy_schema_migration",
+                tables,
+            )
+            return {
+                "status": "STARTED",
+                "tables": tables,
+                "message": (
+                    "Schema migration started in background. Track Cron Logs as "
+                    "job_name=bhavcopy_schema_migration."
+                ),
+                "job": job,
+                "track": {
+                    "job_name": "bhavcopy_schema_migration",
+                    "job_group": "bhavcopy",
+                },
+            }
+        return await run_blocking("bhavcopy_ingest", manual_migrate_bhavcopy_schema, tables)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/replay-range")
+async def api_replay_range(
+    start_date: str = Query(..., example="2026-07-06"),
+    end_date: str = Query(..., example="2026-07-20"),
+    force_refresh: bool = Query(True, description="Reload even if the date is already in DB"),
+    background: bool = Query(
+        True,
+        description="If true (default), return immediately; track job_name=bhavcopy_replay_range",
+    ),
+):
+    """
+    Reload bhavcopy for a range purely from the local zip archive (no NSE
+    download). Weekdays that were never archived are listed as not_cached.
+    """
+    try:
+        if background:
+            job = await _enqueue_background(
+                f"bhavcopy_replay_range_{start_date}_{end_date}",
+                "bhavcopy_replay_range",
+                start_date,
+                end_date,
+                force_refresh,
+            )
+            return {
+                "status": "STARTED",
+                "start_date": start_date,
+                "end_date": end_date,
+                "force_refresh": force_refresh,
+                "message": (
+                    "Archive replay started in background. Track Cron Logs as "
+                    "job_name=bhavcopy_replay_range."
+                ),
+                "job": job,
+                "track": {
+                    "job_name": "bhavcopy_replay_range",
+                    "job_group": "bhavcopy",
+                },
+            }
+        return await run_blocking(
+            "bhavcopy_ingest", manual_replay_bhavcopy_range, start_date, end_date, force_refresh
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs")
+async def api_background_jobs(
+    status: Optional[str] = Query(None, description="PENDING, RUNNING, SUCCESS or FAILED"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Durable background queue: per-lane depth, wait times and recent jobs"""
+    stats = await run_blocking("bhavcopy_read", background_jobs.stats)
+    jobs = await run_blocking("bhavcopy_read", background_jobs.list_jobs, status, limit)
+    return {"queue": stats, "jobs": jobs}
+
+
+@router.get("/jobs/{job_id}")
+async def api_background_job(job_id: int):
+    """One background job (status, attempts, timings, error)"""
+    job = await run_blocking("bhavcopy_read", background_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Background job {job_id} not found")
+    return job
+
+
+@router.get("/archive")
+async def api_archive_stats():
+    """Size, entry count and hit/miss counters of the local bhavcopy zip archive"""
+    from app.services.bhavcopy_archive import bhavcopy_archive
+
+    return await run_blocking("bhavcopy_read", bhavcopy_archive.stats)
+
+
 @router.post("/fetch-from-url")
 async def api_fetch_from_url(
     url: str = Body(..., embed=True),
@@ -312,7 +432,7 @@ async def api_fetch_from_url(
     https://nsearchives.nseindia.com/archives/equities/bhavcopy/pr/PR160626.zip
     """
     try:
-        result = manual_fetch_from_url(url, date)
+        result = await run_blocking("bhavcopy_ingest", manual_fetch_from_url, url, date)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -324,7 +444,7 @@ async def api_fetch_multiple_urls(urls: List[str] = Body(..., embed=True)):
     Fetch bhavcopy from multiple manual URLs
     """
     try:
-        results = manual_fetch_multiple_urls(urls)
+        results = await run_blocking("bhavcopy_ingest", manual_fetch_multiple_urls, urls)
         return {"status": "success", "results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -334,12 +454,28 @@ async def api_fetch_multiple_urls(urls: List[str] = Body(..., embed=True)):
 async def api_bhavcopy_status(date: Optional[str] = Query(None)):
     """Check if bhavcopy data exists for a specific date"""
     try:
-        result = get_bhavcopy_status(date)
+        result = await run_blocking("bhavcopy_read", get_bhavcopy_status, date)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/metadata-cache")
+async def api_metadata_cache_stats():
+    """Hit/miss counters of the in-process table metadata cache"""
+    from app.database.metadata_cache import table_metadata_cache
+
+    return table_metadata_cache.stats()
+
+
+@router.get("/nse-session")
+async def api_nse_session_stats():
+    """Cookie warmup vs download latency of the shared NSE session"""
+    from app.services.bhavcopy_service import bhavcopy_service
+
+    return bhavcopy_service.nse.stats()
+
+
 @router.get("/generate-url/{date}")
 async def api_generate_url(date: str):
     """Generate Bhavcopy URL for a specific date"""
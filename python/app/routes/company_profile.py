@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from app.services.company_profile_service import company_service
 
 router = APIRouter()
 
 @router.post("/refresh-single-day")
 def refresh_single_day():
-    saved = company_service.refresh_single_day()
+    stats = company_service.refresh_single_day()
     return {
         "status": "success",
         "message": "Single day market data refreshed",
-        "rows_saved": saved
+        "rows_saved": stats["rows_saved"],
+        "rows_per_second": stats["rows_per_second"],
+        "stats": stats
     }
 
 @router.post("/refresh-range")
@@ -17,13 +19,18 @@ def refresh_range(
     start: str = Query(..., description="Start date (YYYY-MM-DD)"),
     end: str = Query(..., description="End date (YYYY-MM-DD)")
 ):
-    saved = company_service.refresh_range(start, end)
+    try:
+        stats = company_service.refresh_range(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "status": "success",
         "message": "Historical market data refreshed",
         "start_date": start,
         "end_date": end,
-        "rows_saved": saved
+        "rows_saved": stats["rows_saved"],
+        "rows_per_second": stats["rows_per_second"],
+        "stats": stats
     }
 
 @router.get("/symbol/{symbol}")
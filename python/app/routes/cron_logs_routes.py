@@ -35,6 +35,7 @@ async def get_cron_stats(
         return {
             "success": True,
             "period_days": days,
+            "source": "rollup" if cron_logger.rollup_ready else "raw",
             "stats": stats
         }
     except Exception as e:
@@ -66,6 +67,7 @@ async def get_daily_summary(days: int = Query(7, ge=1, le=30)):
         return {
             "success": True,
             "period_days": days,
+            "source": "rollup" if cron_logger.rollup_ready else "raw",
             "summary": summary
         }
     except Exception as e:
@@ -113,7 +115,9 @@ async def check_logger_health():
             "success": True,
             "status": "healthy",
             "table_exists": cron_logger.table_created,
-            "recent_logs_count": len(recent_logs)
+            "rollup_ready": cron_logger.rollup_ready,
+            "recent_logs_count": len(recent_logs),
+            "progress_buffer": cron_logger.progress.stats(),
         }
     except Exception as e:
         return {
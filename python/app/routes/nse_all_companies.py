@@ -22,6 +22,7 @@ def fetch_single(
 @router.post("/fetch-all-listed")
 def fetch_all_listed(
     period: str = Query("1mo"),
-    limit: int | None = None
+    limit: int | None = None,
+    incremental: bool = Query(True)
 ):
-    return nse_service.fetch_all_listed(period, limit)
+    return nse_service.fetch_all_listed(period, limit, incremental)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Query, HTTPException
 from typing import Optional
 from app.services.yfinance_service import get_yfinance_service
+from app.utils.blocking import run_blocking
 from app.database.connection import db_manager
 from app.config import config
 from datetime import date, timedelta
@@ -128,6 +129,18 @@ async def fetch_and_store_listed_companies():
         raise HTTPException(status_code=500, detail=str(e))
     
     
+# refresh-quotes (batched yf.download + info TTL)
+@router.post("/refresh-quotes")
+async def refresh_quotes(batch_size: Optional[int] = Query(None, ge=1, le=500)):
+    try:
+        result = await run_blocking(
+            "yfinance_bulk", get_yfinance_service().fetch_and_store_listed_companies, batch_size
+        )
+        return {"status": "success", "data": result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # full-sync
 @router.post("/full-sync")
 async def full_sync(
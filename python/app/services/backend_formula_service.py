@@ -6,14 +6,35 @@ from typing import Any, Dict, Iterable, List, Optional
 
 import requests
 
+from app.config import optional_env_int
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://localhost:8000/vap").rstrip("/")
 FORMULA_REFRESH_PATH = "/formula/run-formula-engine"
 
-# Serialize Python→Node formula calls. Concurrent daily/manual/range jobs
+# Node runs FORMULA_ENGINE_CONCURRENCY formulas per engine call, each holding
+# a few pooled connections; size our in-flight calls so they fit DB_POOL_MAX.
+_CONNECTIONS_PER_FORMULA = 5
+
+
+def formula_refresh_concurrency() -> int:
+    """
+    Max concurrent Python→Node formula calls (FORMULA_REFRESH_CONCURRENCY).
+
+    Defaults to what the Node DB pool can absorb when both services read the
+    same env: DB_POOL_MAX // (FORMULA_ENGINE_CONCURRENCY * 5), capped by
+    FORMULA_ENGINE_MAX_RUNS (more would only queue inside Node).
+    """
+    pool_max = optional_env_int("DB_POOL_MAX", 25)
+    per_run = optional_env_int("FORMULA_ENGINE_CONCURRENCY", 2, minimum=1) * _CONNECTIONS_PER_FORMULA
+    max_runs = optional_env_int("FORMULA_ENGINE_MAX_RUNS", 2, minimum=1)
+    return optional_env_int("FORMULA_REFRESH_CONCURRENCY", min(max_runs, pool_max // per_run), minimum=1)
+
+
+# Bound Python→Node formula calls. Unbounded daily/manual/range jobs
 # otherwise stampede the Node DB pool and hang forever in running_formulas.
-_formula_refresh_lock = threading.Lock()
+_formula_refresh_slots = threading.BoundedSemaphore(formula_refresh_concurrency())
 
 
 def _formula_timeout_seconds() -> int:
@@ -76,19 +97,27 @@ def trigger_backend_formula_refresh(
     trade_date: Optional[str] = None,
     timeout_seconds: Optional[int] = None,
     job_meta: Optional[Dict[str, Any]] = None,
+    trade_dates: Optional[List[str]] = None,
+    formulas: Optional[List[str]] = None,
+    exclude_formulas: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
-    """Run backend formula engine for a PR bhavcopy trade date (with retries)."""
+    """
+    Run backend formula engine for a PR bhavcopy trade date (with retries).
+
+    ``trade_dates`` sends a batch in one request (Node runs them oldest
+    first); ``formulas`` / ``exclude_formulas`` restrict which formulas run.
+    """
     wait_timeout = max(
         timeout_seconds or _formula_timeout_seconds(),
         _formula_timeout_seconds(),
     )
-    acquired = _formula_refresh_lock.acquire(timeout=wait_timeout)
+    acquired = _formula_refresh_slots.acquire(timeout=wait_timeout)
     if not acquired:
         return {
             "success": False,
             "error": (
-                "Timed out waiting for formula engine lock "
-                "(another job is already running formulas)"
+                "Timed out waiting for a formula engine slot "
+                "(other jobs are already running formulas)"
             ),
             "trade_date": trade_date,
         }
@@ -98,9 +127,12 @@ def trigger_backend_formula_refresh(
             trade_date=trade_date,
             timeout_seconds=timeout_seconds,
             job_meta=job_meta,
+            trade_dates=trade_dates,
+            formulas=formulas,
+            exclude_formulas=exclude_formulas,
         )
     finally:
-        _formula_refresh_lock.release()
+        _formula_refresh_slots.release()
 
 
 def _trigger_backend_formula_refresh_unlocked(
@@ -108,6 +140,9 @@ def _trigger_backend_formula_refresh_unlocked(
     trade_date: Optional[str] = None,
     timeout_seconds: Optional[int] = None,
     job_meta: Optional[Dict[str, Any]] = None,
+    trade_dates: Optional[List[str]] = None,
+    formulas: Optional[List[str]] = None,
+    exclude_formulas: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     from app.services.manual_job_hub import manual_job_hub
 
@@ -120,6 +155,16 @@ def _trigger_backend_formula_refresh_unlocked(
 
     if trade_date:
         payload["trade_date"] = trade_date
+    if trade_dates:
+        payload["trade_dates"] = list(trade_dates)
+        # A batch runs one engine pass per date inside the same request
+        timeout *= len(trade_dates)
+        if not trade_date:
+            trade_date = trade_dates[0] if len(trade_dates) == 1 else f"{trade_dates[0]}..{trade_dates[-1]}"
+    if formulas:
+        payload["formulas"] = list(formulas)
+    if exclude_formulas:
+        payload["exclude_formulas"] = list(exclude_formulas)
 
     headers = _formula_auth_headers()
     if "X-Internal-Api-Key" not in headers and "Authorization" not in headers:
@@ -272,38 +317,28 @@ def trigger_backend_formula_refresh_for_dates(
     trade_dates: Iterable[str],
     context: Optional[Any] = None,
 ) -> List[Dict[str, Any]]:
-    """Run formulas in chronological order for multiple bhavcopy dates."""
-    results: List[Dict[str, Any]] = []
-    dates = sorted(set(trade_dates))
-    total = len(dates)
-
-    job_meta: Dict[str, Any] = {}
-    if context is not None:
-        job_meta = {
-            "log_id": getattr(context, "log_id", None),
-            "job_name": getattr(context, "job_name", None),
-            "job_group": getattr(context, "job_group", None),
-        }
-
-    for index, trade_date in enumerate(dates, start=1):
-        if context is not None and hasattr(context, "flush_progress"):
-            context.flush_progress(
-                phase="running_formulas",
-                trade_date=trade_date,
-                formula_index=index,
-                formula_total=total,
-            )
-        result = trigger_backend_formula_refresh(
-            trigger_source,
-            trade_date=trade_date,
-            job_meta={**job_meta, "formula_index": index, "formula_total": total},
-        )
-        result["trade_date"] = trade_date
-        results.append(result)
-        # Brief pause so Node can GC between heavy formula runs
-        time.sleep(2)
-
-    return results
+    """
+    Run formulas for multiple bhavcopy dates (one result per date, oldest first).
+
+    Independent formulas run for batches of dates concurrently; FTD / Buy Day
+    follow in date order (see ``FormulaRefreshScheduler``). Latency
+    histograms land in the job's ``formula_schedule`` data.
+    """
+    from app.services.formula_scheduler import FormulaRefreshScheduler
+
+    outcome = FormulaRefreshScheduler(trigger_source, context=context).run(trade_dates)
+    schedule = outcome["schedule"]
+    logger.info(
+        "Formula refresh for %s date(s) took %ss over %s request(s) (concurrency=%s, batch=%s)",
+        schedule["dates"],
+        schedule["duration_seconds"],
+        schedule["requests"],
+        schedule["concurrency"],
+        schedule["batch_size"],
+    )
+    if context is not None and hasattr(context, "set_data"):
+        context.set_data(formula_schedule=schedule)
+    return outcome["results"]
 
 
 def extract_trade_dates_from_bhavcopy_results(results: List[Dict[str, Any]]) -> List[str]:
@@ -331,12 +366,10 @@ def get_latest_pr_trade_date() -> Optional[str]:
     from app.services.bhavcopy_service import bhavcopy_service
 
     today = datetime.now().date()
+    loaded = bhavcopy_service.loaded_dates(today - timedelta(days=29), today)
     for days_back in range(30):
         day = today - timedelta(days=days_back)
-        if day.weekday() >= 5:
-            continue
-        date_obj = datetime.combine(day, datetime.min.time())
-        if bhavcopy_service.is_trade_date_processed(date_obj):
+        if day.weekday() < 5 and day in loaded:
             return str(day)
     return None
 
@@ -348,10 +381,11 @@ def list_pr_trade_dates_in_range(start_date: str, end_date: str) -> List[str]:
 
     start = datetime.strptime(start_date, "%Y-%m-%d")
     end = datetime.strptime(end_date, "%Y-%m-%d")
+    loaded = bhavcopy_service.loaded_dates(start.date(), end.date())
     dates: List[str] = []
     cursor = start
     while cursor <= end:
-        if cursor.weekday() < 5 and bhavcopy_service.is_trade_date_processed(cursor):
+        if cursor.weekday() < 5 and cursor.date() in loaded:
             dates.append(str(cursor.date()))
         cursor += timedelta(days=1)
     return dates
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import date, datetime
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+_COPY_BLOCK_BYTES = 1024 * 1024
+
+
+class BhavcopyArchiveCache:
+    """
+    On-disk cache of raw bhavcopy zips, content-addressed by SHA-256.
+
+    Layout under ``root``::
+
+        objects/<sha[:2]>/<sha>.zip   immutable zip bodies
+        index.json                    trade date -> sha256, source_url, size, last_access
+
+    Two trade dates with identical bytes share one object. When the objects
+    exceed ``max_bytes`` the least recently used dates are dropped (and their
+    objects deleted once unreferenced).
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self._root = root
+        self._max_bytes = max_bytes
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "corrupt": 0}
+
+    # -----------------------------------------------------
+    # PATHS / INDEX
+    # -----------------------------------------------------
+    @property
+    def root(self) -> str:
+        return self._root or config.BHAVCOPY_ARCHIVE_DIR
+
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return max(1, config.BHAVCOPY_ARCHIVE_MAX_MB) * 1024 * 1024
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "objects", sha256[:2], f"{sha256}.zip")
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root, "index.json")
+
+    def _entries(self) -> Dict[str, Dict[str, Any]]:
+        if self._index is None:
+            try:
+                with open(self._index_path(), encoding="utf-8") as handle:
+                    self._index = json.load(handle).get("dates", {})
+            except FileNotFoundError:
+                self._index = {}
+            except (OSError, ValueError) as exc:
+                logger.warning(f"⚠ Bhavcopy archive index unreadable, starting empty: {exc}")
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".json.tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"dates": self._entries()}, handle, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._index_path())
+
+    def _drop(self, key: str) -> int:
+        """Remove one date; delete its object if no other date points at it."""
+        entry = self._entries().pop(key, None)
+        if entry is None:
+            return 0
+        sha256 = entry["sha256"]
+        if any(e["sha256"] == sha256 for e in self._entries().values()):
+            return 0
+        try:
+            os.remove(self._object_path(sha256))
+        except FileNotFoundError:
+            pass
+        return int(entry.get("size") or 0)
+
+    def _evict(self, keep: Optional[str] = None):
+        entries = self._entries()
+        total = sum({e["sha256"]: int(e.get("size") or 0) for e in entries.values()}.values())
+        by_age = sorted(
+            (k for k in entries if k != keep),
+            key=lambda k: entries[k].get("last_access") or "",
+        )
+        for key in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= self._drop(key)
+            self._stats["evictions"] += 1
+            logger.info(f"🗑 Evicted bhavcopy archive for {key}")
+
+    # -----------------------------------------------------
+    # PUBLIC API
+    # -----------------------------------------------------
+    def store(self, trade_date: date, body: BinaryIO, source_url: str) -> Optional[Dict[str, Any]]:
+        """
+        Copy a seekable zip body into the archive and index it under ``trade_date``.
+
+        Non-zip bodies (e.g. an HTML error page served with 200) are not stored.
+        ``body`` is rewound to the start before returning.
+        """
+        body.seek(0)
+        if not zipfile.is_zipfile(body):
+            body.seek(0)
+            return None
+        body.seek(0)
+
+        objects_dir = os.path.join(self.root, "objects")
+        os.makedirs(objects_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=objects_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for block in iter(lambda: body.read(_COPY_BLOCK_BYTES), b""):
+                    digest.update(block)
+                    out.write(block)
+                    size += len(block)
+            sha256 = digest.hexdigest()
+            final_path = self._object_path(sha256)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, final_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            body.seek(0)
+
+        key = trade_date.isoformat()
+        now = datetime.now().isoformat(timespec="seconds")
+        entry = {
+            "sha256": sha256,
+            "source_url": source_url,
+            "size": size,
+            "stored_at": now,
+            "last_access": now,
+        }
+        with self._lock:
+            previous = self._entries().get(key)
+            if previous and previous["sha256"] != sha256:
+                self._drop(key)
+            self._entries()[key] = entry
+            self._stats["stores"] += 1
+            self._evict(keep=key)
+            self._save_index()
+        logger.info(f"🗃 Archived bhavcopy {key} ({size} bytes, sha256 {sha256[:12]})")
+        return dict(entry)
+
+    def open(self, trade_date: date) -> Optional[Tuple[Dict[str, Any], BinaryIO]]:
+        """
+        ``(entry, handle)`` for an archived date, or None on a miss.
+
+        The object is re-hashed before it is handed out; a mismatching or
+        missing file is dropped from the index and reported as a miss.
+        """
+        key = trade_date.isoformat()
+        with self._lock:
+            entry = self._entries().get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            entry = dict(entry)
+
+        path = self._object_path(entry["sha256"])
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            handle = None
+        if handle is not None:
+            digest = hashlib.sha256()
+            for block in iter(lambda: handle.read(_COPY_BLOCK_BYTES), b""):
+                digest.update(block)
+            if digest.hexdigest() == entry["sha256"]:
+                handle.seek(0)
+            else:
+                handle.close()
+                handle = None
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+        with self._lock:
+            if handle is None:
+                logger.warning(f"⚠ Bhavcopy archive object for {key} missing or corrupt, dropping")
+                self._entries().pop(key, None)
+                self._stats["corrupt"] += 1
+                self._stats["misses"] += 1
+                self._save_index()
+                return None
+            self._stats["hits"] += 1
+            current = self._entries().get(key)
+            if current is not None:
+                current["last_access"] = datetime.now().isoformat(timespec="seconds")
+                self._save_index()
+        return entry, handle
+
+    def has(self, trade_date: date) -> bool:
+        with self._lock:
+            return trade_date.isoformat() in self._entries()
+
+    def dates_in_range(self, start: date, end: date) -> List[date]:
+        with self._lock:
+            keys = list(self._entries())
+        found = [date.fromisoformat(k) for k in keys]
+        return sorted(d for d in found if start <= d <= end)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._entries()
+            objects = {e["sha256"]: int(e.get("size") or 0) for e in entries.values()}
+            stats = dict(self._stats)
+            stats.update({
+                "enabled": config.BHAVCOPY_ARCHIVE_ENABLED,
+                "root": self.root,
+                "dates": len(entries),
+                "objects": len(objects),
+                "bytes": sum(objects.values()),
+                "max_bytes": self.max_bytes,
+            })
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+
+bhavcopy_archive = BhavcopyArchiveCache()
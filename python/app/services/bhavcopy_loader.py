@@ -0,0 +1,252 @@
+import csv
+import logging
+import math
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from app.config import config
+from app.database.connection import db_manager
+
+logger = logging.getLogger(__name__)
+
+# pymysql error codes raised when the server / client refuses LOCAL INFILE
+_LOAD_DATA_DISABLED_CODES = {1148, 2068, 3948}
+
+
+def bulk_chunk_rows() -> int:
+    try:
+        return max(500, int(os.getenv("BHAVCOPY_BULK_CHUNK_ROWS", "5000")))
+    except ValueError:
+        return 5000
+
+
+def _bulk_mode() -> str:
+    mode = os.getenv("BHAVCOPY_BULK_MODE", "executemany").strip().lower()
+    return mode if mode in ("executemany", "load_data") else "executemany"
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB (None when the OS does not expose it)."""
+    try:
+        with open("/proc/self/statm") as handle:
+            pages = int(handle.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+
+        # ru_maxrss is KB on Linux; best effort fallback (process peak, not current)
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except Exception:
+        return None
+
+
+def chunk_to_rows(chunk: pd.DataFrame) -> List[tuple]:
+    """Convert a bounded chunk to DB-API rows with NaN / NaT / inf mapped to NULL."""
+    values = chunk.astype(object)
+    values = values.where(values.notna(), None)
+    rows = []
+    for row in values.itertuples(index=False, name=None):
+        rows.append(tuple(
+            None if isinstance(v, float) and not math.isfinite(v) else v
+            for v in row
+        ))
+    return rows
+
+
+class BhavcopyBulkLoader:
+    """
+    Stream bhavcopy frames into a per-connection staging table in bounded
+    chunks, then merge into the target with a single
+    INSERT ... SELECT ... ON DUPLICATE KEY UPDATE.
+    """
+
+    def __init__(self, db_name: Optional[str] = None):
+        self.db_name = db_name or config.DB_BHAVCOPY
+
+    def load(
+        self,
+        table_name: str,
+        frames: Iterable[pd.DataFrame],
+        prepare: Optional[Callable[[str, pd.DataFrame], None]] = None,
+        replace_source_date: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        """
+        Load every frame for one segment table.
+
+        ``prepare(table_name, first_frame)`` runs once before staging so the
+        target table exists with every column of the incoming file.
+        ``replace_source_date`` is for tables without a natural key: rows of
+        that date are deleted in the merge transaction so re-runs replace
+        instead of appending duplicates.
+        """
+        started_at = time.perf_counter()
+        staging = f"_stg_{table_name}"
+        mode = _bulk_mode()
+        chunk_rows = bulk_chunk_rows()
+        metrics: Dict[str, Any] = {
+            "rows": 0,
+            "chunks": 0,
+            "mode": mode,
+            "peak_rss_mb": current_rss_mb(),
+        }
+
+        conn = None
+        cursor = None
+        columns: Optional[List[str]] = None
+
+        try:
+            for frame in frames:
+                if frame is None or frame.empty:
+                    continue
+
+                if columns is None:
+                    if prepare is not None:
+                        prepare(table_name, frame)
+                    columns = list(frame.columns)
+                    conn = db_manager.get_connection(self.db_name)
+                    cursor = conn.cursor()
+                    self._create_staging(cursor, table_name, staging, columns)
+
+                for start in range(0, len(frame), chunk_rows):
+                    chunk = frame.iloc[start:start + chunk_rows].reindex(columns=columns)
+                    mode = self._stage_chunk(cursor, staging, columns, chunk, mode)
+                    metrics["rows"] += len(chunk)
+                    metrics["chunks"] += 1
+                    self._track_rss(metrics)
+
+            if columns is None:
+                metrics["duration_seconds"] = round(time.perf_counter() - started_at, 3)
+                metrics["rows_per_second"] = 0
+                return metrics
+
+            merge_started = time.perf_counter()
+            if replace_source_date is not None:
+                cursor.execute(
+                    f"DELETE FROM `{table_name}` WHERE source_date = %s",
+                    (replace_source_date,),
+                )
+            metrics["affected_rows"] = self._merge(cursor, table_name, staging, columns)
+            conn.commit()
+            metrics["merge_seconds"] = round(time.perf_counter() - merge_started, 3)
+        except Exception:
+            if conn is not None:
+                conn.rollback()
+            raise
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS `{staging}`")
+                except Exception as exc:
+                    logger.debug(f"Staging cleanup skipped for {staging}: {exc}")
+                cursor.close()
+            if conn is not None:
+                conn.close()
+
+        elapsed = time.perf_counter() - started_at
+        metrics["mode"] = mode
+        metrics["duration_seconds"] = round(elapsed, 3)
+        metrics["rows_per_second"] = round(metrics["rows"] / elapsed, 1) if elapsed > 0 else None
+        self._track_rss(metrics)
+        return metrics
+
+    # -----------------------------------------------------
+    # STAGING
+    # -----------------------------------------------------
+    def _create_staging(self, cursor, table_name: str, staging: str, columns: List[str]):
+        # Same column types as the target, but no keys: duplicate rows inside
+        # one file must not fail staging, the merge decides who wins.
+        col_sql = ", ".join(f"`{c}`" for c in columns)
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS `{staging}`")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE `{staging}` "
+            f"SELECT {col_sql} FROM `{table_name}` LIMIT 0"
+        )
+
+    def _stage_chunk(
+        self,
+        cursor,
+        staging: str,
+        columns: List[str],
+        chunk: pd.DataFrame,
+        mode: str,
+    ) -> str:
+        if mode == "load_data":
+            try:
+                self._load_data_chunk(cursor, staging, columns, chunk)
+                return mode
+            except Exception as exc:
+                code = exc.args[0] if exc.args else None
+                if code not in _LOAD_DATA_DISABLED_CODES:
+                    raise
+                logger.warning(
+                    f"LOAD DATA LOCAL INFILE unavailable ({exc}); falling back to executemany"
+                )
+
+        self._executemany_chunk(cursor, staging, columns, chunk)
+        return "executemany"
+
+    def _executemany_chunk(self, cursor, staging: str, columns: List[str], chunk: pd.DataFrame):
+        col_sql = ", ".join(f"`{c}`" for c in columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        # pymysql rewrites this into multi-row VALUES batches under max_allowed_packet
+        cursor.executemany(
+            f"INSERT INTO `{staging}` ({col_sql}) VALUES ({placeholders})",
+            chunk_to_rows(chunk),
+        )
+
+    def _load_data_chunk(self, cursor, staging: str, columns: List[str], chunk: pd.DataFrame):
+        col_sql = ", ".join(f"`{c}`" for c in columns)
+        fd, path = tempfile.mkstemp(prefix=f"{staging}_", suffix=".csv")
+        try:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as handle:
+                chunk.to_csv(
+                    handle,
+                    header=False,
+                    index=False,
+                    na_rep="NULL",
+                    quoting=csv.QUOTE_MINIMAL,
+                    lineterminator="\n",
+                )
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE `{staging}` "
+                f"CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                f"LINES TERMINATED BY '\\n' ({col_sql})",
+                (path.replace("\\", "/"),),
+            )
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # -----------------------------------------------------
+    # MERGE
+    # -----------------------------------------------------
+    def _merge(self, cursor, table_name: str, staging: str, columns: List[str]) -> int:
+        col_sql = ", ".join(f"`{c}`" for c in columns)
+        update_sql = ", ".join(
+            f"`{c}` = VALUES(`{c}`)"
+            for c in columns
+            if c.lower() not in ("id", "source_date")
+        )
+        sql = f"INSERT INTO `{table_name}` ({col_sql}) SELECT {col_sql} FROM `{staging}`"
+        if update_sql:
+            sql += f" ON DUPLICATE KEY UPDATE {update_sql}"
+        cursor.execute(sql)
+        return cursor.rowcount
+
+    @staticmethod
+    def _track_rss(metrics: Dict[str, Any]):
+        rss = current_rss_mb()
+        if rss is not None and (metrics.get("peak_rss_mb") or 0) < rss:
+            metrics["peak_rss_mb"] = rss
+
+
+bhavcopy_loader = BhavcopyBulkLoader()
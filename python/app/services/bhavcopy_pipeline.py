@@ -0,0 +1,327 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from app.config import config, optional_env_int
+from app.services.bhavcopy_archive import bhavcopy_archive
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def stage_settings() -> Dict[str, int]:
+    """Worker counts per stage, the bound on each hand-off queue and on parsed chunks per day."""
+    return {
+        "download_workers": optional_env_int("BHAVCOPY_DOWNLOAD_WORKERS", config.MAX_WORKERS, minimum=1),
+        "parse_workers": optional_env_int("BHAVCOPY_PARSE_WORKERS", 2, minimum=1),
+        "write_workers": optional_env_int("BHAVCOPY_WRITE_WORKERS", 1, minimum=1),
+        "queue_size": optional_env_int("BHAVCOPY_STAGE_QUEUE_SIZE", 4, minimum=1),
+        "parse_buffer_chunks": optional_env_int("BHAVCOPY_PARSE_BUFFER_CHUNKS", 2, minimum=1),
+    }
+
+
+class _SegmentStream:
+    """
+    One day's parsed segments, passed from its parse worker to a writer
+    through a buffer of at most ``max_chunks`` chunks. The parse worker
+    blocks while the buffer is full; a writer that gives up calls
+    ``abandon`` so the parse worker stops instead of waiting forever.
+    """
+
+    def __init__(self, max_chunks: int):
+        self._items: "queue.Queue" = queue.Queue(maxsize=max_chunks)
+        self._abandoned = threading.Event()
+        self.parse_seconds = 0.0
+
+    def _put(self, item: tuple) -> bool:
+        while not self._abandoned.is_set():
+            try:
+                self._items.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self) -> tuple:
+        item = self._items.get()
+        if item[0] == "error":
+            raise item[1]
+        return item
+
+    def produce(self, segments: Iterator[Dict[str, Any]]):
+        """Parse-worker side: run the lazy ``segments`` into the buffer."""
+        started = time.perf_counter()
+        blocked = 0.0
+
+        def put(item: tuple) -> bool:
+            nonlocal blocked
+            waited = time.perf_counter()
+            ok = self._put(item)
+            blocked += time.perf_counter() - waited
+            return ok
+
+        try:
+            for segment in segments:
+                if not put(("segment", segment["table"], segment["sample"])):
+                    return
+                for frame in segment["frames"]:
+                    if not put(("chunk", frame)):
+                        return
+        except Exception as exc:
+            self._put(("error", exc))
+            return
+        finally:
+            close = getattr(segments, "close", None)
+            if close is not None:
+                close()
+            self.parse_seconds = time.perf_counter() - started - blocked
+        self._put(("end",))
+
+    def segments(self) -> Iterator[Dict[str, Any]]:
+        """Writer side: the segments again, in the shape ``parse_bhavcopy_file`` yields."""
+        item = self._get()
+        while item[0] != "end":
+            _, table, sample = item
+            following: List[tuple] = []
+
+            def frames() -> Iterable[Any]:
+                while True:
+                    nxt = self._get()
+                    if nxt[0] != "chunk":
+                        following.append(nxt)
+                        return
+                    yield nxt[1]
+
+            chunks = frames()
+            yield {"table": table, "frames": chunks, "sample": sample}
+            for _ in chunks:  # skip whatever the caller left unread
+                pass
+            item = following[0]
+
+    def abandon(self):
+        self._abandoned.set()
+
+
+class _Stage:
+    """A pool of threads draining one bounded queue into the next."""
+
+    def __init__(self, name: str, workers: int, handler: Callable, inbox: "queue.Queue", outbox=None):
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stats = {"items": 0, "errors": 0, "busy_seconds": 0.0, "blocked_put_seconds": 0.0}
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"bhavcopy-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def stop(self):
+        for _ in self._threads:
+            self.inbox.put(_STOP)
+
+    def forward(self, job: Dict[str, Any]):
+        started = time.perf_counter()
+        self.outbox.put(job)
+        with self._lock:
+            self.stats["blocked_put_seconds"] += time.perf_counter() - started
+
+    def _run(self):
+        while True:
+            job = self.inbox.get()
+            if job is _STOP:
+                return
+            started = time.perf_counter()
+            failed = False
+            try:
+                self.handler(job)
+            except Exception:
+                # A dead worker would leave upstream forward() blocked on the bounded queue
+                logger.exception(f"Bhavcopy {self.name} stage handler failed for {job.get('date_obj')}")
+                failed = True
+            with self._lock:
+                self.stats["items"] += 1
+                self.stats["errors"] += int(failed)
+                self.stats["busy_seconds"] += time.perf_counter() - started
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["workers"] = len(self._threads)
+        stats["busy_seconds"] = round(stats["busy_seconds"], 3)
+        stats["blocked_put_seconds"] = round(stats["blocked_put_seconds"], 3)
+        return stats
+
+
+class BhavcopyRangePipeline:
+    """
+    Staged ingestion for a range of trade dates.
+
+    download (network, rate limited per host by the NSE session)
+      -> parse (CSV -> typed chunks)
+      -> write (bulk load + MISSING markers)
+
+    Stages are joined by bounded queues, so a slow DB backs pressure up to
+    the downloaders instead of piling parsed frames in memory. A parse
+    worker hands its day to the writer before parsing it and then streams
+    chunks through a per-day buffer of BHAVCOPY_PARSE_BUFFER_CHUNKS. Parsed
+    data in memory is therefore bounded by parse_workers x (buffer + 1)
+    chunks of BHAVCOPY_BULK_CHUNK_ROWS rows, plus the chunk each writer is
+    loading, however long the range. The queues only hold download bodies
+    (spooled, see ``open_downloaded_body``) and lazy parse handles. Each date yields exactly one result dict, shaped like
+    ``process_zip_for_date``.
+    """
+
+    def __init__(
+        self,
+        service,
+        settings: Optional[Dict[str, int]] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.service = service
+        self.settings = settings or stage_settings()
+        self.on_result = on_result
+        self._results: Dict[Any, Dict[str, Any]] = {}
+        self._results_lock = threading.Lock()
+        self._callback_lock = threading.Lock()
+
+    def _finish(self, job: Dict[str, Any], result: Dict[str, Any]):
+        body = job.pop("body", None)
+        if body is not None:
+            body.close()
+        with self._results_lock:
+            self._results[job["date_obj"]] = result
+        if not self.on_result:
+            return
+        try:
+            with self._callback_lock:
+                self.on_result(result)
+        except Exception:
+            logger.exception(f"Bhavcopy on_result callback failed for {job['date_obj']}")
+
+    def _fail(self, job: Dict[str, Any], exc: Exception):
+        self._finish(job, self.service.error_result(job["started_at"], job["date_obj"], exc))
+
+    # -----------------------------------------------------
+    # STAGES
+    # -----------------------------------------------------
+    def _download(self, job: Dict[str, Any]):
+        service = self.service
+        date_obj = job["date_obj"]
+        try:
+            skipped = service.session_skip_result(date_obj, job["force_refresh"], job["started_at"])
+            if skipped is not None:
+                self._finish(job, skipped)
+                return
+
+            archived = None
+            if config.BHAVCOPY_ARCHIVE_ENABLED:
+                archived = bhavcopy_archive.open(date_obj.date())
+            if archived is not None:
+                entry, job["body"] = archived
+                job["source_url"], job["origin"] = entry["source_url"], "archive"
+            else:
+                resp, source_url = service.download_bhavcopy(date_obj, job["timings"])
+                if resp is None or source_url is None:
+                    self._finish(job, service.not_found_result(job["started_at"], date_obj, job["timings"]))
+                    return
+                job["body"] = service.open_downloaded_body(
+                    resp, source_url, date_obj, archive=True, timings=job["timings"]
+                )
+                job["source_url"], job["origin"] = source_url, "network"
+        except Exception as exc:
+            self._fail(job, exc)
+            return
+        self.download_stage.forward(job)
+
+    def _parse(self, job: Dict[str, Any]):
+        body = job.pop("body")
+        try:
+            parsed = self.service.parse_bhavcopy_file(
+                body, job["source_url"], job["date_obj"], job["force_refresh"]
+            )
+            segments = parsed["segments"]
+        except Exception as exc:
+            body.close()
+            self._fail(job, exc)
+            return
+
+        # The writer takes the day first; this worker then parses into the bounded stream
+        stream = _SegmentStream(self.settings.get("parse_buffer_chunks", 2))
+        job["stream"] = stream
+        job["parsed"] = dict(parsed, segments=stream.segments())
+        try:
+            self.parse_stage.forward(job)
+            stream.produce(segments)
+        finally:
+            body.close()
+
+    def _write(self, job: Dict[str, Any]):
+        service = self.service
+        stream = job.pop("stream")
+        try:
+            started = time.perf_counter()
+            processed = service.write_parsed_bhavcopy(job.pop("parsed"), job["date_obj"], job["force_refresh"])
+            job["timings"]["write_seconds"] = round(time.perf_counter() - started, 3)
+            job["timings"]["parse_seconds"] = round(stream.parse_seconds, 3)
+            self._finish(job, service.processed_result(
+                job["started_at"], job["date_obj"], processed,
+                job["source_url"], job["origin"], job["timings"],
+            ))
+        except Exception as exc:
+            self._fail(job, exc)
+        finally:
+            stream.abandon()
+
+    # -----------------------------------------------------
+    # RUN
+    # -----------------------------------------------------
+    def run(self, dates: List[datetime], force_refresh: bool = False) -> Dict[str, Any]:
+        size = self.settings["queue_size"]
+        download_q: "queue.Queue" = queue.Queue()
+        parse_q: "queue.Queue" = queue.Queue(maxsize=size)
+        write_q: "queue.Queue" = queue.Queue(maxsize=size)
+
+        self.download_stage = _Stage("download", self.settings["download_workers"], self._download, download_q, parse_q)
+        self.parse_stage = _Stage("parse", self.settings["parse_workers"], self._parse, parse_q, write_q)
+        self.write_stage = _Stage("write", self.settings["write_workers"], self._write, write_q)
+        stages = (self.download_stage, self.parse_stage, self.write_stage)
+
+        started = time.perf_counter()
+        for stage in stages:
+            stage.start()
+        for date_obj in dates:
+            download_q.put({
+                "date_obj": date_obj,
+                "force_refresh": force_refresh,
+                "started_at": time.perf_counter(),
+                "timings": {},
+            })
+
+        # Shut stages down front to back so every queued job drains first
+        for stage in stages:
+            stage.stop()
+            stage.join()
+
+        results = [self._results[d] for d in dates if d in self._results]
+        return {
+            "results": results,
+            "pipeline": {
+                "settings": dict(self.settings),
+                "duration_seconds": round(time.perf_counter() - started, 3),
+                "stages": {stage.name: stage.snapshot() for stage in stages},
+            },
+        }
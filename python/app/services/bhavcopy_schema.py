@@ -0,0 +1,553 @@
+import logging
+import re
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.config import config
+from app.database.connection import db_manager
+
+logger = logging.getLogger(__name__)
+
+PRICE = "DECIMAL(18,4)"
+VALUE = "DECIMAL(24,4)"
+PERCENT = "DECIMAL(12,4)"
+QTY = "BIGINT"
+
+# Columns every loader adds on top of the CSV payload.
+META_COLUMNS: Dict[str, str] = {
+    "source_date": "DATE",
+    "fetched_at": "DATETIME",
+    "status": "VARCHAR(16)",
+    "source_file": "VARCHAR(255)",
+    "source_url": "VARCHAR(512)",
+}
+
+# =========================================================
+# SEGMENT REGISTRY
+# =========================================================
+# columns:     declared type per (sanitized) CSV column; anything not listed
+#              is still accepted and stored as TEXT.
+# natural_key: unique key used by ON DUPLICATE KEY UPDATE (always ends with
+#              source_date). Key columns are NOT NULL with a type default.
+# indexes:     secondary indexes for symbol+date scans.
+# aliases:     alternative header -> canonical column (e.g. UDiFF CM files).
+SEGMENT_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "pr": {
+        "columns": {
+            "MKT": "VARCHAR(8)",
+            "SECURITY": "VARCHAR(255)",
+            "PREV_CL_PR": PRICE,
+            "OPEN_PRICE": PRICE,
+            "HIGH_PRICE": PRICE,
+            "LOW_PRICE": PRICE,
+            "CLOSE_PRICE": PRICE,
+            "NET_TRDVAL": VALUE,
+            "NET_TRDQTY": QTY,
+            "IND_SEC": "VARCHAR(8)",
+            "CORP_IND": "VARCHAR(8)",
+            "TRADES": QTY,
+            "HI_52_WK": PRICE,
+            "LO_52_WK": PRICE,
+        },
+        "natural_key": ("SECURITY", "MKT", "source_date"),
+        "indexes": {
+            "date_security": ("source_date", "SECURITY"),
+            # Covers the technical screener history scan without row lookups
+            "security_date_ohlcv": (
+                "SECURITY", "source_date", "OPEN_PRICE", "HIGH_PRICE",
+                "LOW_PRICE", "CLOSE_PRICE", "NET_TRDQTY", "PREV_CL_PR",
+                "HI_52_WK", "LO_52_WK",
+            ),
+        },
+    },
+    "pd": {
+        "columns": {
+            "MKT": "VARCHAR(8)",
+            "SERIES": "VARCHAR(16)",
+            "SYMBOL": "VARCHAR(64)",
+            "SECURITY": "VARCHAR(255)",
+            "PREV_CL_PR": PRICE,
+            "OPEN_PRICE": PRICE,
+            "HIGH_PRICE": PRICE,
+            "LOW_PRICE": PRICE,
+            "CLOSE_PRICE": PRICE,
+            "NET_TRDVAL": VALUE,
+            "NET_TRDQTY": QTY,
+            "IND_SEC": "VARCHAR(8)",
+            "CORP_IND": "VARCHAR(8)",
+            "TRADES": QTY,
+            "HI_52_WK": PRICE,
+            "LO_52_WK": PRICE,
+        },
+        "natural_key": ("SYMBOL", "SERIES", "MKT", "SECURITY", "source_date"),
+        "indexes": {
+            "date_symbol": ("source_date", "SYMBOL"),
+        },
+    },
+    "eq": {
+        "columns": {
+            "SYMBOL": "VARCHAR(64)",
+            "SERIES": "VARCHAR(16)",
+            "PREV_CLOSE": PRICE,
+            "OPEN_PRICE": PRICE,
+            "HIGH_PRICE": PRICE,
+            "LOW_PRICE": PRICE,
+            "LAST_PRICE": PRICE,
+            "CLOSE_PRICE": PRICE,
+            "AVG_PRICE": PRICE,
+            "TTL_TRD_QNTY": QTY,
+            "TURNOVER_LACS": VALUE,
+            "NO_OF_TRADES": QTY,
+            "DELIV_QTY": QTY,
+            "DELIV_PER": PERCENT,
+        },
+        "natural_key": ("SYMBOL", "SERIES", "source_date"),
+        "indexes": {
+            "date_symbol": ("source_date", "SYMBOL"),
+        },
+        "aliases": {"TckrSymb": "SYMBOL", "SctySrs": "SERIES"},
+    },
+    "fo": {
+        "columns": {
+            "INSTRUMENT": "VARCHAR(16)",
+            "SYMBOL": "VARCHAR(64)",
+            "EXPIRY_DT": "DATE",
+            "STRIKE_PR": PRICE,
+            "OPTION_TYP": "VARCHAR(4)",
+            "OPEN": PRICE,
+            "HIGH": PRICE,
+            "LOW": PRICE,
+            "CLOSE": PRICE,
+            "SETTLE_PR": PRICE,
+            "CONTRACTS": QTY,
+            "VAL_INLAKH": VALUE,
+            "OPEN_INT": QTY,
+            "CHG_IN_OI": QTY,
+        },
+        "natural_key": (
+            "SYMBOL", "INSTRUMENT", "EXPIRY_DT", "STRIKE_PR", "OPTION_TYP", "source_date",
+        ),
+        "indexes": {
+            "date_symbol": ("source_date", "SYMBOL"),
+        },
+    },
+    "bh": {
+        "columns": {
+            "SYMBOL": "VARCHAR(64)",
+            "SERIES": "VARCHAR(16)",
+            "SECURITY": "VARCHAR(255)",
+            "high_low": "VARCHAR(8)",
+        },
+        "natural_key": ("SYMBOL", "SERIES", "high_low", "source_date"),
+        "indexes": {
+            "date_symbol": ("source_date", "SYMBOL"),
+        },
+    },
+    "bc": {
+        "columns": {
+            "SERIES": "VARCHAR(16)",
+            "SYMBOL": "VARCHAR(64)",
+            "SECURITY": "VARCHAR(255)",
+            "RECORD_DT": "DATE",
+            "BC_STRT_DT": "DATE",
+            "BC_END_DT": "DATE",
+            "EX_DT": "DATE",
+            "ND_STRT_DT": "DATE",
+            "ND_END_DT": "DATE",
+            "PURPOSE": "VARCHAR(255)",
+        },
+        "natural_key": ("SYMBOL", "SERIES", "PURPOSE", "source_date"),
+        "indexes": {
+            "date_symbol": ("source_date", "SYMBOL"),
+        },
+    },
+    "gl": {
+        "columns": {
+            "GAIN_LOSS": "VARCHAR(8)",
+            "SECURITY": "VARCHAR(255)",
+            "CLOSE_PRIC": PRICE,
+            "PREV_CL_PR": PRICE,
+            "PERCENT_CG": PERCENT,
+        },
+        "natural_key": ("SECURITY", "GAIN_LOSS", "source_date"),
+        "indexes": {
+            "date_security": ("source_date", "SECURITY"),
+        },
+    },
+    "hl": {
+        "columns": {
+            "SECURITY": "VARCHAR(255)",
+            "NEW": PRICE,
+            "PREVIOUS": PRICE,
+            "NEW_STATUS": "VARCHAR(8)",
+        },
+        "natural_key": ("SECURITY", "NEW_STATUS", "source_date"),
+        "indexes": {
+            "date_security": ("source_date", "SECURITY"),
+        },
+    },
+    "mcap": {
+        "columns": {
+            "Trade_Date": "DATE",
+            "Symbol": "VARCHAR(64)",
+            "Series": "VARCHAR(16)",
+            "Security_Name": "VARCHAR(255)",
+            "Category": "VARCHAR(64)",
+            "Last_Trade_Date": "DATE",
+            "Face_Value_Rs": PRICE,
+            "Issue_Size": QTY,
+            "Close_Price_Paid_up_value_Rs": PRICE,
+            "Market_Cap_Rs": VALUE,
+        },
+        "natural_key": ("Symbol", "Series", "source_date"),
+        "indexes": {
+            "date_symbol": ("source_date", "Symbol"),
+        },
+    },
+    "corpbond": {
+        "columns": {
+            "MARKET": "VARCHAR(8)",
+            "SERIES": "VARCHAR(16)",
+            "SYMBOL": "VARCHAR(64)",
+            "SECURITY": "VARCHAR(255)",
+            "PREV_CL_PR": PRICE,
+            "OPEN_PRICE": PRICE,
+            "HIGH_PRICE": PRICE,
+            "LOW_PRICE": PRICE,
+            "CLOSE_PRICE": PRICE,
+            "NET_TRDVAL": VALUE,
+            "NET_TRDQTY": QTY,
+            "CORP_IND": "VARCHAR(8)",
+            "TRADES": QTY,
+            "HI_52_WK": PRICE,
+            "LO_52_WK": PRICE,
+        },
+        "natural_key": ("SYMBOL", "SERIES", "SECURITY", "source_date"),
+        "indexes": {
+            "date_symbol": ("source_date", "SYMBOL"),
+        },
+    },
+}
+
+_TYPE_RE = re.compile(r"^(\w+)(?:\((\d+)(?:,(\d+))?\))?$")
+
+
+def get_segment_schema(table_name: str) -> Optional[Dict[str, Any]]:
+    return SEGMENT_SCHEMAS.get((table_name or "").lower())
+
+
+def has_natural_key(table_name: str) -> bool:
+    schema = get_segment_schema(table_name)
+    return bool(schema and schema.get("natural_key"))
+
+
+def natural_key_name(table_name: str) -> str:
+    return f"uq_{table_name}_natural"
+
+
+def declared_columns(table_name: str) -> Dict[str, str]:
+    """Declared CSV + metadata column types for a segment (case preserved)."""
+    schema = get_segment_schema(table_name)
+    columns = dict(schema["columns"]) if schema else {}
+    columns.update(META_COLUMNS)
+    return columns
+
+
+def _lookup(columns: Dict[str, str], name: str) -> Optional[str]:
+    lowered = name.lower()
+    for column, sql_type in columns.items():
+        if column.lower() == lowered:
+            return sql_type
+    return None
+
+
+def _key_default(sql_type: str) -> str:
+    base = sql_type.split("(")[0].upper()
+    if base in ("DECIMAL", "BIGINT", "INT"):
+        return "0"
+    if base == "DATE":
+        return "'1970-01-01'"
+    return "''"
+
+
+def _key_default_value(sql_type: str) -> Any:
+    default = _key_default(sql_type)
+    if default == "0":
+        return 0
+    if default == "'1970-01-01'":
+        return date(1970, 1, 1)
+    return ""
+
+
+def column_definition(table_name: str, column: str) -> str:
+    """DDL fragment for one column: declared type, or TEXT for unknown headers."""
+    schema = get_segment_schema(table_name)
+    sql_type = _lookup(declared_columns(table_name), column) if schema else None
+    if sql_type is None:
+        return f"`{column}` TEXT NULL"
+
+    key = [c.lower() for c in (schema.get("natural_key") or ())]
+    if column.lower() == "source_date":
+        return f"`{column}` DATE NOT NULL"
+    if column.lower() in key:
+        return f"`{column}` {sql_type} NOT NULL DEFAULT {_key_default(sql_type)}"
+    return f"`{column}` {sql_type} NULL"
+
+
+def build_create_table_sql(
+    table_name: str,
+    extra_columns: Optional[List[str]] = None,
+    target_name: Optional[str] = None,
+) -> str:
+    """CREATE TABLE for a registered segment, with natural key and scan indexes."""
+    schema = get_segment_schema(table_name)
+    if schema is None:
+        raise ValueError(f"No schema registered for bhavcopy segment '{table_name}'")
+
+    target = target_name or table_name
+    declared = declared_columns(table_name)
+    known = {c.lower() for c in declared}
+    lines = ["`id` BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY"]
+    lines.extend(column_definition(table_name, c) for c in declared)
+    for column in extra_columns or []:
+        if column.lower() not in known and column.lower() != "id":
+            lines.append(f"`{column}` TEXT NULL")
+            known.add(column.lower())
+
+    key_cols = ", ".join(f"`{c}`" for c in schema["natural_key"])
+    lines.append(f"UNIQUE KEY `{natural_key_name(table_name)}` ({key_cols})")
+    for suffix, cols in (schema.get("indexes") or {}).items():
+        index_cols = ", ".join(f"`{c}`" for c in cols)
+        lines.append(f"KEY `idx_{table_name}_{suffix}` ({index_cols})")
+
+    body = ",\n    ".join(lines)
+    return (
+        f"CREATE TABLE IF NOT EXISTS `{target}` (\n    {body}\n"
+        f") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci"
+    )
+
+
+# =========================================================
+# DATAFRAME COERCION
+# =========================================================
+def coerce_frame(table_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a raw CSV chunk to the declared column types so typed tables
+    never receive '-', ' 1,234.50 ' or over-long strings.
+    """
+    schema = get_segment_schema(table_name)
+    if schema is None or df.empty:
+        return df
+
+    for alias, canonical in (schema.get("aliases") or {}).items():
+        if alias in df.columns and canonical not in df.columns:
+            df[canonical] = df[alias]
+
+    declared = schema["columns"]
+    key = {c.lower() for c in schema.get("natural_key") or ()}
+
+    for column in df.columns:
+        sql_type = _lookup(declared, column)
+        if sql_type is None:
+            continue
+
+        match = _TYPE_RE.match(sql_type.replace(" ", ""))
+        base = match.group(1).upper() if match else sql_type.upper()
+        series = df[column]
+
+        if base in ("DECIMAL", "BIGINT"):
+            numeric = pd.to_numeric(
+                series.astype("string").str.replace(",", "", regex=False).str.strip(),
+                errors="coerce",
+            )
+            if base == "BIGINT":
+                numeric = numeric.round().astype("Int64")
+            if column.lower() in key:
+                numeric = numeric.fillna(0)
+            df[column] = numeric
+        elif base == "DATE":
+            parsed = pd.to_datetime(
+                series.astype("string").str.strip(),
+                errors="coerce",
+                format="mixed",
+                dayfirst=True,
+            )
+            values = parsed.dt.date.astype(object).where(parsed.notna(), None)
+            if column.lower() in key:
+                values = values.where(values.notna(), date(1970, 1, 1))
+            df[column] = values
+        else:
+            text_values = series.astype("string").str.strip()
+            if match and match.group(2):
+                text_values = text_values.str.slice(0, int(match.group(2)))
+            if column.lower() in key:
+                text_values = text_values.fillna("")
+            df[column] = text_values
+
+    # Key columns the file does not carry still need their NOT NULL default
+    present = {c.lower() for c in df.columns}
+    for column in schema.get("natural_key") or ():
+        if column.lower() not in present and column != "source_date":
+            df[column] = _key_default_value(declared[column])
+
+    return df
+
+
+# =========================================================
+# ONLINE MIGRATION (TEXT TABLE -> TYPED TABLE)
+# =========================================================
+def _cast_expression(table_name: str, column: str) -> str:
+    sql_type = _lookup(declared_columns(table_name), column)
+    col = f"`{column}`"
+    if sql_type is None:
+        return col
+
+    schema = get_segment_schema(table_name) or {}
+    is_key = column.lower() in {c.lower() for c in schema.get("natural_key") or ()}
+    match = _TYPE_RE.match(sql_type.replace(" ", ""))
+    base = match.group(1).upper() if match else sql_type.upper()
+    cleaned = f"TRIM({col})"
+
+    if base in ("DECIMAL", "BIGINT"):
+        number = f"REPLACE({cleaned}, ',', '')"
+        cast_type = sql_type if base == "DECIMAL" else "DECIMAL(30,4)"
+        expr = (
+            f"CASE WHEN {number} REGEXP '^[-+]?[0-9]*[.]?[0-9]+([eE][-+]?[0-9]+)?$' "
+            f"THEN CAST({number} AS {cast_type}) END"
+        )
+    elif base == "DATE":
+        expr = (
+            f"COALESCE(STR_TO_DATE(LEFT({cleaned}, 10), '%Y-%m-%d'), "
+            f"STR_TO_DATE({cleaned}, '%d-%b-%Y'), "
+            f"STR_TO_DATE({cleaned}, '%d %b %Y'), "
+            f"STR_TO_DATE({cleaned}, '%d-%m-%Y'))"
+        )
+    elif base == "DATETIME":
+        expr = f"CAST(NULLIF({cleaned}, '') AS DATETIME)"
+    else:
+        length = int(match.group(2)) if match and match.group(2) else 255
+        expr = f"NULLIF(LEFT({cleaned}, {length}), '')"
+
+    if is_key and column.lower() != "source_date":
+        expr = f"COALESCE({expr}, {_key_default(sql_type)})"
+    return expr
+
+
+def migrate_segment_table(table_name: str, batch_rows: int = 50000) -> Dict[str, Any]:
+    """
+    Rebuild a legacy TEXT bhavcopy table as a typed table with its natural key.
+
+    Rows are copied into a shadow table in id-ordered batches (short
+    transactions, no long table lock). The shadow is swapped in with an
+    atomic RENAME and any rows written to the old table meanwhile are
+    replayed afterwards. The old table is kept as ``<table>__text_<ts>``.
+    """
+    started_at = time.perf_counter()
+    schema = get_segment_schema(table_name)
+    if schema is None:
+        raise ValueError(f"No schema registered for bhavcopy segment '{table_name}'")
+
+    db_manager.ensure_database(config.DB_BHAVCOPY)
+    conn = db_manager.get_connection(config.DB_BHAVCOPY)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SHOW TABLES LIKE %s", (table_name,))
+        if cursor.fetchone() is None:
+            cursor.execute(build_create_table_sql(table_name))
+            conn.commit()
+            return {"table": table_name, "status": "CREATED"}
+
+        cursor.execute(
+            f"SHOW INDEX FROM `{table_name}` WHERE Key_name = %s",
+            (natural_key_name(table_name),),
+        )
+        if cursor.fetchone() is not None:
+            return {"table": table_name, "status": "ALREADY_TYPED"}
+
+        cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
+        existing = [row[0] for row in cursor.fetchall()]
+        if "id" not in existing:
+            raise RuntimeError(f"`{table_name}` has no id column; cannot batch-copy")
+
+        shadow = f"{table_name}__typed"
+        backup = f"{table_name}__text_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        copy_columns = [c for c in existing if c != "id"]
+        declared_lower = {c.lower() for c in declared_columns(table_name)}
+        target_columns = list(copy_columns)
+        for column in schema["natural_key"]:
+            if column.lower() not in {c.lower() for c in copy_columns}:
+                target_columns.append(column)
+
+        cursor.execute(f"DROP TABLE IF EXISTS `{shadow}`")
+        cursor.execute(build_create_table_sql(
+            table_name,
+            extra_columns=[c for c in copy_columns if c.lower() not in declared_lower],
+            target_name=shadow,
+        ))
+        conn.commit()
+
+        insert_cols = ", ".join(f"`{c}`" for c in target_columns)
+        select_exprs = ", ".join(
+            _cast_expression(table_name, c) if c in copy_columns
+            else _key_default(declared_columns(table_name)[c])
+            for c in target_columns
+        )
+        key_lower = {c.lower() for c in schema["natural_key"]}
+        update_sql = ", ".join(
+            f"`{c}` = VALUES(`{c}`)" for c in target_columns if c.lower() not in key_lower
+        )
+
+        def copy_range(source: str, target: str, after_id: int) -> int:
+            last_id = after_id
+            while True:
+                cursor.execute(
+                    f"SELECT MAX(id) FROM (SELECT id FROM `{source}` "
+                    f"WHERE id > {int(last_id)} ORDER BY id LIMIT {int(batch_rows)}) AS b"
+                )
+                upper = cursor.fetchone()[0]
+                if upper is None:
+                    return last_id
+                # IGNORE turns unparseable legacy values into NULL instead of aborting;
+                # later ids win on natural-key collisions (latest fetch is kept).
+                sql = (
+                    f"INSERT IGNORE INTO `{target}` ({insert_cols}) "
+                    f"SELECT {select_exprs} FROM `{source}` "
+                    f"WHERE id > {int(last_id)} AND id <= {int(upper)} ORDER BY id"
+                )
+                if update_sql:
+                    sql += f" ON DUPLICATE KEY UPDATE {update_sql}"
+                cursor.execute(sql)
+                conn.commit()
+                last_id = upper
+
+        copied_to = copy_range(table_name, shadow, 0)
+        copied_to = copy_range(table_name, shadow, copied_to)  # catch up concurrent ingest
+
+        cursor.execute(
+            f"RENAME TABLE `{table_name}` TO `{backup}`, `{shadow}` TO `{table_name}`"
+        )
+        conn.commit()
+
+        # Rows that landed in the old table between the last batch and the swap
+        copy_range(backup, table_name, copied_to)
+
+        cursor.execute(f"SELECT COUNT(*) FROM `{table_name}`")
+        rows = cursor.fetchone()[0]
+        logger.info(f"✅ Migrated {table_name} to typed schema ({rows} rows, backup {backup})")
+        return {
+            "table": table_name,
+            "status": "MIGRATED",
+            "rows": rows,
+            "backup_table": backup,
+            "duration_seconds": round(time.perf_counter() - started_at, 3),
+        }
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
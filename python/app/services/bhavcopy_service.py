@@ -2,21 +2,51 @@ import requests
 import zipfile
 import io
 import pandas as pd
-from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import os, re
-from sqlalchemy import MetaData, Table, inspect, text
+import tempfile
+from sqlalchemy import text
 from sqlalchemy.dialects.mysql import insert
 import logging
+import threading
 import time
-from typing import List, Dict, Any, Optional, Tuple
+from typing import BinaryIO, Iterable, Iterator, List, Dict, Any, Optional, Set, Tuple, Union
 
 from app.config import config
 from app.database.connection import db_manager
+from app.database.metadata_cache import table_metadata_cache
+from app.services.bhavcopy_archive import bhavcopy_archive
+from app.services.bhavcopy_pipeline import BhavcopyRangePipeline
+from app.services.bhavcopy_loader import bhavcopy_loader, bulk_chunk_rows
+from app.services.nse_session import NseSession
+from app.services.bhavcopy_schema import (
+    build_create_table_sql,
+    coerce_frame,
+    column_definition,
+    get_segment_schema,
+    has_natural_key,
+    migrate_segment_table,
+    natural_key_name,
+)
 from app.utils.helpers import sanitize_column_name
 
 logger = logging.getLogger(__name__)
 
+# Segments whose presence means "bhavcopy for this trade date is loaded"
+TRADE_DATE_TABLES = ("pr", "eq")
+
+# Download bodies are streamed in pieces of this size
+_DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+def _spool_memory_bytes() -> int:
+    """Bytes of a download kept in memory before spilling to a temp file."""
+    try:
+        return max(1, int(os.getenv("BHAVCOPY_SPOOL_MEMORY_MB", "16"))) * 1024 * 1024
+    except ValueError:
+        return 16 * 1024 * 1024
+
 # =========================================================
 # 🔥 CLEAN DATAFRAME FOR MYSQL
 # =========================================================
@@ -60,10 +90,12 @@ class BhavcopyService:
             "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
         }
         
-        # Session for maintaining cookies
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # Warmed session reused across dates; re-warmed on cookie TTL or 401/403
+        self.nse = NseSession(headers=self.headers)
+        self.session = self.nse.session
         self.processed_dates = set()  # Track processed dates in current run
+        self._processed_lock = threading.Lock()  # range workers share processed_dates
+        self._database_ready = False
         self.verbose_logging = os.getenv("BHAVCOPY_VERBOSE_LOGS", "true").lower() in (
             "true",
             "1",
@@ -80,7 +112,11 @@ class BhavcopyService:
         return payload
 
     def ensure_bhavcopy_database(self):
+        # CREATE DATABASE IF NOT EXISTS once per process, not once per check.
+        if self._database_ready:
+            return
         db_manager.ensure_database(config.DB_BHAVCOPY)
+        self._database_ready = True
 
     def build_bhavcopy_urls(self, date_obj: datetime) -> List[str]:
         """Build the NSE PR bhavcopy zip URL for a trade date (DDMMYY)."""
@@ -124,7 +160,7 @@ class BhavcopyService:
 
     def is_trade_date_processed(self, date_obj: datetime) -> bool:
         """True when core bhavcopy segments exist for the trade date."""
-        for table_name in ("pr", "eq"):
+        for table_name in TRADE_DATE_TABLES:
             if self.is_date_processed(table_name, date_obj):
                 return True
         return False
@@ -138,6 +174,26 @@ class BhavcopyService:
         result_data: Dict[str, Any],
         source_url: Optional[str] = None,
         source_file: Optional[str] = None,
+    ) -> int:
+        return self.process_csv_stream(
+            io.BytesIO(csv_bytes),
+            file_name,
+            date_obj,
+            force_refresh,
+            result_data,
+            source_url=source_url,
+            source_file=source_file,
+        )
+
+    def process_csv_stream(
+        self,
+        csv_stream: BinaryIO,
+        file_name: str,
+        date_obj: datetime,
+        force_refresh: bool,
+        result_data: Dict[str, Any],
+        source_url: Optional[str] = None,
+        source_file: Optional[str] = None,
     ) -> int:
         table_name = self.resolve_table_name(file_name)
         date_key = date_obj.date()
@@ -148,65 +204,149 @@ class BhavcopyService:
             return 0
 
         self._info(f"📄 Processing {table_name} for {date_key}")
-        try:
-            df = pd.read_csv(io.BytesIO(csv_bytes), on_bad_lines="skip", encoding="latin1")
-        except Exception:
-            df = pd.read_csv(io.BytesIO(csv_bytes), on_bad_lines="skip", encoding="utf-8")
+        sample: List[Dict[str, Any]] = []
+        frames = self.segment_frames(
+            table_name, csv_stream, date_key, sample,
+            source_url=source_url, source_file=source_file,
+        )
+        return self.load_segment(table_name, frames, date_key, sample, result_data)
 
-        df.columns = [sanitize_column_name(c) for c in df.columns]
-        df["source_date"] = date_key
-        df["fetched_at"] = datetime.now()
-        df["status"] = "OK"
+    def segment_frames(
+        self,
+        table_name: str,
+        csv_stream: BinaryIO,
+        date_key: date,
+        sample: List[Dict[str, Any]],
+        source_url: Optional[str] = None,
+        source_file: Optional[str] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Parsed, typed chunks of one segment CSV; the first rows are copied into ``sample``."""
+        extra_columns = {
+            "source_date": date_key,
+            "fetched_at": datetime.now(),
+            "status": "OK",
+        }
         if source_file:
-            df["source_file"] = source_file
+            extra_columns["source_file"] = source_file
         if source_url:
-            df["source_url"] = source_url
+            extra_columns["source_url"] = source_url
+
+        for chunk in self.read_csv_chunks(csv_stream):
+            chunk.columns = [sanitize_column_name(c) for c in chunk.columns]
+            chunk = coerce_frame(table_name, chunk.assign(**extra_columns))
+            if not sample:
+                sample.extend(
+                    clean_dataframe_for_mysql(chunk.head(3)).to_dict(orient="records")
+                )
+            yield chunk
 
-        df = clean_dataframe_for_mysql(df)
-        self.upsert_dataframe(table_name, df, skip_row_checks=True)
+    def load_segment(
+        self,
+        table_name: str,
+        frames: Iterable[pd.DataFrame],
+        date_key: date,
+        sample: List[Dict[str, Any]],
+        result_data: Dict[str, Any],
+    ) -> int:
+        metrics = bhavcopy_loader.load(
+            table_name,
+            frames,
+            prepare=self.ensure_table_schema_with_id,
+            replace_source_date=None if self.table_has_natural_key(table_name) else date_key,
+        )
+        self._info(
+            f"✅ Loaded {metrics['rows']} rows into {table_name} "
+            f"({metrics.get('rows_per_second')} rows/s, peak RSS {metrics.get('peak_rss_mb')} MB)"
+        )
 
         result_data[table_name] = {
             "status": "SUCCESS",
-            "records": len(df),
-            "sample": df.head(3).to_dict(orient="records"),
+            "records": metrics["rows"],
+            "rows_per_second": metrics.get("rows_per_second"),
+            "peak_rss_mb": metrics.get("peak_rss_mb"),
+            "load_mode": metrics.get("mode"),
+            "sample": sample,
         }
         return 1
 
+    def read_csv_chunks(self, source: Union[bytes, BinaryIO]):
+        """
+        Parse a bhavcopy CSV in bounded chunks instead of one large frame.
+
+        ``source`` may be raw bytes or any binary stream (e.g. a zip member),
+        which is decoded once as latin1 - every byte is valid there, so no
+        second decode pass is ever needed.
+        """
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        reader = pd.read_csv(
+            source,
+            on_bad_lines="skip",
+            encoding="latin1",
+            chunksize=bulk_chunk_rows(),
+        )
+        with reader:
+            yield from reader
+
+    def spool_response(self, resp: requests.Response) -> BinaryIO:
+        """
+        Copy a streamed response body into a spooled temp file.
+
+        Small files stay in memory; anything larger than
+        BHAVCOPY_SPOOL_MEMORY_MB spills to disk, so the download never
+        materialises as one ``bytes`` object. The caller closes the handle.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=_spool_memory_bytes())
+        try:
+            for block in resp.iter_content(chunk_size=_DOWNLOAD_CHUNK_BYTES):
+                if block:
+                    spool.write(block)
+        except Exception:
+            spool.close()
+            raise
+        finally:
+            resp.close()
+        spool.seek(0)
+        return spool
+
+    def iter_archive_csv(self, archive: zipfile.ZipFile) -> Iterator[Tuple[str, BinaryIO]]:
+        """Yield ``(name, stream)`` per CSV member; each member is opened lazily."""
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(".csv"):
+                continue
+            with archive.open(info) as member:
+                yield info.filename, member
+
     # -----------------------------------------------------
     # 🔥 GET NSE COOKIES FIRST (IMPORTANT!)
     # -----------------------------------------------------
-    def get_nse_cookies(self):
-        """Get initial cookies from NSE before downloading"""
-        try:
-            self._info("🍪 Getting NSE cookies...")
-            for warmup_url in (
-                "https://www.nseindia.com/",
-                "https://www.nseindia.com/all-reports",
-            ):
-                self.session.get(warmup_url, timeout=30)
-                time.sleep(1)
-            return True
-        except Exception as e:
-            logger.error(f"Failed to get NSE cookies: {e}")
-            return False
+    def get_nse_cookies(self, force: bool = False):
+        """Warm NSE cookies unless the shared session is still within its TTL"""
+        self.nse.ensure_warm(force=force)
+        return self.nse.is_warm()
 
-    def download_bhavcopy(self, date_obj: datetime) -> Tuple[Optional[requests.Response], Optional[str]]:
+    def download_bhavcopy(
+        self,
+        date_obj: datetime,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Tuple[Optional[requests.Response], Optional[str]]:
         """Download bhavcopy from the configured PR zip URL."""
-        self.get_nse_cookies()
         url = self.build_bhavcopy_url(date_obj)
         self._info(f"🔗 Fetching bhavcopy: {url}")
 
         try:
-            resp = self.session.get(url, timeout=30)
+            resp = self.nse.get(url, timings=timings, stream=True)
         except requests.exceptions.RequestException as exc:
             logger.error(f"Network error for {url}: {exc}")
             return None, None
 
         if resp.status_code == 404:
+            resp.close()
             logger.warning(f"Bhavcopy not found: {url}")
             return None, None
 
         if resp.status_code != 200:
+            resp.close()
             logger.error(f"Bhavcopy request failed ({resp.status_code}): {url}")
             return None, None
 
@@ -218,15 +358,69 @@ class BhavcopyService:
         source_url: str,
         date_obj: datetime,
         force_refresh: bool = False,
+        archive: bool = False,
+        timings: Optional[Dict[str, float]] = None,
     ) -> Dict[str, Any]:
+        with self.open_downloaded_body(resp, source_url, date_obj, archive, timings) as body:
+            return self.process_bhavcopy_file(body, source_url, date_obj, force_refresh)
+
+    def open_downloaded_body(
+        self,
+        resp: requests.Response,
+        source_url: str,
+        date_obj: datetime,
+        archive: bool = False,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> BinaryIO:
+        """Spool a streamed download (timed as download latency) and optionally archive it."""
+        transfer_started = time.perf_counter()
+        body = self.spool_response(resp)
+        self.nse.record_transfer(time.perf_counter() - transfer_started, timings)
+        if archive and config.BHAVCOPY_ARCHIVE_ENABLED:
+            try:
+                bhavcopy_archive.store(date_obj.date(), body, source_url)
+            except OSError as exc:
+                logger.warning(f"⚠ Could not archive bhavcopy for {date_obj.date()}: {exc}")
+                body.seek(0)
+        return body
+
+    def process_archived_bhavcopy(
+        self,
+        date_obj: datetime,
+        force_refresh: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """Reload a trade date from the local zip archive; None when it is not archived."""
+        if not config.BHAVCOPY_ARCHIVE_ENABLED:
+            return None
+        archived = bhavcopy_archive.open(date_obj.date())
+        if archived is None:
+            return None
+
+        entry, handle = archived
+        self._info(f"🗃 Replaying {date_obj.date()} from local archive (sha256 {entry['sha256'][:12]})")
+        with handle:
+            processed = self.process_bhavcopy_file(
+                handle, entry["source_url"], date_obj, force_refresh
+            )
+        processed["source_url"] = entry["source_url"]
+        return processed
+
+    def process_bhavcopy_file(
+        self,
+        body: BinaryIO,
+        source_url: str,
+        date_obj: datetime,
+        force_refresh: bool = False,
+    ) -> Dict[str, Any]:
+        """Load a seekable bhavcopy zip (or single CSV) without reading it whole."""
         result_data: Dict[str, Any] = {}
         files_processed = 0
         date_key = date_obj.date()
 
         if source_url.endswith(".csv"):
             file_name = os.path.basename(source_url)
-            files_processed += self.process_csv_bytes(
-                resp.content,
+            files_processed += self.process_csv_stream(
+                body,
                 file_name,
                 date_obj,
                 force_refresh,
@@ -239,43 +433,123 @@ class BhavcopyService:
                 "data": result_data,
             }
 
-        zip_bytes = io.BytesIO(resp.content)
-        with zipfile.ZipFile(zip_bytes) as z:
+        with zipfile.ZipFile(body) as z:
             found_files = set()
 
-            for file_name in z.namelist():
-                if not file_name.endswith(".csv"):
-                    continue
+            for file_name, member in self.iter_archive_csv(z):
+                found_files.add(self.resolve_table_name(file_name))
+                files_processed += self.process_csv_stream(
+                    member,
+                    file_name,
+                    date_obj,
+                    force_refresh,
+                    result_data,
+                    source_url=source_url,
+                    source_file=file_name,
+                )
 
-                base = self.resolve_table_name(file_name)
-                found_files.add(base)
-
-                with z.open(file_name) as f:
-                    files_processed += self.process_csv_bytes(
-                        f.read(),
-                        file_name,
-                        date_obj,
-                        force_refresh,
-                        result_data,
-                        source_url=source_url,
-                        source_file=file_name,
-                    )
+            self.write_missing_markers(found_files, date_obj, force_refresh, result_data)
+
+        return {
+            "files_processed": files_processed,
+            "data": result_data,
+        }
+
+    def write_missing_markers(
+        self,
+        found_files: Set[str],
+        date_obj: datetime,
+        force_refresh: bool,
+        result_data: Dict[str, Any],
+    ):
+        """MISSING rows for expected segments absent from a day's zip."""
+        date_key = date_obj.date()
+        for expected in self.expected_files:
+            if expected not in found_files:
+                if not force_refresh and self.is_date_processed(expected, date_obj):
+                    continue
 
-            for expected in self.expected_files:
-                if expected not in found_files:
-                    if not force_refresh and self.is_date_processed(expected, date_obj):
-                        continue
-
-                    self._info(f"📝 Creating MISSING record for {expected} on {date_key}")
-                    df_missing = pd.DataFrame([{
-                        "source_date": date_key,
-                        "status": "MISSING",
-                        "fetched_at": datetime.now(),
-                    }])
-                    df_missing = clean_dataframe_for_mysql(df_missing)
-                    self.upsert_dataframe(expected, df_missing)
-                    result_data[expected] = {"status": "MISSING"}
+                self._info(f"📝 Creating MISSING record for {expected} on {date_key}")
+                df_missing = pd.DataFrame([{
+                    "source_date": date_key,
+                    "status": "MISSING",
+                    "fetched_at": datetime.now(),
+                }])
+                df_missing = clean_dataframe_for_mysql(coerce_frame(expected, df_missing))
+                self.upsert_dataframe(expected, df_missing)
+                result_data[expected] = {"status": "MISSING"}
+
+    def parse_bhavcopy_file(
+        self,
+        body: BinaryIO,
+        source_url: str,
+        date_obj: datetime,
+        force_refresh: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        CPU half of ``process_bhavcopy_file``, evaluated lazily so a day is
+        never held in memory: ``parsed["segments"]`` yields one
+        ``{"table", "frames", "sample"}`` per segment CSV, parsing chunks as
+        ``frames`` is drained. Drain each segment before asking for the
+        next; ``found`` / ``data`` fill in as segments are consumed, and
+        ``body`` must stay open until then.
+        """
+        date_key = date_obj.date()
+        parsed: Dict[str, Any] = {
+            "found": set(),
+            "is_zip": not source_url.endswith(".csv"),
+            "data": {},
+        }
 
+        def segment(file_name: str, stream: BinaryIO) -> Optional[Dict[str, Any]]:
+            table_name = self.resolve_table_name(file_name)
+            parsed["found"].add(table_name)
+            if not force_refresh and self.is_date_processed(table_name, date_obj):
+                self._info(f"⏭ {table_name} data for {date_key} already exists, skipping")
+                parsed["data"][table_name] = {"status": "ALREADY_EXISTS"}
+                return None
+            sample: List[Dict[str, Any]] = []
+            frames = self.segment_frames(
+                table_name, stream, date_key, sample,
+                source_url=source_url, source_file=file_name,
+            )
+            return {"table": table_name, "frames": frames, "sample": sample}
+
+        def segments() -> Iterator[Dict[str, Any]]:
+            if not parsed["is_zip"]:
+                parsed_segment = segment(os.path.basename(source_url), body)
+                if parsed_segment is not None:
+                    yield parsed_segment
+                return
+            with zipfile.ZipFile(body) as z:
+                for file_name, member in self.iter_archive_csv(z):
+                    parsed_segment = segment(file_name, member)
+                    if parsed_segment is not None:
+                        yield parsed_segment
+
+        parsed["segments"] = segments()
+        return parsed
+
+    def write_parsed_bhavcopy(
+        self,
+        parsed: Dict[str, Any],
+        date_obj: datetime,
+        force_refresh: bool = False,
+    ) -> Dict[str, Any]:
+        """DB half of ``process_bhavcopy_file``: load parsed segments and MISSING markers."""
+        result_data = parsed["data"]
+        files_processed = 0
+        for segment in parsed["segments"]:
+            self._info(f"📄 Processing {segment['table']} for {date_obj.date()}")
+            files_processed += self.load_segment(
+                segment["table"],
+                segment["frames"],
+                date_obj.date(),
+                segment["sample"],
+                result_data,
+            )
+        if parsed["is_zip"]:
+            self.write_missing_markers(parsed["found"], date_obj, force_refresh, result_data)
         return {
             "files_processed": files_processed,
             "data": result_data,
@@ -294,55 +568,139 @@ class BhavcopyService:
             with engine.connect() as conn:
                 result = conn.execute(
                     text(
-                        f"SELECT COUNT(*) FROM `{table_name}` "
-                        f"WHERE source_date = :date_val LIMIT 1"
+                        f"SELECT EXISTS(SELECT 1 FROM `{table_name}` "
+                        f"WHERE source_date = :date_val)"
                     ),
                     {"date_val": date_str}
                 ).scalar()
                 
-                return result > 0 if result else False
+                return bool(result)
         except Exception as e:
             logger.warning(f"Could not check processed date for {table_name}: {e}")
             return False
 
     # -----------------------------------------------------
-    # 🔥 ENSURE TABLE + COLUMNS + AUTO ID + INDEXES
+    # 🔥 LOADED DATES FOR A WHOLE RANGE (ONE QUERY PER SEGMENT)
     # -----------------------------------------------------
-    def ensure_table_schema_with_id(self, table_name, df):
+    def loaded_dates(
+        self,
+        start: date,
+        end: date,
+        tables: Tuple[str, ...] = TRADE_DATE_TABLES,
+    ) -> Set[date]:
+        """
+        Dates in [start, end] that have rows in any of ``tables``.
+
+        Replaces day-by-day is_trade_date_processed loops: one
+        SELECT DISTINCT source_date per segment over the source_date index,
+        after which every per-date check is a set lookup.
+        """
         self.ensure_bhavcopy_database()
         engine = db_manager.get_sqlalchemy_engine(config.DB_BHAVCOPY)
-        inspector = inspect(engine)
+        found: Set[date] = set()
 
-        with engine.begin() as conn:
-            if not inspector.has_table(table_name):
-                self._info(f"🛠 Creating table: {table_name}")
-                df.head(0).to_sql(table_name, conn, index=False, if_exists="append")
-
-            inspector = inspect(engine)
-            columns = {col["name"].lower() for col in inspector.get_columns(table_name)}
-
-            for column in df.columns:
-                if column.lower() not in columns:
-                    self._info(f"➕ Adding column {column} to {table_name}")
-                    try:
-                        conn.execute(text(f"ALTER TABLE `{table_name}` ADD COLUMN `{column}` TEXT NULL"))
-                    except Exception as exc:
-                        if "Duplicate column" not in str(exc):
-                            raise
-
-            inspector = inspect(engine)
-            column_names = [col["name"] for col in inspector.get_columns(table_name)]
-
-            if "id" not in {name.lower() for name in column_names}:
-                self._info(f"🔧 Adding ID column to {table_name}")
-                conn.execute(text(f"ALTER TABLE `{table_name}` ADD COLUMN `id` INT NOT NULL AUTO_INCREMENT PRIMARY KEY FIRST"))
-            
-            # Create index on source_date for faster queries
-            index_name = f"idx_{table_name}_source_date"
+        for table_name in tables:
+            if not table_metadata_cache.has_table(config.DB_BHAVCOPY, table_name):
+                continue
             try:
-                conn.execute(text(f"CREATE INDEX IF NOT EXISTS `{index_name}` ON `{table_name}` (`source_date`)"))
+                with engine.connect() as conn:
+                    rows = conn.execute(
+                        text(
+                            f"SELECT DISTINCT source_date FROM `{table_name}` "
+                            f"WHERE source_date >= :start AND source_date < :end_exclusive"
+                        ),
+                        # Half-open bound also matches legacy TEXT values like 'YYYY-MM-DD 00:00:00'
+                        {"start": str(start), "end_exclusive": str(end + timedelta(days=1))},
+                    ).fetchall()
             except Exception as e:
-                logger.debug(f"Index creation skipped for {table_name}: {e}")
+                logger.warning(f"Could not list loaded dates for {table_name}: {e}")
+                continue
+
+            for (value,) in rows:
+                if value is None:
+                    continue
+                try:
+                    found.add(
+                        value if isinstance(value, date) and not isinstance(value, datetime)
+                        else datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+                    )
+                except ValueError:
+                    continue
+
+        return found
+
+    # -----------------------------------------------------
+    # 🔥 ENSURE TABLE + COLUMNS + AUTO ID + INDEXES
+    # -----------------------------------------------------
+    def ensure_table_schema_with_id(self, table_name, df):
+        self.ensure_bhavcopy_database()
+        db_name = config.DB_BHAVCOPY
+        known = table_metadata_cache.get_column_names_lower(db_name, table_name)
+
+        # Cached fast path: every incoming column already exists -> no round trips
+        if known and "id" in known and all(c.lower() in known for c in df.columns):
+            return
+
+        engine = db_manager.get_sqlalchemy_engine(db_name)
+        try:
+            with engine.begin() as conn:
+                if not known:
+                    self._info(f"🛠 Creating table: {table_name}")
+                    if get_segment_schema(table_name):
+                        conn.execute(text(build_create_table_sql(table_name, list(df.columns))))
+                    else:
+                        df.head(0).to_sql(table_name, conn, index=False, if_exists="append")
+                    table_metadata_cache.invalidate(db_name, table_name)
+                    known = table_metadata_cache.get_column_names_lower(db_name, table_name)
+
+                for column in df.columns:
+                    if column.lower() not in known:
+                        self._info(f"➕ Adding column {column} to {table_name}")
+                        try:
+                            conn.execute(text(
+                                f"ALTER TABLE `{table_name}` ADD COLUMN "
+                                f"{column_definition(table_name, column)}"
+                            ))
+                        except Exception as exc:
+                            if "Duplicate column" not in str(exc):
+                                raise
+
+                if "id" not in known:
+                    self._info(f"🔧 Adding ID column to {table_name}")
+                    conn.execute(text(f"ALTER TABLE `{table_name}` ADD COLUMN `id` INT NOT NULL AUTO_INCREMENT PRIMARY KEY FIRST"))
+
+                # Typed segments already lead their scan indexes with source_date
+                if get_segment_schema(table_name):
+                    return
+
+                # Create index on source_date for faster queries
+                index_name = f"idx_{table_name}_source_date"
+                try:
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS `{index_name}` ON `{table_name}` (`source_date`)"))
+                except Exception as e:
+                    logger.debug(f"Index creation skipped for {table_name}: {e}")
+        finally:
+            # Columns / id / indexes changed: next lookup re-reads information_schema
+            table_metadata_cache.invalidate(db_name, table_name)
+
+    def table_has_natural_key(self, table_name: str) -> bool:
+        """True when the segment table dedupes on its natural key (typed schema)."""
+        if not has_natural_key(table_name):
+            return False
+
+        self.ensure_bhavcopy_database()
+        if not table_metadata_cache.has_table(config.DB_BHAVCOPY, table_name):
+            return True  # will be created typed by ensure_table_schema_with_id
+
+        index_names = table_metadata_cache.get_index_names(config.DB_BHAVCOPY, table_name)
+        return natural_key_name(table_name) in index_names
+
+    def migrate_table_schema(self, table_name: str) -> Dict[str, Any]:
+        """Online migration of a legacy TEXT segment table to its typed schema."""
+        try:
+            return migrate_segment_table(table_name)
+        finally:
+            table_metadata_cache.invalidate(config.DB_BHAVCOPY, table_name)
 
     # -----------------------------------------------------
     # UPSERT (NO DUPLICATES, SAFE ON SERVER)
@@ -355,8 +713,7 @@ class BhavcopyService:
         engine = db_manager.get_sqlalchemy_engine(config.DB_BHAVCOPY)
         self.ensure_table_schema_with_id(table_name, df)
 
-        meta = MetaData()
-        table = Table(table_name, meta, autoload_with=engine)
+        table = table_metadata_cache.get_table(config.DB_BHAVCOPY, table_name)
 
         records = df.to_dict(orient="records")
         if not records:
@@ -452,13 +809,11 @@ class BhavcopyService:
             date_key = date_obj.date()
             self._info(f"📥 Manually fetching Bhavcopy from URL: {url}")
             
-            # Get cookies first
-            self.get_nse_cookies()
-            
-            # Download the file
-            resp = self.session.get(url, timeout=30)
+            # Download the file (shared session warms cookies only when stale)
+            resp = self.nse.get(url, timeout=30, stream=True)
             
             if resp.status_code != 200:
+                resp.close()
                 logger.error(f"❌ Failed to fetch: HTTP {resp.status_code}")
                 return self._with_duration(started_at, {
                     "date": str(date_key),
@@ -518,18 +873,27 @@ class BhavcopyService:
     # -----------------------------------------------------
     # PROCESS SINGLE DATE
     # -----------------------------------------------------
-    def process_zip_for_date(self, date_obj: datetime, force_refresh: bool = False):
-        """Process Bhavcopy for a specific date"""
-        started_at = time.perf_counter()
-        result_data = {}
+    def mark_processed(self, day: date):
+        with self._processed_lock:
+            self.processed_dates.add(day)
+
+    def session_skip_result(
+        self,
+        date_obj: datetime,
+        force_refresh: bool,
+        started_at: float,
+    ) -> Optional[Dict[str, Any]]:
+        """Result for a date already loaded in this session, else None (stale markers are cleared)."""
         date_key = date_obj.date()
+        with self._processed_lock:
+            in_session = date_key in self.processed_dates
+        if not in_session:
+            return None
 
         # In-memory skip only when DB already has this trade date (session cache alone is unsafe).
-        if (
-            date_key in self.processed_dates
-            and not force_refresh
-            and self.is_trade_date_processed(date_obj)
-        ):
+        if self.is_trade_date_processed(date_obj):
+            if force_refresh:
+                return None
             self._info(f"⏭ Date {date_key} already in DB for this session, skipping download")
             return self._with_duration(started_at, {
                 "date": str(date_key),
@@ -543,50 +907,88 @@ class BhavcopyService:
             })
 
         # Stale session marker with no DB rows — clear and re-fetch
-        if date_key in self.processed_dates and not self.is_trade_date_processed(date_obj):
-            self._info(
-                f"⚠ Date {date_key} was marked processed in-memory but missing in DB — re-fetching"
-            )
+        self._info(
+            f"⚠ Date {date_key} was marked processed in-memory but missing in DB — re-fetching"
+        )
+        with self._processed_lock:
             self.processed_dates.discard(date_key)
+        return None
 
-        try:
-            self._info(f"📥 Fetching Bhavcopy for {date_key}")
-            resp, source_url = self.download_bhavcopy(date_obj)
+    def processed_result(
+        self,
+        started_at: float,
+        date_obj: datetime,
+        processed: Dict[str, Any],
+        source_url: str,
+        origin: str,
+        timings: Dict[str, float],
+    ) -> Dict[str, Any]:
+        date_key = date_obj.date()
+        files_processed = processed["files_processed"]
+        self.mark_processed(date_key)
+        self._info(f"✅ Successfully processed {date_key}: {files_processed} files")
+        return self._with_duration(started_at, {
+            "date": str(date_key),
+            "status": "SUCCESS",
+            "files_processed": files_processed,
+            "source_url": source_url,
+            "source": origin,
+            "timings": timings,
+            "data": processed["data"]
+        })
 
-            if resp is None or source_url is None:
-                logger.warning(f"⚠ No Bhavcopy found for {date_key}")
-                return self._with_duration(started_at, {
-                    "date": str(date_key),
-                    "status": "NOT_FOUND",
-                    "message": "No Bhavcopy available for this date",
-                })
+    def not_found_result(self, started_at: float, date_obj: datetime, timings: Dict[str, float]):
+        logger.warning(f"⚠ No Bhavcopy found for {date_obj.date()}")
+        return self._with_duration(started_at, {
+            "date": str(date_obj.date()),
+            "status": "NOT_FOUND",
+            "message": "No Bhavcopy available for this date",
+            "timings": timings,
+        })
 
-            processed = self.process_downloaded_bhavcopy(
-                resp,
-                source_url,
-                date_obj,
-                force_refresh=force_refresh,
-            )
-            files_processed = processed["files_processed"]
-            result_data = processed["data"]
+    def error_result(self, started_at: float, date_obj: datetime, exc: Exception) -> Dict[str, Any]:
+        date_key = date_obj.date()
+        if isinstance(exc, requests.exceptions.RequestException):
+            logger.error(f"❌ Network error for {date_key}: {exc}")
+            return self._with_duration(started_at, {"date": str(date_key), "status": "ERROR", "message": f"Network error: {str(exc)}"})
+        logger.error(f"❌ Error processing {date_key}: {exc}", exc_info=True)
+        return self._with_duration(started_at, {"date": str(date_key), "status": "ERROR", "message": str(exc)})
 
-            self.processed_dates.add(date_key)
-            self._info(f"✅ Successfully processed {date_key}: {files_processed} files")
+    def process_zip_for_date(self, date_obj: datetime, force_refresh: bool = False):
+        """Process Bhavcopy for a specific date"""
+        started_at = time.perf_counter()
+        date_key = date_obj.date()
 
-            return self._with_duration(started_at, {
-                "date": str(date_key),
-                "status": "SUCCESS",
-                "files_processed": files_processed,
-                "source_url": source_url,
-                "data": result_data
-            })
+        skipped = self.session_skip_result(date_obj, force_refresh, started_at)
+        if skipped is not None:
+            return skipped
+
+        try:
+            timings: Dict[str, float] = {}
+            processed = self.process_archived_bhavcopy(date_obj, force_refresh)
+            if processed is not None:
+                source_url = processed["source_url"]
+                origin = "archive"
+            else:
+                self._info(f"📥 Fetching Bhavcopy for {date_key}")
+                resp, source_url = self.download_bhavcopy(date_obj, timings)
+
+                if resp is None or source_url is None:
+                    return self.not_found_result(started_at, date_obj, timings)
+
+                processed = self.process_downloaded_bhavcopy(
+                    resp,
+                    source_url,
+                    date_obj,
+                    force_refresh=force_refresh,
+                    archive=True,
+                    timings=timings,
+                )
+                origin = "network"
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"❌ Network error for {date_key}: {e}")
-            return self._with_duration(started_at, {"date": str(date_key), "status": "ERROR", "message": f"Network error: {str(e)}"})
+            return self.processed_result(started_at, date_obj, processed, source_url, origin, timings)
         except Exception as e:
-            logger.error(f"❌ Error processing {date_key}: {e}", exc_info=True)
-            return self._with_duration(started_at, {"date": str(date_key), "status": "ERROR", "message": str(e)})
+            return self.error_result(started_at, date_obj, e)
 
     # -----------------------------------------------------
     # DATE RANGE
@@ -602,33 +1004,82 @@ class BhavcopyService:
         
         self._info(f"📅 Processing {len(dates)} dates from {start_date} to {end_date}")
         
-        results = []
-        successful = 0
-        failed = 0
+        completed = []
 
-        with ThreadPoolExecutor(max_workers=config.MAX_WORKERS) as executor:
-            futures = {executor.submit(self.process_zip_for_date, d, force_refresh): d for d in dates}
+        def progress(result: Dict[str, Any]):
+            completed.append(result)
+            self._info(f"Progress: {len(completed)}/{len(dates)} ({result.get('date')} {result.get('status')})")
 
-            for future in as_completed(futures):
-                result = future.result()
-                results.append(result)
-                
-                if result.get("status") == "SUCCESS":
-                    successful += 1
-                elif result.get("status") not in ["SKIPPED", "NOT_FOUND"]:
-                    failed += 1
-                
-                self._info(f"Progress: {successful + failed}/{len(dates)}")
+        run = BhavcopyRangePipeline(self, on_result=progress).run(dates, force_refresh)
+        results = run["results"]
+        successful = sum(1 for r in results if r.get("status") == "SUCCESS")
+        failed = sum(1 for r in results if r.get("status") not in ["SUCCESS", "SKIPPED", "NOT_FOUND"])
 
-            self._info(f"🎉 Bhavcopy range complete: {successful} successful, {failed} failed")
-        
-            return self._with_duration(started_at, {
+        self._info(f"🎉 Bhavcopy range complete: {successful} successful, {failed} failed")
+
+        return self._with_duration(started_at, {
             "total_dates": len(dates),
             "successful": successful,
             "failed": failed,
+            "nse_session": self.nse.stats(),
+            "pipeline": run["pipeline"],
             "results": results
+        })
+
+    def replay_range(self, start_date: str, end_date: str, force_refresh: bool = True):
+        """Reload a date range purely from the local zip archive (no network I/O)."""
+        started_at = time.perf_counter()
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+
+        archived = bhavcopy_archive.dates_in_range(start.date(), end.date())
+        weekdays = [
+            (start + timedelta(days=i)).date()
+            for i in range((end - start).days + 1)
+            if (start + timedelta(days=i)).weekday() < 5
+        ]
+        archived_set = set(archived)
+        not_cached = [str(d) for d in weekdays if d not in archived_set]
+        self._info(
+            f"🗃 Replaying {len(archived)} archived dates from {start_date} to {end_date} "
+            f"({len(not_cached)} weekdays not in archive)"
+        )
+
+        def replay(day: date) -> Dict[str, Any]:
+            day_started = time.perf_counter()
+            date_obj = datetime.combine(day, datetime.min.time())
+            try:
+                processed = self.process_archived_bhavcopy(date_obj, force_refresh)
+            except Exception as e:
+                logger.error(f"❌ Archive replay failed for {day}: {e}", exc_info=True)
+                return self._with_duration(day_started, {"date": str(day), "status": "ERROR", "message": str(e)})
+            if processed is None:
+                return self._with_duration(day_started, {"date": str(day), "status": "NOT_CACHED"})
+            self.mark_processed(day)
+            return self._with_duration(day_started, {
+                "date": str(day),
+                "status": "SUCCESS",
+                "source": "archive",
+                "files_processed": processed["files_processed"],
+                "data": processed["data"],
             })
 
+        results = []
+        with ThreadPoolExecutor(max_workers=config.MAX_WORKERS) as executor:
+            for result in executor.map(replay, archived):
+                results.append(result)
+
+        successful = sum(1 for r in results if r["status"] == "SUCCESS")
+        failed = sum(1 for r in results if r["status"] == "ERROR")
+        self._info(f"🎉 Archive replay complete: {successful} successful, {failed} failed")
+        return self._with_duration(started_at, {
+            "total_dates": len(archived),
+            "successful": successful,
+            "failed": failed,
+            "not_cached": not_cached,
+            "results": results,
+        })
+
     # -----------------------------------------------------
     # TODAY
     # -----------------------------------------------------
@@ -659,10 +1110,8 @@ class BhavcopyService:
         
         dates = [start + timedelta(days=i) for i in range((end - start).days + 1) if (start + timedelta(days=i)).weekday() < 5]
         
-        missing_dates = []
-        for date_obj in dates:
-            if not self.is_trade_date_processed(date_obj):
-                missing_dates.append(date_obj)
+        loaded = self.loaded_dates(start.date(), end.date())
+        missing_dates = [d for d in dates if d.date() not in loaded]
         
         self._info(f"Found {len(missing_dates)} missing dates out of {len(dates)} total")
         
@@ -0,0 +1,157 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+import yfinance as yf
+
+from app.config import optional_env_int, optional_env_float
+from app.utils.rate_limiter import AdaptiveTokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """True for Yahoo throttling, whether surfaced as HTTPError(429) or wrapped by yfinance."""
+    response = getattr(exc, "response", None)
+    if isinstance(exc, requests.exceptions.HTTPError) and response is not None:
+        return getattr(response, "status_code", None) == 429
+    text = str(exc)
+    return "429" in text or "Too Many Requests" in text or "Rate limited" in text
+
+
+def stale_first(
+    targets: List[Tuple[str, Optional[datetime]]],
+    min_age_hours: float,
+    now: Optional[datetime] = None,
+) -> Tuple[List[str], int]:
+    """Order (symbol, last_refreshed) stalest first; drop ones newer than ``min_age_hours``."""
+    cutoff = (now or datetime.now()) - timedelta(hours=min_age_hours)
+    due = sorted(
+        ((refreshed or datetime.min, symbol) for symbol, refreshed in targets
+         if (refreshed or datetime.min) <= cutoff),
+    )
+    return [symbol for _, symbol in due], len(targets) - len(due)
+
+
+class CompanyProfileHarvester:
+    """
+    Refreshes company profiles (Yahoo ``.info``) with a small worker pool.
+
+    * One ``AdaptiveTokenBucket`` shared by COMPANY_PROFILE_WORKERS threads
+      starts at COMPANY_PROFILE_RATE_PER_SECOND; each 429 halves it and
+      pauses all workers, successes creep it back up. The throttled symbol
+      goes back in the queue (up to COMPANY_PROFILE_MAX_ATTEMPTS).
+    * Profiles are refreshed stalest first (``infoUpdatedAt``); ones younger
+      than COMPANY_PROFILE_MIN_AGE_HOURS are skipped, so restarts and
+      overlapping triggers do not redo fresh work.
+    * No new symbol starts after COMPANY_PROFILE_MAX_RUN_HOURS, keeping a
+      pass inside the 12 h cron interval; the next run picks up the rest
+      first because they are now the stalest.
+    * Rows are written by the calling thread in COMPANY_PROFILE_WRITE_BATCH
+      sized batches.
+    """
+
+    def __init__(
+        self,
+        service,
+        workers: Optional[int] = None,
+        limiter: Optional[AdaptiveTokenBucket] = None,
+        fetch_info: Optional[Callable[[str], Dict[str, Any]]] = None,
+        context: Optional[Any] = None,
+    ):
+        self.service = service
+        self.workers = workers or optional_env_int("COMPANY_PROFILE_WORKERS", 4, minimum=1)
+        rate = optional_env_float("COMPANY_PROFILE_RATE_PER_SECOND", 0.5) or 0.5
+        self.limiter = limiter or AdaptiveTokenBucket(
+            rate=rate,
+            min_rate=rate / 20,
+            max_rate=rate * 2,
+            cooldown=optional_env_float("COMPANY_PROFILE_429_COOLDOWN_SECONDS", 30),
+        )
+        self.fetch_info = fetch_info or (lambda symbol: yf.Ticker(symbol).info)
+        self.context = context
+        self.max_attempts = optional_env_int("COMPANY_PROFILE_MAX_ATTEMPTS", 4, minimum=1)
+        self.min_age_hours = optional_env_float("COMPANY_PROFILE_MIN_AGE_HOURS", 6)
+        self.max_run_seconds = optional_env_float("COMPANY_PROFILE_MAX_RUN_HOURS", 11) * 3600
+        self.write_batch = optional_env_int("COMPANY_PROFILE_WRITE_BATCH", 50, minimum=1)
+
+    def _fetch(self, symbol: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[BaseException]]:
+        self.limiter.acquire()
+        try:
+            info = self.fetch_info(symbol)
+        except Exception as e:
+            return symbol, None, e
+        return symbol, info, None
+
+    def _write(self, pending: List[Dict[str, Any]], stats: Dict[str, Any]):
+        if not pending:
+            return
+        try:
+            self.service.save_company_profiles(pending)
+            stats["success"] += len(pending)
+        except Exception as e:
+            logger.error(f"❌ Failed to save {len(pending)} company profiles: {e}")
+            stats["failed"] += len(pending)
+        pending.clear()
+        if self.context is not None:
+            self.context.flush_progress(phase="harvesting", company_profiles=dict(stats))
+
+    def run(self, targets: List[Tuple[str, Optional[datetime]]]) -> Dict[str, Any]:
+        queue, fresh = stale_first(targets, self.min_age_hours)
+        stats = {"total": len(targets), "due": len(queue), "skipped_fresh": fresh,
+                 "success": 0, "failed": 0, "no_data": 0, "throttled": 0, "deferred": 0}
+        logger.info(f"🔥 Harvesting {len(queue)} company profiles ({fresh} still fresh)")
+
+        started = time.monotonic()
+        attempts: Dict[str, int] = {}
+        pending: List[Dict[str, Any]] = []
+        position = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="profile-harvest") as pool:
+            in_flight = set()
+            while True:
+                expired = time.monotonic() - started > self.max_run_seconds
+                while not expired and position < len(queue) and len(in_flight) < self.workers * 2:
+                    in_flight.add(pool.submit(self._fetch, queue[position]))
+                    position += 1
+                if not in_flight:
+                    break
+
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    symbol, info, error = future.result()
+                    if error is not None:
+                        attempts[symbol] = attempts.get(symbol, 0) + 1
+                        if is_rate_limited(error):
+                            stats["throttled"] += 1
+                            pause = self.limiter.throttled()
+                            logger.warning(
+                                f"⏸ 429 for {symbol}; cooling down {pause:.0f}s, "
+                                f"rate now {self.limiter.rate:.3f}/s"
+                            )
+                            if attempts[symbol] < self.max_attempts:
+                                queue.append(symbol)
+                                continue
+                        logger.error(f"❌ Failed to fetch {symbol}: {error}")
+                        stats["failed"] += 1
+                        continue
+
+                    self.limiter.succeeded()
+                    if info and "symbol" in info:
+                        pending.append(info)
+                        if len(pending) >= self.write_batch:
+                            self._write(pending, stats)
+                    else:
+                        logger.warning(f"⚠️ No data for {symbol}")
+                        stats["no_data"] += 1
+
+        self._write(pending, stats)
+        stats["deferred"] = len(queue) - position
+        if stats["deferred"]:
+            logger.warning(f"⏱ Profile run hit its time budget; {stats['deferred']} symbols left for the next run")
+        stats["duration_seconds"] = round(time.monotonic() - started, 3)
+        stats["limiter"] = self.limiter.stats()
+        return stats
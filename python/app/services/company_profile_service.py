@@ -3,17 +3,100 @@ import logging
 import math
 import pymysql
 import pandas as pd
-import requests
 import yfinance as yf
-from app.config import config
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.config import config, optional_env_int, optional_env_float
+from app.database.connection import db_manager
 from datetime import datetime, timedelta
 import pytz
 from app.services._utils_retry import with_retries
+from app.services.company_profile_harvester import CompanyProfileHarvester
+from app.services.market_data_backfill import MARKET_DATA_UPSERT_SQL, MarketDataBackfill
+from app.utils.cron_decorator import CronJobContext
+from app.utils.rate_limiter import TokenBucket
+from app.utils.yf_download import yf_download_lock
 
 logger = logging.getLogger(__name__)
 
 MAX_MYSQL_FLOAT = 3.402823466e38
 
+
+def _extract_symbol_data(df, symbol):
+    if df is None or df.empty:
+        return None
+
+    if isinstance(df.columns, pd.MultiIndex):
+        if symbol in df.columns.get_level_values(0):
+            try:
+                return df[symbol]
+            except KeyError:
+                pass
+        if symbol in df.columns.get_level_values(1):
+            try:
+                return df.xs(symbol, level=1, axis=1)
+            except KeyError:
+                pass
+        return None
+
+    return df
+
+
+def _get_latest_field(series, field):
+    if field in series.index:
+        return series[field]
+    for key in series.index:
+        if isinstance(key, tuple) and key[-1] == field:
+            return series[key]
+    return None
+
+_PROFILE_UPSERT_SQL = """
+INSERT INTO companies (
+    symbol,
+    name,
+    sector,
+    industry,
+    currency,
+    exchange,
+    marketCap,
+    currentPrice,
+    previousClose,
+    `change`,
+    changePercent,
+    volume,
+    high52Week,
+    low52Week,
+    beta,
+    dividendYield,
+    forwardPE,
+    trailingPE,
+    website,
+    infoUpdatedAt,
+    addedAt
+)
+VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+ON DUPLICATE KEY UPDATE
+    name = VALUES(name),
+    sector = VALUES(sector),
+    industry = VALUES(industry),
+    currency = VALUES(currency),
+    exchange = VALUES(exchange),
+    marketCap = VALUES(marketCap),
+    currentPrice = VALUES(currentPrice),
+    previousClose = VALUES(previousClose),
+    `change` = VALUES(`change`),
+    changePercent = VALUES(changePercent),
+    volume = VALUES(volume),
+    high52Week = VALUES(high52Week),
+    low52Week = VALUES(low52Week),
+    beta = VALUES(beta),
+    dividendYield = VALUES(dividendYield),
+    forwardPE = VALUES(forwardPE),
+    trailingPE = VALUES(trailingPE),
+    website = VALUES(website),
+    infoUpdatedAt = VALUES(infoUpdatedAt),
+    addedAt = VALUES(addedAt)
+"""
+
 class CompanyProfileService:
 
     def __init__(self):
@@ -25,9 +108,7 @@ class CompanyProfileService:
             "database": config.DB_STOCK_MARKET,
             "cursorclass": pymysql.cursors.DictCursor
         }
-
-    def sleep_between_companies(self):
-        return
+        self._tables_ready = False
 
     def clean_numeric(self, value, max_abs=MAX_MYSQL_FLOAT):
         if value is None:
@@ -47,7 +128,10 @@ class CompanyProfileService:
         return numeric_value
 
     def ensure_tables_exist(self):
-        """Ensure the company profile cron tables exist before writes."""
+        """Ensure the company profile cron tables exist before writes (once per process)."""
+        if self._tables_ready:
+            return
+
         connection = pymysql.connect(**self.db_config)
 
         try:
@@ -74,10 +158,18 @@ class CompanyProfileService:
                         forwardPE FLOAT,
                         trailingPE FLOAT,
                         website VARCHAR(255),
+                        infoUpdatedAt DATETIME,
                         addedAt DATETIME
                     )
                 """)
 
+                # Profile staleness (shared with the yfinance info TTL)
+                cursor.execute("SHOW COLUMNS FROM companies LIKE 'infoUpdatedAt'")
+                if not cursor.fetchall():
+                    cursor.execute(
+                        "ALTER TABLE companies ADD COLUMN infoUpdatedAt DATETIME NULL AFTER website"
+                    )
+
                 for column in (
                     "currentPrice",
                     "previousClose",
@@ -123,6 +215,7 @@ class CompanyProfileService:
                 )
 
                 connection.commit()
+            self._tables_ready = True
         finally:
             connection.close()
 
@@ -140,154 +233,206 @@ class CompanyProfileService:
         finally:
             connection.close()
 
-    def save_company_profile(self, data):
-        """Save company profile into DB"""
+    def get_profile_targets(self):
+        """(symbol, infoUpdatedAt) for every listed company; None = never fetched."""
         self.ensure_tables_exist()
         connection = pymysql.connect(**self.db_config)
 
         try:
             with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT l.symbol, c.infoUpdatedAt
+                    FROM listed_companies l
+                    LEFT JOIN companies c ON c.symbol = l.symbol
+                """)
+                return [(row["symbol"], row["infoUpdatedAt"]) for row in cursor.fetchall()]
 
-                sql = """
-                INSERT INTO companies (
-                    symbol,
-                    name,
-                    sector,
-                    industry,
-                    currency,
-                    exchange,
-                    marketCap,
-                    currentPrice,
-                    previousClose,
-                    `change`,
-                    changePercent,
-                    volume,
-                    high52Week,
-                    low52Week,
-                    beta,
-                    dividendYield,
-                    forwardPE,
-                    trailingPE,
-                    website,
-                    addedAt
-                )
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                ON DUPLICATE KEY UPDATE
-                    name = VALUES(name),
-                    sector = VALUES(sector),
-                    industry = VALUES(industry),
-                    currency = VALUES(currency),
-                    exchange = VALUES(exchange),
-                    marketCap = VALUES(marketCap),
-                    currentPrice = VALUES(currentPrice),
-                    previousClose = VALUES(previousClose),
-                    `change` = VALUES(`change`),
-                    changePercent = VALUES(changePercent),
-                    volume = VALUES(volume),
-                    high52Week = VALUES(high52Week),
-                    low52Week = VALUES(low52Week),
-                    beta = VALUES(beta),
-                    dividendYield = VALUES(dividendYield),
-                    forwardPE = VALUES(forwardPE),
-                    trailingPE = VALUES(trailingPE),
-                    website = VALUES(website),
-                    addedAt = VALUES(addedAt)
-                """
-
-                current_price = self.clean_numeric(
-                    data.get("currentPrice") or data.get("regularMarketPrice")
-                )
-                previous_close = self.clean_numeric(
-                    data.get("previousClose") or data.get("regularMarketPreviousClose")
-                )
-                price_change = None
-                change_percent = None
-
-                if current_price is not None and previous_close:
-                    price_change = current_price - previous_close
-                    change_percent = (price_change / previous_close) * 100
-
-                cursor.execute(sql, (
-                    data.get("symbol"),
-                    data.get("longName") or data.get("shortName"),
-                    data.get("sector"),
-                    data.get("industry"),
-                    data.get("currency"),
-                    data.get("exchange"),
-                    self.clean_numeric(data.get("marketCap")),
-                    current_price,
-                    previous_close,
-                    self.clean_numeric(price_change),
-                    self.clean_numeric(change_percent),
-                    self.clean_numeric(
-                        data.get("volume") or data.get("regularMarketVolume")
-                    ),
-                    self.clean_numeric(data.get("fiftyTwoWeekHigh")),
-                    self.clean_numeric(data.get("fiftyTwoWeekLow")),
-                    self.clean_numeric(data.get("beta")),
-                    self.clean_numeric(data.get("dividendYield")),
-                    self.clean_numeric(data.get("forwardPE")),
-                    self.clean_numeric(data.get("trailingPE")),
-                    data.get("website"),
-                    datetime.now()
-                ))
+        finally:
+            connection.close()
+
+    def profile_row(self, data, now=None):
+        """Yahoo ``.info`` dict -> parameters for the companies upsert."""
+        now = now or datetime.now()
+        current_price = self.clean_numeric(
+            data.get("currentPrice") or data.get("regularMarketPrice")
+        )
+        previous_close = self.clean_numeric(
+            data.get("previousClose") or data.get("regularMarketPreviousClose")
+        )
+        price_change = None
+        change_percent = None
+
+        if current_price is not None and previous_close:
+            price_change = current_price - previous_close
+            change_percent = (price_change / previous_close) * 100
+
+        return (
+            data.get("symbol"),
+            data.get("longName") or data.get("shortName"),
+            data.get("sector"),
+            data.get("industry"),
+            data.get("currency"),
+            data.get("exchange"),
+            self.clean_numeric(data.get("marketCap")),
+            current_price,
+            previous_close,
+            self.clean_numeric(price_change),
+            self.clean_numeric(change_percent),
+            self.clean_numeric(
+                data.get("volume") or data.get("regularMarketVolume")
+            ),
+            self.clean_numeric(data.get("fiftyTwoWeekHigh")),
+            self.clean_numeric(data.get("fiftyTwoWeekLow")),
+            self.clean_numeric(data.get("beta")),
+            self.clean_numeric(data.get("dividendYield")),
+            self.clean_numeric(data.get("forwardPE")),
+            self.clean_numeric(data.get("trailingPE")),
+            data.get("website"),
+            now,
+            now
+        )
+
+    def save_company_profiles(self, profiles):
+        """Save many company profiles with one executemany / commit"""
+        if not profiles:
+            return
+        self.ensure_tables_exist()
+        connection = pymysql.connect(**self.db_config)
 
+        try:
+            with connection.cursor() as cursor:
+                now = datetime.now()
+                cursor.executemany(
+                    _PROFILE_UPSERT_SQL,
+                    [self.profile_row(data, now) for data in profiles]
+                )
                 connection.commit()
 
         finally:
             connection.close()
 
+    def save_company_profile(self, data):
+        """Save company profile into DB"""
+        self.save_company_profiles([data])
+
     def fetch_and_save_all(self):
-        """Fetch all company profiles"""
+        """Fetch all company profiles (see CompanyProfileHarvester)"""
         logger.info("🔥 CRON JOB STARTED: Fetching Company Profiles")
 
-        symbols = self.get_symbols()
+        with CronJobContext("company_profile_sync", "company_profile") as context:
+            harvester = CompanyProfileHarvester(self, context=context)
+            result = harvester.run(self.get_profile_targets())
 
-        success = 0
-        failed = 0
+            context.add_record(
+                processed=result["due"] - result["deferred"],
+                updated=result["success"],
+            )
+            context.set_data(company_profiles=result)
+
+        logger.info(
+            f"🏁 Sync Completed | Success: {result['success']} | Failed: {result['failed']} | "
+            f"Throttled: {result['throttled']} | Deferred: {result['deferred']} | "
+            f"Fresh (skipped): {result['skipped_fresh']}"
+        )
+        return result
+
+    def _download_market_batch(self, tickers, limiter):
+        """yf.download one batch under the shared rate cap -> (tickers, df, error)."""
+        def download_batch():
+            limiter.acquire()
+            with yf_download_lock:
+                return yf.download(
+                    tickers=tickers,
+                    period="5d",
+                    interval="1d",
+                    group_by='ticker',
+                    threads=True,
+                    progress=False,
+                )
 
-        for symbol in symbols:
+        try:
+            df = with_retries(
+                download_batch,
+                max_retries=4,
+                initial_delay=1,
+                backoff_factor=2,
+                on_429_wait=30,
+            )
+            return tickers, df, None
+        except Exception as e:
+            return tickers, None, e
 
+    def _market_rows(self, df, tickers, trade_date, limiter):
+        """Latest OHLCV row per ticker in one downloaded batch -> (rows, failed)."""
+        def fallback_history(symbol):
             try:
-                logger.info(f"⏳ Fetching {symbol}")
+                limiter.acquire()
+                df = yf.Ticker(symbol).history(period="5d", interval="1d")
+                if df is None or df.empty:
+                    return None
+                return df
+            except Exception:
+                return None
 
-                def _get_info():
-                    t = yf.Ticker(symbol)
-                    # access .info may raise HTTPError from requests used internally
-                    return t.info
+        rows = []
+        failed = 0
 
-                try:
-                    info = with_retries(_get_info, max_retries=5, initial_delay=1, backoff_factor=2, on_429_wait=60)
-                except Exception as e:
-                    logger.error(f"❌ Failed to fetch {symbol} after retries: {e}")
+        for symbol in tickers:
+            try:
+                symbol_df = _extract_symbol_data(df, symbol)
+                if symbol_df is None or symbol_df.empty:
+                    logger.warning(f"⚠️ Missing market data for {symbol}, trying history fallback")
+                    symbol_df = fallback_history(symbol)
+                    if symbol_df is None or symbol_df.empty:
+                        logger.warning(f"⚠️ No market history available for {symbol} (likely delisted or inactive)")
+                        failed += 1
+                        continue
+
+                latest = symbol_df.iloc[-1]
+                if latest is None or latest.empty:
+                    logger.warning(f"⚠️ No latest row for {symbol}")
                     failed += 1
-                    self.sleep_between_companies()
                     continue
 
-                if info and "symbol" in info:
-                    self.save_company_profile(info)
-                    logger.info(f"✅ Saved {symbol}")
-                    success += 1
-                else:
-                    logger.warning(f"⚠️ No data for {symbol}")
+                open_price = self.clean_numeric(_get_latest_field(latest, 'Open'))
+                high_price = self.clean_numeric(_get_latest_field(latest, 'High'))
+                low_price = self.clean_numeric(_get_latest_field(latest, 'Low'))
+                close_price = self.clean_numeric(_get_latest_field(latest, 'Close'))
+                volume_value = self.clean_numeric(_get_latest_field(latest, 'Volume'))
+
+                if open_price is None and close_price is None:
+                    logger.warning(f"⚠️ Invalid yfinance data for {symbol}")
                     failed += 1
+                    continue
 
-                self.sleep_between_companies()
+                rows.append((
+                    symbol,
+                    trade_date,
+                    open_price,
+                    high_price,
+                    low_price,
+                    close_price,
+                    volume_value,
+                ))
 
-            except requests.exceptions.HTTPError as e:
-                logger.error(f"❌ HTTP error fetching {symbol}: {e}")
-                failed += 1
-                self.sleep_between_companies()
             except Exception as e:
-                logger.error(f"❌ Error fetching {symbol}: {e}")
+                logger.error(f"Error processing symbol {symbol} in batch: {e}")
                 failed += 1
-                self.sleep_between_companies()
 
-        logger.info(f"🏁 Sync Completed | Success: {success} | Failed: {failed}")
-        return {"success": success, "failed": failed}
+        return rows, failed
 
     def fetch_and_save_market_data(self):
-        """Fetch current market data for all symbols"""
+        """
+        Fetch current market data for all symbols.
+
+        Batches download on MARKET_FETCH_DOWNLOAD_WORKERS threads (default 1)
+        while the previous batch is written, paced by one token bucket
+        (MARKET_FETCH_RATE_PER_SECOND yfinance calls/s, history fallbacks
+        included). ``yf.download`` itself runs one call at a time
+        (``yf_download_lock``) with ``threads=True`` inside the call. Each
+        batch is written with a single executemany upsert + commit on one
+        pooled connection.
+        """
         logger.info("📊 Fetching market data for all symbols")
         self.ensure_tables_exist()
         
@@ -296,156 +441,83 @@ class CompanyProfileService:
         failed = 0
 
         batch_size = getattr(config, "MARKET_FETCH_BATCH_SIZE", 20)
-
-        def chunks(lst, n):
-            for i in range(0, len(lst), n):
-                yield lst[i:i + n]
-
-        def extract_symbol_data(df, symbol):
-            if df is None or df.empty:
-                return None
-
-            if isinstance(df.columns, pd.MultiIndex):
-                if symbol in df.columns.get_level_values(0):
-                    try:
-                        return df[symbol]
-                    except KeyError:
-                        pass
-                if symbol in df.columns.get_level_values(1):
-                    try:
-                        return df.xs(symbol, level=1, axis=1)
-                    except KeyError:
-                        pass
-                return None
-
-            return df
-
-        def get_latest_field(series, field):
-            if field in series.index:
-                return series[field]
-            for key in series.index:
-                if isinstance(key, tuple) and key[-1] == field:
-                    return series[key]
-            return None
-
-        def download_batch(tickers):
-            # Use yfinance.download to fetch multiple tickers at once
-            return yf.download(
-                tickers=tickers,
-                period="5d",
-                interval="1d",
-                group_by='ticker',
-                threads=False,
-                progress=False,
-            )
-
-        def fallback_history(symbol):
-            try:
-                df = yf.Ticker(symbol).history(period="5d", interval="1d")
-                if df is None or df.empty:
-                    return None
-                return df
-            except Exception:
-                return None
-
-        for batch in chunks(symbols, batch_size):
-            tickers = list(batch)
-
+        workers = optional_env_int("MARKET_FETCH_DOWNLOAD_WORKERS", 1, minimum=1)
+        limiter = TokenBucket(rate=optional_env_float("MARKET_FETCH_RATE_PER_SECOND", 0.5, minimum=0.01))
+        trade_date = datetime.now(pytz.timezone("Asia/Kolkata")).date()
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+
+        with CronJobContext("market_data_fetch", "company_profile") as context:
+            started = time.perf_counter()
+            connection = db_manager.get_connection(config.DB_STOCK_MARKET)
+            cursor = connection.cursor()
             try:
-                df = with_retries(
-                    lambda: download_batch(tickers),
-                    max_retries=4,
-                    initial_delay=1,
-                    backoff_factor=2,
-                    on_429_wait=30,
-                )
-            except Exception as e:
-                logger.error(f"Error downloading batch {tickers} after retries: {e}")
-                failed += len(tickers)
-                time.sleep(10)
-                continue
-
-            for symbol in tickers:
-                try:
-                    symbol_df = extract_symbol_data(df, symbol)
-                    if symbol_df is None or symbol_df.empty:
-                        logger.warning(f"⚠️ Missing market data for {symbol}, trying history fallback")
-                        symbol_df = fallback_history(symbol)
-                        if symbol_df is None or symbol_df.empty:
-                            logger.warning(f"⚠️ No market history available for {symbol} (likely delisted or inactive)")
-                            failed += 1
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="market-data") as pool:
+                    futures = [
+                        pool.submit(self._download_market_batch, batch, limiter)
+                        for batch in batches
+                    ]
+                    for future in as_completed(futures):
+                        tickers, df, error = future.result()
+                        if error is not None:
+                            logger.error(f"Error downloading batch {tickers} after retries: {error}")
+                            failed += len(tickers)
                             continue
 
-                    latest = symbol_df.iloc[-1]
-                    if latest is None or latest.empty:
-                        logger.warning(f"⚠️ No latest row for {symbol}")
-                        failed += 1
-                        continue
-
-                    open_price = self.clean_numeric(get_latest_field(latest, 'Open'))
-                    high_price = self.clean_numeric(get_latest_field(latest, 'High'))
-                    low_price = self.clean_numeric(get_latest_field(latest, 'Low'))
-                    close_price = self.clean_numeric(get_latest_field(latest, 'Close'))
-                    volume_value = self.clean_numeric(get_latest_field(latest, 'Volume'))
-
-                    if open_price is None and close_price is None:
-                        logger.warning(f"⚠️ Invalid yfinance data for {symbol}")
-                        failed += 1
-                        continue
-
-                    connection = pymysql.connect(**self.db_config)
-                    try:
-                        with connection.cursor() as cursor:
-                            sql = """
-                            INSERT INTO market_data (
-                                symbol, date, open, high, low, close, volume
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-                            ON DUPLICATE KEY UPDATE
-                                open = VALUES(open),
-                                high = VALUES(high),
-                                low = VALUES(low),
-                                close = VALUES(close),
-                                volume = VALUES(volume)
-                            """
-
-                            cursor.execute(sql, (
-                                symbol,
-                                datetime.now(pytz.timezone("Asia/Kolkata")).date(),
-                                open_price,
-                                high_price,
-                                low_price,
-                                close_price,
-                                volume_value,
-                            ))
-                            connection.commit()
-                            success += 1
-                    finally:
-                        connection.close()
-
-                except Exception as e:
-                    logger.error(f"Error processing symbol {symbol} in batch: {e}")
-                    failed += 1
-
-            # Pause between batches to avoid rate limits
-            time.sleep(10)
+                        rows, batch_failed = self._market_rows(df, tickers, trade_date, limiter)
+                        failed += batch_failed
+                        if rows:
+                            try:
+                                cursor.executemany(MARKET_DATA_UPSERT_SQL, rows)
+                                connection.commit()
+                            except Exception as e:
+                                connection.rollback()
+                                logger.error(f"Error saving market data batch {tickers}: {e}")
+                                failed += len(rows)
+                                context.add_record(processed=len(tickers))
+                                continue
+                            success += len(rows)
+                        context.add_record(processed=len(tickers), inserted=len(rows))
+            finally:
+                cursor.close()
+                connection.close()
+
+            elapsed = time.perf_counter() - started
+            rows_per_second = round(success / elapsed, 2) if elapsed > 0 else None
+            context.set_data(
+                batches=len(batches),
+                failed=failed,
+                duration_seconds=round(elapsed, 3),
+                rows_per_second=rows_per_second,
+                rate_limit_wait_seconds=round(limiter.waited_seconds, 3),
+            )
 
-        logger.info(f"Market data fetch complete | Success: {success} | Failed: {failed}")
-        return {"success": success, "failed": failed}
+        logger.info(
+            f"Market data fetch complete | Success: {success} | Failed: {failed} | "
+            f"{rows_per_second} rows/s"
+        )
+        return {"success": success, "failed": failed, "rows_per_second": rows_per_second}
 
     def refresh_single_day(self):
-        """Refresh single day data for all stocks"""
-        # Implementation here
-        pass
+        """Refresh the latest trading day for all stocks (stored under its own date)"""
+        self.ensure_tables_exist()
+        return MarketDataBackfill().run(self.get_symbols(), period="5d", latest_only=True)
 
     def refresh_range(self, start, end):
-        """Refresh data for date range"""
-        # Implementation here
-        pass
+        """Refresh data for date range (YYYY-MM-DD, both ends inclusive)"""
+        start_date = datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end, "%Y-%m-%d").date()
+        if start_date > end_date:
+            raise ValueError(f"start {start} is after end {end}")
+
+        self.ensure_tables_exist()
+        return MarketDataBackfill().run(self.get_symbols(), start=start_date, end=end_date)
 
     def fetch_single_day(self, symbol):
-        """Fetch single day data for a symbol"""
-        # Implementation here
-        pass
+        """Fetch single day data for a symbol (not stored)"""
+        rows = MarketDataBackfill().fetch([symbol], period="5d", latest_only=True)
+        if rows.empty:
+            return None
+        return rows.astype(object).where(rows.notna(), None).to_dict("records")
 
 
 company_service = CompanyProfileService()
@@ -1,11 +1,13 @@
 import logging
+import threading
+import time
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 import json
 import traceback
 from app.database.connection import db_manager
-from app.config import config
+from app.config import config, optional_env_float, optional_env_int
 import pymysql
 
 logger = logging.getLogger(__name__)
@@ -26,12 +28,222 @@ def _json_safe(value: Any) -> Any:
     return str(value)
 
 
+def _combine_patches(target: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fold ``patch`` into ``target`` so that JSON_MERGE_PATCH with the result
+    equals applying both patches in order (nulls are kept: they delete keys).
+    """
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _combine_patches(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+def _progress_flush_seconds() -> float:
+    return optional_env_float("CRON_PROGRESS_FLUSH_SECONDS", 2.0, minimum=0.1)
+
+
+def _progress_max_pending() -> int:
+    return optional_env_int("CRON_PROGRESS_MAX_PENDING", 256, minimum=1)
+
+
+class CronProgressBuffer:
+    """
+    Write-behind buffer for RUNNING-job progress.
+
+    ``put`` never touches the DB: updates coalesce per log_id (latest
+    counters, merge-patched additional_data) and a daemon thread writes the
+    whole batch every CRON_PROGRESS_FLUSH_SECONDS over one connection. If
+    the DB is slow the batch is simply retried on the next tick; when more
+    than CRON_PROGRESS_MAX_PENDING jobs are pending, updates for new log
+    ids are dropped rather than blocking the caller.
+    """
+
+    def __init__(self, writer: Callable[[List[Dict[str, Any]]], int], interval: Optional[float] = None):
+        self._writer = writer
+        self._interval = interval
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._flush_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "rows_written": 0,
+            "failures": 0,
+            "last_flush_seconds": None,
+        }
+
+    @property
+    def interval(self) -> float:
+        return self._interval if self._interval is not None else _progress_flush_seconds()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="cron-progress-flusher", daemon=True)
+            self._thread.start()
+
+    def _absorb(self, log_id: int, update: Dict[str, Any]):
+        """Merge ``update`` into the pending entry (caller holds the condition)."""
+        entry = self._pending.get(log_id)
+        if entry is None:
+            self._pending[log_id] = {
+                "log_id": log_id,
+                "counters": dict(update.get("counters") or {}),
+                "data": dict(update.get("data") or {}),
+            }
+            return
+        # an older (re-queued) update must not overwrite newer counters
+        for key, value in (update.get("counters") or {}).items():
+            entry["counters"].setdefault(key, value)
+        entry["data"] = _combine_patches(dict(update.get("data") or {}), entry["data"])
+
+    def put(self, log_id: int, counters: Dict[str, Any], data: Optional[Dict[str, Any]]) -> bool:
+        with self._cond:
+            entry = self._pending.get(log_id)
+            if entry is None and len(self._pending) >= _progress_max_pending():
+                self._stats["dropped"] += 1
+                return False
+            if entry is None:
+                self._pending[log_id] = {"log_id": log_id, "counters": {}, "data": {}}
+                entry = self._pending[log_id]
+            else:
+                self._stats["coalesced"] += 1
+            entry["counters"].update({k: v for k, v in counters.items() if v is not None})
+            if data:
+                _combine_patches(entry["data"], _json_safe(data))
+            self._stats["enqueued"] += 1
+            self._ensure_thread()
+        return True
+
+    def take(self, log_id: int) -> Optional[Dict[str, Any]]:
+        """Remove and return one job's pending update (used when the job ends)."""
+        with self._cond:
+            return self._pending.pop(log_id, None)
+
+    def flush(self) -> int:
+        """Write everything pending now; failed batches go back into the buffer."""
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._pending.values())
+                self._pending = {}
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                written = self._writer(batch)
+            except Exception as e:
+                logger.error(f"Failed to flush cron progress ({len(batch)} jobs): {e}")
+                with self._cond:
+                    self._stats["failures"] += 1
+                    for entry in batch:
+                        self._absorb(entry["log_id"], entry)
+                return 0
+            with self._cond:
+                self._stats["flushes"] += 1
+                self._stats["rows_written"] += written
+                self._stats["last_flush_seconds"] = round(time.perf_counter() - started, 4)
+            return written
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait(timeout=self.interval)
+            self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        stats["interval_seconds"] = self.interval
+        return stats
+
+
+_PROGRESS_UPDATE_SQL = """
+UPDATE cron_job_logs
+SET additional_data = JSON_MERGE_PATCH(COALESCE(additional_data, JSON_OBJECT()), %s),
+    records_processed = COALESCE(%s, records_processed),
+    records_inserted = COALESCE(%s, records_inserted),
+    records_updated = COALESCE(%s, records_updated)
+WHERE id = %s AND status = 'RUNNING'
+"""
+
+_ROLLUP_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS `cron_job_daily_rollup` (
+    `run_date` DATE NOT NULL COMMENT 'DATE(start_time) of the runs',
+    `job_name` VARCHAR(255) NOT NULL,
+    `total_runs` INT NOT NULL DEFAULT 0 COMMENT 'Finished runs (RUNNING rows are not counted)',
+    `success_count` INT NOT NULL DEFAULT 0,
+    `failed_count` INT NOT NULL DEFAULT 0,
+    `skipped_count` INT NOT NULL DEFAULT 0,
+    `duration_runs` INT NOT NULL DEFAULT 0 COMMENT 'Runs with a duration, for averaging',
+    `total_duration_seconds` DECIMAL(16, 3) NOT NULL DEFAULT 0,
+    `total_records_processed` BIGINT NOT NULL DEFAULT 0,
+    `total_records_inserted` BIGINT NOT NULL DEFAULT 0,
+    `total_records_updated` BIGINT NOT NULL DEFAULT 0,
+    `last_run` DATETIME NULL,
+    `updated_at` DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_date, job_name),
+    INDEX idx_rollup_job_date (job_name, run_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+# Folds finished log rows into the rollup; {where} selects which rows
+_ROLLUP_UPSERT_SQL = """
+INSERT INTO cron_job_daily_rollup (
+    run_date, job_name, total_runs, success_count, failed_count, skipped_count,
+    duration_runs, total_duration_seconds, total_records_processed,
+    total_records_inserted, total_records_updated, last_run
+)
+SELECT
+    DATE(start_time), job_name, COUNT(*),
+    SUM(status = 'SUCCESS'), SUM(status = 'FAILED'), SUM(status = 'SKIPPED'),
+    COUNT(duration_seconds), COALESCE(SUM(duration_seconds), 0),
+    COALESCE(SUM(records_processed), 0), COALESCE(SUM(records_inserted), 0),
+    COALESCE(SUM(records_updated), 0), MAX(start_time)
+FROM cron_job_logs
+WHERE {where}
+GROUP BY DATE(start_time), job_name
+ON DUPLICATE KEY UPDATE
+    total_runs = total_runs + VALUES(total_runs),
+    success_count = success_count + VALUES(success_count),
+    failed_count = failed_count + VALUES(failed_count),
+    skipped_count = skipped_count + VALUES(skipped_count),
+    duration_runs = duration_runs + VALUES(duration_runs),
+    total_duration_seconds = total_duration_seconds + VALUES(total_duration_seconds),
+    total_records_processed = total_records_processed + VALUES(total_records_processed),
+    total_records_inserted = total_records_inserted + VALUES(total_records_inserted),
+    total_records_updated = total_records_updated + VALUES(total_records_updated),
+    last_run = GREATEST(COALESCE(last_run, VALUES(last_run)), VALUES(last_run))
+"""
+
+
+def _job_window(job_name: Optional[str], days: int, column: str = "start_time", since: str = "NOW()"):
+    """
+    WHERE clause + params for "this job (or all jobs) in the last ``days``".
+
+    Filtered and unfiltered calls get separate SQL shapes so MySQL can pick
+    the (job_name, start_time) index or the start_time index; the old
+    ``(%s IS NULL OR job_name = %s)`` form could use neither.
+    """
+    window = f"{column} >= DATE_SUB({since}, INTERVAL %s DAY)"
+    if job_name:
+        return f"job_name = %s AND {window}", (job_name, days)
+    return window, (days,)
+
+
 class CronLoggerService:
     """Service to log all cron job executions"""
     
     def __init__(self):
         self.db_name = config.DB_STOCK_MARKET
         self.table_created = False
+        self.rollup_ready = False
+        self.progress = CronProgressBuffer(self._write_progress_batch)
         # Try to create table on initialization
         self.ensure_table_exists()
     
@@ -76,7 +288,7 @@ class CronLoggerService:
                     `additional_data` JSON NULL COMMENT 'Any additional job-specific data',
                     `created_at` DATETIME DEFAULT CURRENT_TIMESTAMP,
                     `updated_at` DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    INDEX idx_job_name (job_name),
+                    INDEX idx_job_name_start_time (job_name, start_time),
                     INDEX idx_status (status),
                     INDEX idx_start_time (start_time),
                     INDEX idx_job_group (job_group)
@@ -88,8 +300,10 @@ class CronLoggerService:
                 logger.info("✅ Cron job logs table created successfully")
             else:
                 logger.debug("Cron job logs table already exists")
+                self._ensure_composite_index(cursor, conn)
             
             self.table_created = True
+            self._ensure_rollup_table(cursor, conn)
             
         except Exception as e:
             logger.error(f"Failed to ensure cron_job_logs table: {e}")
@@ -102,6 +316,49 @@ class CronLoggerService:
             if conn:
                 conn.close()
     
+    def _ensure_composite_index(self, cursor, conn):
+        """Add idx_job_name_start_time to tables created before it existed."""
+        cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = %s AND table_name = 'cron_job_logs'
+              AND index_name = 'idx_job_name_start_time'
+            """,
+            (self.db_name,),
+        )
+        if cursor.fetchone()[0]:
+            return
+        logger.info("Adding idx_job_name_start_time to cron_job_logs...")
+        cursor.execute(
+            "ALTER TABLE cron_job_logs ADD INDEX idx_job_name_start_time (job_name, start_time)"
+        )
+        conn.commit()
+
+    def _ensure_rollup_table(self, cursor, conn):
+        """
+        Create cron_job_daily_rollup; a freshly created rollup is backfilled
+        once from the finished rows already in cron_job_logs.
+        """
+        try:
+            cursor.execute(
+                """
+                SELECT COUNT(*) FROM information_schema.tables
+                WHERE table_schema = %s AND table_name = 'cron_job_daily_rollup'
+                """,
+                (self.db_name,),
+            )
+            if not cursor.fetchone()[0]:
+                logger.info("Creating cron_job_daily_rollup table...")
+                cursor.execute(_ROLLUP_TABLE_SQL)
+                cursor.execute(_ROLLUP_UPSERT_SQL.format(where="status <> 'RUNNING'"))
+                conn.commit()
+                logger.info(f"✅ Cron job rollup created ({cursor.rowcount} day/job rows backfilled)")
+            self.rollup_ready = True
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"Cron rollup unavailable, stats will scan raw logs: {e}")
+            self.rollup_ready = False
+
     def start_job(self, job_name: str, job_group: str = "default", additional_data: Dict = None) -> Optional[int]:
         """Log job start and return log ID"""
         # Try to ensure table exists if it wasn't created before
@@ -167,14 +424,6 @@ class CronLoggerService:
             
             end_time = datetime.now()
             
-            # Calculate duration if start_time exists
-            cursor.execute("SELECT start_time FROM cron_job_logs WHERE id = %s", (log_id,))
-            result = cursor.fetchone()
-            
-            duration = None
-            if result and result[0]:
-                duration = (end_time - result[0]).total_seconds()
-            
             error_message = None
             error_traceback = None
             
@@ -182,41 +431,42 @@ class CronLoggerService:
                 error_message = str(error)
                 error_traceback = traceback.format_exc()
             
-            # Merge additional data if provided
+            # Unflushed progress for this job rides along; end-of-job data wins
+            pending = self.progress.take(log_id)
+            patch = pending["data"] if pending else {}
             if additional_data:
-                cursor.execute("SELECT additional_data FROM cron_job_logs WHERE id = %s", (log_id,))
-                existing_data = cursor.fetchone()
-                if existing_data and existing_data[0]:
-                    try:
-                        existing_dict = json.loads(existing_data[0]) if existing_data[0] else {}
-                        existing_dict.update(additional_data)
-                        additional_data = existing_dict
-                    except:
-                        pass
-            
-            additional_json = (
-                json.dumps(_json_safe(additional_data)) if additional_data else None
-            )
+                _combine_patches(patch, _json_safe(additional_data))
+            additional_json = json.dumps(patch) if patch else None
             
             query = """
             UPDATE cron_job_logs 
             SET end_time = %s,
-                duration_seconds = %s,
+                duration_seconds = TIMESTAMPDIFF(MICROSECOND, start_time, %s) / 1000000,
                 status = %s,
                 records_processed = %s,
                 records_inserted = %s,
                 records_updated = %s,
                 error_message = %s,
                 error_traceback = %s,
-                additional_data = COALESCE(%s, additional_data)
-            WHERE id = %s
+                additional_data = IF(
+                    %s IS NULL,
+                    additional_data,
+                    JSON_MERGE_PATCH(COALESCE(additional_data, JSON_OBJECT()), %s)
+                )
+            WHERE id = %s AND status = 'RUNNING'
             """
             
             cursor.execute(query, (
-                end_time, duration, status, records_processed,
+                end_time, end_time, status, records_processed,
                 records_inserted, records_updated, error_message,
-                error_traceback, additional_json, log_id
+                error_traceback, additional_json, additional_json, log_id
             ))
+            # Only a RUNNING -> final transition is rolled up; a run already
+            # closed (e.g. by clear_stuck_running) was counted back then.
+            if cursor.rowcount != 1:
+                logger.warning(f"Job (ID: {log_id}) was already closed; keeping its recorded status")
+            elif self.rollup_ready:
+                cursor.execute(_ROLLUP_UPSERT_SQL.format(where="id = %s"), (log_id,))
             
             conn.commit()
             logger.debug(f"Job completed (ID: {log_id}) - Status: {status}")
@@ -238,66 +488,52 @@ class CronLoggerService:
         records_updated: int = None,
         additional_data: Dict = None,
     ):
-        """Update a RUNNING job mid-flight so Manual API progress is visible in the UI."""
+        """
+        Queue progress for a RUNNING job (Manual API tracking in the UI).
+
+        Returns once the update is buffered; the write happens on the next
+        write-behind flush or when the job ends.
+        """
         if not self.table_created or log_id is None:
             return False
 
-        conn = None
+        return self.progress.put(
+            log_id,
+            {
+                "records_processed": records_processed,
+                "records_inserted": records_inserted,
+                "records_updated": records_updated,
+            },
+            additional_data,
+        )
+
+    def _write_progress_batch(self, batch: List[Dict[str, Any]]) -> int:
+        """One connection, one UPDATE per job, one commit for the whole batch."""
+        conn = db_manager.get_connection(self.db_name)
         cursor = None
         try:
-            conn = db_manager.get_connection(self.db_name)
             cursor = conn.cursor()
-
-            merged = additional_data
-            if additional_data:
-                cursor.execute(
-                    "SELECT additional_data FROM cron_job_logs WHERE id = %s",
-                    (log_id,),
+            rows = [
+                (
+                    json.dumps(entry["data"]),
+                    entry["counters"].get("records_processed"),
+                    entry["counters"].get("records_inserted"),
+                    entry["counters"].get("records_updated"),
+                    entry["log_id"],
                 )
-                existing = cursor.fetchone()
-                if existing and existing[0]:
-                    try:
-                        existing_dict = (
-                            json.loads(existing[0])
-                            if isinstance(existing[0], str)
-                            else (existing[0] or {})
-                        )
-                        existing_dict.update(additional_data)
-                        merged = existing_dict
-                    except Exception:
-                        merged = additional_data
-
-            additional_json = (
-                json.dumps(_json_safe(merged)) if merged is not None else None
-            )
-
-            sets = ["additional_data = COALESCE(%s, additional_data)"]
-            params = [additional_json]
-            if records_processed is not None:
-                sets.append("records_processed = %s")
-                params.append(records_processed)
-            if records_inserted is not None:
-                sets.append("records_inserted = %s")
-                params.append(records_inserted)
-            if records_updated is not None:
-                sets.append("records_updated = %s")
-                params.append(records_updated)
-            params.append(log_id)
-
-            cursor.execute(
-                f"UPDATE cron_job_logs SET {', '.join(sets)} WHERE id = %s AND status = 'RUNNING'",
-                params,
-            )
+                for entry in batch
+            ]
+            cursor.executemany(_PROGRESS_UPDATE_SQL, rows)
             conn.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
-            logger.error(f"Failed to update running job {log_id}: {e}")
-            return False
+            return cursor.rowcount
         finally:
             if cursor:
                 cursor.close()
-            if conn:
-                conn.close()
+            conn.close()
+
+    def flush_progress(self) -> int:
+        """Write all buffered progress now (shutdown / tests)."""
+        return self.progress.flush()
     
     def get_job_history(self, job_name: str = None, days: int = 7, limit: int = 100):
         """Get job execution history"""
@@ -311,15 +547,15 @@ class CronLoggerService:
             conn = db_manager.get_connection(self.db_name)
             cursor = conn.cursor(pymysql.cursors.DictCursor)
             
-            query = """
+            where, params = _job_window(job_name, days)
+            query = f"""
             SELECT * FROM cron_job_logs
-            WHERE (%s IS NULL OR job_name = %s)
-            AND start_time >= DATE_SUB(NOW(), INTERVAL %s DAY)
+            WHERE {where}
             ORDER BY start_time DESC
             LIMIT %s
             """
             
-            cursor.execute(query, (job_name, job_name, days, limit))
+            cursor.execute(query, params + (limit,))
             results = cursor.fetchall()
             
             return results
@@ -335,7 +571,7 @@ class CronLoggerService:
                 conn.close()
     
     def get_job_stats(self, job_name: str = None, days: int = 30):
-        """Get job execution statistics"""
+        """Get job execution statistics (from the daily rollup when available)"""
         if not self.table_created:
             return []
         
@@ -346,7 +582,29 @@ class CronLoggerService:
             conn = db_manager.get_connection(self.db_name)
             cursor = conn.cursor(pymysql.cursors.DictCursor)
             
-            query = """
+            if self.rollup_ready:
+                where, params = _job_window(job_name, days, column="run_date", since="CURDATE()")
+                query = f"""
+                SELECT
+                    job_name,
+                    SUM(total_runs) as total_runs,
+                    SUM(success_count) as success_count,
+                    SUM(failed_count) as failed_count,
+                    ROUND(SUM(total_duration_seconds) / NULLIF(SUM(duration_runs), 0), 2) as avg_duration_seconds,
+                    SUM(total_records_processed) as total_records_processed,
+                    SUM(total_records_inserted) as total_records_inserted,
+                    SUM(total_records_updated) as total_records_updated,
+                    MAX(last_run) as last_run
+                FROM cron_job_daily_rollup
+                WHERE {where}
+                GROUP BY job_name
+                ORDER BY last_run DESC
+                """
+                cursor.execute(query, params)
+                return cursor.fetchall()
+            
+            where, params = _job_window(job_name, days)
+            query = f"""
             SELECT 
                 job_name,
                 COUNT(*) as total_runs,
@@ -358,13 +616,12 @@ class CronLoggerService:
                 SUM(records_updated) as total_records_updated,
                 MAX(start_time) as last_run
             FROM cron_job_logs
-            WHERE (%s IS NULL OR job_name = %s)
-            AND start_time >= DATE_SUB(NOW(), INTERVAL %s DAY)
+            WHERE {where}
             GROUP BY job_name
             ORDER BY last_run DESC
             """
             
-            cursor.execute(query, (job_name, job_name, days))
+            cursor.execute(query, params)
             results = cursor.fetchall()
             
             return results
@@ -446,7 +703,7 @@ class CronLoggerService:
                 conn.close()
     
     def get_daily_summary(self, days: int = 7):
-        """Get daily job execution summary"""
+        """Get daily job execution summary (from the daily rollup when available)"""
         if not self.table_created:
             return []
         
@@ -457,6 +714,25 @@ class CronLoggerService:
             conn = db_manager.get_connection(self.db_name)
             cursor = conn.cursor(pymysql.cursors.DictCursor)
             
+            if self.rollup_ready:
+                query = """
+                SELECT
+                    run_date,
+                    SUM(total_runs) as total_jobs,
+                    SUM(success_count) as successful,
+                    SUM(failed_count) as failed,
+                    SUM(skipped_count) as skipped,
+                    SUM(total_records_processed) as total_processed,
+                    SUM(total_records_inserted) as total_inserted,
+                    SUM(total_records_updated) as total_updated
+                FROM cron_job_daily_rollup
+                WHERE run_date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+                GROUP BY run_date
+                ORDER BY run_date DESC
+                """
+                cursor.execute(query, (days,))
+                return cursor.fetchall()
+            
             query = """
             SELECT 
                 DATE(start_time) as run_date,
@@ -500,21 +776,35 @@ class CronLoggerService:
         try:
             conn = db_manager.get_connection(self.db_name)
             cursor = conn.cursor()
-            query = """
-            UPDATE cron_job_logs
-            SET status = 'FAILED',
-                end_time = NOW(),
-                duration_seconds = TIMESTAMPDIFF(SECOND, start_time, NOW()),
-                error_message = COALESCE(
-                    error_message,
-                    'Marked stuck RUNNING (process likely crashed or restarted)'
-                )
-            WHERE status = 'RUNNING'
-              AND end_time IS NULL
-              AND start_time < DATE_SUB(NOW(), INTERVAL %s MINUTE)
-            """
-            cursor.execute(query, (max(1, int(older_than_minutes)),))
-            cleared = cursor.rowcount
+            cursor.execute(
+                """
+                SELECT id FROM cron_job_logs
+                WHERE status = 'RUNNING'
+                  AND end_time IS NULL
+                  AND start_time < DATE_SUB(NOW(), INTERVAL %s MINUTE)
+                FOR UPDATE
+                """,
+                (max(1, int(older_than_minutes)),),
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            cleared = 0
+            if ids:
+                in_ids = ", ".join(["%s"] * len(ids))
+                query = f"""
+                UPDATE cron_job_logs
+                SET status = 'FAILED',
+                    end_time = NOW(),
+                    duration_seconds = TIMESTAMPDIFF(SECOND, start_time, NOW()),
+                    error_message = COALESCE(
+                        error_message,
+                        'Marked stuck RUNNING (process likely crashed or restarted)'
+                    )
+                WHERE id IN ({in_ids}) AND status = 'RUNNING'
+                """
+                cursor.execute(query, ids)
+                cleared = cursor.rowcount
+                if self.rollup_ready:
+                    cursor.execute(_ROLLUP_UPSERT_SQL.format(where=f"id IN ({in_ids})"), ids)
             conn.commit()
             return {
                 "cleared": cleared,
@@ -0,0 +1,238 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from app.config import optional_env_int
+from app.services.backend_formula_service import (
+    formula_refresh_concurrency,
+    trigger_backend_formula_refresh,
+)
+from app.utils.blocking import percentile
+
+logger = logging.getLogger(__name__)
+
+# Formulas whose result for date D reads their own (or their parent's) rows
+# from earlier dates: FTD scans rally attempts in a 20-day window and dedupes
+# per rally, Buy Day scans FTDs. They must run oldest date first.
+ROLLING_FORMULAS = ("follow_through_day", "buy_day")
+
+LATENCY_BUCKETS_SECONDS = (5, 15, 30, 60, 120, 300, 600)
+
+
+def _formula_batch_dates() -> int:
+    return optional_env_int("FORMULA_REFRESH_BATCH_DATES", 5, minimum=1)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (seconds) with p50/p95/max."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_SECONDS):
+        self.buckets = tuple(buckets)
+        self._samples: List[float] = []
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(max(0.0, seconds))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._samples)
+        counts = {f"<={bound}s": 0 for bound in self.buckets}
+        counts[f">{self.buckets[-1]}s"] = 0
+        for value in samples:
+            for bound in self.buckets:
+                if value <= bound:
+                    counts[f"<={bound}s"] += 1
+                    break
+            else:
+                counts[f">{self.buckets[-1]}s"] += 1
+        return {
+            "count": len(samples),
+            "buckets": counts,
+            "p50_seconds": percentile(samples, 50),
+            "p95_seconds": percentile(samples, 95),
+            "max_seconds": round(max(samples), 3) if samples else None,
+        }
+
+
+class FormulaRefreshScheduler:
+    """
+    Formula refresh for many trade dates, scheduled as a small DAG.
+
+    Trade dates are cut into batches of FORMULA_REFRESH_BATCH_DATES; each
+    batch becomes two nodes, one request each:
+
+    * ``independent`` -- every formula except ``ROLLING_FORMULAS``. Reads
+      only that date's PR data, so these batches run concurrently.
+    * ``rolling`` -- FTD then Buy Day. Batch *i* waits for rolling batch
+      *i-1* and for the independent batches covering all of its dates.
+
+    At most ``concurrency`` requests are in flight (shared with every other
+    formula call through the Node-facing slots). Dates whose independent
+    formulas failed are not sent to the rolling phase.
+    """
+
+    def __init__(
+        self,
+        trigger_source: str,
+        context: Optional[Any] = None,
+        concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        trigger: Optional[Callable[..., Dict[str, Any]]] = None,
+    ):
+        self.trigger_source = trigger_source
+        self.context = context
+        self.concurrency = concurrency or formula_refresh_concurrency()
+        self.batch_size = batch_size or _formula_batch_dates()
+        self.trigger = trigger or trigger_backend_formula_refresh
+        self.latency = {
+            "independent": LatencyHistogram(),
+            "rolling": LatencyHistogram(),
+            "per_date": LatencyHistogram(),
+        }
+        self._job_meta: Dict[str, Any] = {}
+        if context is not None:
+            self._job_meta = {
+                "log_id": getattr(context, "log_id", None),
+                "job_name": getattr(context, "job_name", None),
+                "job_group": getattr(context, "job_group", None),
+            }
+
+    # -----------------------------------------------------
+    # GRAPH
+    # -----------------------------------------------------
+    def _nodes(self, dates: List[str]) -> List[Dict[str, Any]]:
+        batches = [dates[i:i + self.batch_size] for i in range(0, len(dates), self.batch_size)]
+        nodes = [
+            {"key": ("independent", i), "phase": "independent", "dates": batch, "deps": set()}
+            for i, batch in enumerate(batches)
+        ]
+        for i, batch in enumerate(batches):
+            deps = {("independent", j) for j in range(i + 1)}
+            if i:
+                deps.add(("rolling", i - 1))
+            nodes.append({"key": ("rolling", i), "phase": "rolling", "dates": batch, "deps": deps})
+        return nodes
+
+    # -----------------------------------------------------
+    # EXECUTION
+    # -----------------------------------------------------
+    def _run_node(self, node: Dict[str, Any], per_date: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        dates = node["dates"]
+        if node["phase"] == "rolling":
+            node["skipped"] = [d for d in dates if not per_date[d]["phases"]["independent"]["success"]]
+            dates = node["dates"] = [d for d in dates if d not in node["skipped"]]
+            if not dates:
+                return {"success": False, "skipped": True}
+            scope = {"formulas": list(ROLLING_FORMULAS)}
+        else:
+            scope = {"exclude_formulas": list(ROLLING_FORMULAS)}
+
+        return self.trigger(
+            self.trigger_source,
+            trade_dates=dates,
+            job_meta={**self._job_meta, "formula_phase": node["phase"], "trade_dates": dates},
+            **scope,
+        )
+
+    def _record(self, node: Dict[str, Any], outcome: Dict[str, Any], per_date: Dict[str, Dict[str, Any]]):
+        phase = node["phase"]
+        by_date = {}
+        body = outcome.get("response")
+        if isinstance(body, dict):
+            by_date = {item.get("trade_date"): item for item in body.get("results") or []}
+        request_seconds = outcome.get("duration_seconds") or 0.0
+
+        for trade_date in node["dates"]:
+            item = by_date.get(trade_date)
+            if item is not None:
+                seconds = round((item.get("duration_ms") or 0) / 1000, 3)
+                entry = {"success": bool(item.get("success")), "duration_seconds": seconds}
+                if item.get("error"):
+                    entry["error"] = item["error"]
+            else:
+                seconds = round(request_seconds / max(1, len(node["dates"])), 3)
+                entry = {"success": bool(outcome.get("success")), "duration_seconds": seconds}
+                error = outcome.get("error") or (None if outcome.get("success") else outcome.get("response"))
+                if error:
+                    entry["error"] = error
+            entry["batch_size"] = len(node["dates"])
+            per_date[trade_date]["phases"][phase] = entry
+            self.latency[phase].observe(entry["duration_seconds"])
+
+        for trade_date in node.get("skipped", []):
+            per_date[trade_date]["phases"][phase] = {
+                "success": False,
+                "skipped": True,
+                "error": "independent formulas failed",
+            }
+
+    def _flush(self, done_dates: int, total: int, phase: str, dates: List[str]):
+        if self.context is not None and hasattr(self.context, "flush_progress"):
+            self.context.flush_progress(
+                phase="running_formulas",
+                formula_phase=phase,
+                trade_dates=dates,
+                trade_date=dates[-1] if dates else None,
+                formula_index=done_dates,
+                formula_total=total,
+            )
+
+    def run(self, trade_dates: Iterable[str]) -> Dict[str, Any]:
+        dates = sorted(set(trade_dates))
+        per_date: Dict[str, Dict[str, Any]] = {d: {"trade_date": d, "phases": {}} for d in dates}
+        nodes = self._nodes(dates)
+        pending = {node["key"]: node for node in nodes}
+        done = set()
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="formula-sched") as pool:
+            running: Dict[Any, Dict[str, Any]] = {}
+            while pending or running:
+                ready = [n for n in pending.values() if n["deps"] <= done]
+                # Keep the serial rolling chain moving ahead of more independent work
+                ready.sort(key=lambda n: (n["phase"] != "rolling", n["key"][1]))
+                for node in ready[: max(0, self.concurrency - len(running))]:
+                    del pending[node["key"]]
+                    running[pool.submit(self._run_node, node, per_date)] = node
+                if not running:
+                    break
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as exc:
+                        logger.exception("Formula %s batch %s failed", node["phase"], node["dates"])
+                        outcome = {"success": False, "error": str(exc)}
+                    self._record(node, outcome, per_date)
+                    done.add(node["key"])
+                    finished_dates = sum(1 for s in per_date.values() if "rolling" in s["phases"])
+                    self._flush(finished_dates, len(dates), node["phase"], node["dates"])
+
+        results = []
+        for trade_date in dates:
+            state = per_date[trade_date]
+            phases = state["phases"]
+            state["success"] = bool(phases) and all(p.get("success") for p in phases.values())
+            state["duration_seconds"] = round(sum(p.get("duration_seconds") or 0 for p in phases.values()), 3)
+            errors = [p["error"] for p in phases.values() if p.get("error")]
+            if errors:
+                state["error"] = errors[0]
+            self.latency["per_date"].observe(state["duration_seconds"])
+            results.append(state)
+
+        return {
+            "results": results,
+            "schedule": {
+                "dates": len(dates),
+                "requests": len(nodes),
+                "batch_size": self.batch_size,
+                "concurrency": self.concurrency,
+                "duration_seconds": round(time.perf_counter() - started, 3),
+                "latency": {name: hist.snapshot() for name, hist in self.latency.items()},
+            },
+        }
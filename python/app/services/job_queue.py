@@ -0,0 +1,369 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import config, optional_env_int
+from app.utils.blocking import percentile
+
+logger = logging.getLogger(__name__)
+
+# Worker threads per lane (override: BACKGROUND_JOBS_<LANE>_WORKERS)
+DEFAULT_LANE_WORKERS = {
+    "bhavcopy": 1,
+    "formula": 1,
+}
+_METRIC_WINDOW = 256
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS background_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_type TEXT NOT NULL,
+    lane TEXT NOT NULL,
+    label TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL,
+    args TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDING',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_background_jobs_lane_status ON background_jobs (lane, status, id);
+CREATE INDEX IF NOT EXISTS idx_background_jobs_dedupe ON background_jobs (dedupe_key, status);
+"""
+
+
+def _emit(event_type: str, **payload: Any):
+    from app.services.manual_job_hub import manual_job_hub
+
+    manual_job_hub.emit(event_type, **payload)
+
+
+class DurableJobQueue:
+    """
+    SQLite-backed queue for manual/background work (BACKGROUND_JOB_DB).
+
+    Job types are registered with a handler and a lane; each lane drains
+    with its own bounded set of worker threads, so ten clicks on
+    "fetch range" queue behind one worker instead of racing each other.
+    Enqueueing a job whose type and arguments match one that is still
+    PENDING returns the existing job. Jobs left RUNNING by a crash or
+    restart go back to PENDING on ``start`` until BACKGROUND_JOB_MAX_ATTEMPTS
+    is reached, so handlers must be safe to re-run (the bhavcopy and
+    formula jobs skip work already in the DB).
+    """
+
+    def __init__(self, path: Optional[str] = None, poll_interval: float = 1.0):
+        self._path = path
+        self.poll_interval = poll_interval
+        self._handlers: Dict[str, Dict[str, Any]] = {}
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._schema_ready = False
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------
+    # STORAGE
+    # -----------------------------------------------------
+    @property
+    def path(self) -> str:
+        return self._path or config.BACKGROUND_JOB_DB
+
+    def _connect(self) -> sqlite3.Connection:
+        with self._lock:
+            if not self._schema_ready:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30)
+                try:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA_SQL)
+                finally:
+                    conn.close()
+                self._schema_ready = True
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["args"] = json.loads(job["args"])
+        job.pop("dedupe_key", None)
+        return job
+
+    # -----------------------------------------------------
+    # REGISTRY
+    # -----------------------------------------------------
+    def register(self, job_type: str, handler: Callable, lane: str = "default", max_attempts: Optional[int] = None):
+        self._handlers[job_type] = {
+            "fn": handler,
+            "lane": lane,
+            "max_attempts": max_attempts or optional_env_int("BACKGROUND_JOB_MAX_ATTEMPTS", 3, minimum=1),
+        }
+
+    def workers_for(self, lane: str) -> int:
+        return optional_env_int(f"BACKGROUND_JOBS_{lane.upper()}_WORKERS", DEFAULT_LANE_WORKERS.get(lane, 1), minimum=1)
+
+    def lanes(self) -> List[str]:
+        return sorted({h["lane"] for h in self._handlers.values()})
+
+    # -----------------------------------------------------
+    # PRODUCER
+    # -----------------------------------------------------
+    def enqueue(self, job_type: str, *args: Any, label: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Persist a job and wake its lane. Returns ``id``, ``status``,
+        ``position`` (among pending jobs of the lane) and ``deduplicated``.
+        """
+        handler = self._handlers.get(job_type)
+        if handler is None:
+            raise ValueError(f"Unknown background job type: {job_type}")
+        args_json = json.dumps(list(args), sort_keys=True, default=str)
+        dedupe_key = f"{job_type}:{args_json}"
+        lane = handler["lane"]
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM background_jobs WHERE dedupe_key = ? AND status = 'PENDING' ORDER BY id LIMIT 1",
+                (dedupe_key,),
+            ).fetchone()
+            deduplicated = row is not None
+            if deduplicated:
+                job_id = row["id"]
+            else:
+                job_id = conn.execute(
+                    """
+                    INSERT INTO background_jobs (job_type, lane, label, dedupe_key, args, enqueued_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (job_type, lane, label or job_type, dedupe_key, args_json, time.time()),
+                ).lastrowid
+            position = conn.execute(
+                "SELECT COUNT(*) FROM background_jobs WHERE lane = ? AND status = 'PENDING' AND id <= ?",
+                (lane, job_id),
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        if not deduplicated:
+            with self._wakeup:
+                self._wakeup.notify_all()
+            _emit(
+                "job_queued",
+                message=f"Queued {label or job_type} (position {position} in {lane})",
+                job_label=label or job_type,
+                queue_job_id=job_id,
+                queue_position=position,
+            )
+        return {
+            "id": job_id,
+            "job_type": job_type,
+            "lane": lane,
+            "status": "PENDING",
+            "position": position,
+            "deduplicated": deduplicated,
+        }
+
+    # -----------------------------------------------------
+    # CONSUMERS
+    # -----------------------------------------------------
+    def _claim(self, lane: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM background_jobs WHERE lane = ? AND status = 'PENDING' ORDER BY id LIMIT 1",
+                (lane,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE background_jobs SET status = 'RUNNING', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (time.time(), row["id"]),
+                )
+            conn.execute("COMMIT")
+            return self._row(row)
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _finish(self, job_id: int, status: str, error: Optional[str] = None):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE background_jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                (status, time.time(), error, job_id),
+            )
+        finally:
+            conn.close()
+
+    def run_job(self, job: Dict[str, Any]):
+        handler = self._handlers.get(job["job_type"])
+        if handler is None:
+            self._finish(job["id"], "FAILED", f"No handler registered for {job['job_type']}")
+            return
+        try:
+            handler["fn"](*job["args"])
+            self._finish(job["id"], "SUCCESS")
+        except Exception as exc:
+            logger.exception("Background %s failed", job["label"])
+            self._finish(job["id"], "FAILED", str(exc))
+            _emit("job_failed", message=str(exc), job_label=job["label"], status="FAILED")
+
+    def _worker(self, lane: str):
+        while not self._stop.is_set():
+            try:
+                job = self._claim(lane)
+            except Exception as exc:
+                logger.error(f"❌ Background queue claim failed ({lane}): {exc}")
+                job = None
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            self.run_job(job)
+
+    # -----------------------------------------------------
+    # LIFECYCLE
+    # -----------------------------------------------------
+    def recover(self) -> Dict[str, int]:
+        """Requeue jobs a previous process left RUNNING (or fail them once out of attempts)."""
+        requeued = failed = 0
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT id, job_type, attempts FROM background_jobs WHERE status = 'RUNNING'").fetchall()
+            for row in rows:
+                handler = self._handlers.get(row["job_type"])
+                max_attempts = handler["max_attempts"] if handler else 1
+                if row["attempts"] >= max_attempts:
+                    conn.execute(
+                        "UPDATE background_jobs SET status = 'FAILED', finished_at = ?, error = ? WHERE id = ?",
+                        (time.time(), "Interrupted by restart; no attempts left", row["id"]),
+                    )
+                    failed += 1
+                else:
+                    conn.execute("UPDATE background_jobs SET status = 'PENDING' WHERE id = ?", (row["id"],))
+                    requeued += 1
+            cutoff = time.time() - optional_env_int("BACKGROUND_JOB_RETENTION_DAYS", 14, minimum=1) * 86400
+            conn.execute(
+                "DELETE FROM background_jobs WHERE status IN ('SUCCESS', 'FAILED') AND finished_at < ?",
+                (cutoff,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        if requeued or failed:
+            logger.info(f"🔁 Background queue recovered {requeued} interrupted job(s), failed {failed}")
+        return {"requeued": requeued, "failed": failed}
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        try:
+            self.recover()
+        except Exception as exc:
+            logger.error(f"❌ Background job queue unavailable: {exc}")
+            return
+        for lane in self.lanes():
+            for index in range(self.workers_for(lane)):
+                thread = threading.Thread(
+                    target=self._worker, args=(lane,), name=f"jobs-{lane}-{index}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"✅ Background job queue started ({len(self._threads)} worker(s), {self.path})")
+
+    def stop(self):
+        """Stop claiming new jobs; a job mid-run stays RUNNING and resumes on next start."""
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        self._threads = []
+
+    # -----------------------------------------------------
+    # INSPECTION
+    # -----------------------------------------------------
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            return self._row(conn.execute("SELECT * FROM background_jobs WHERE id = ?", (job_id,)).fetchone())
+        finally:
+            conn.close()
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            if status:
+                rows = conn.execute(
+                    "SELECT * FROM background_jobs WHERE status = ? ORDER BY id DESC LIMIT ?",
+                    (status.upper(), limit),
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM background_jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+            return [self._row(row) for row in rows]
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            counts = conn.execute(
+                "SELECT lane, status, COUNT(*) AS n, MIN(enqueued_at) AS oldest FROM background_jobs GROUP BY lane, status"
+            ).fetchall()
+            recent = conn.execute(
+                """
+                SELECT lane, started_at - enqueued_at AS wait, finished_at - started_at AS run
+                FROM background_jobs WHERE started_at IS NOT NULL
+                ORDER BY id DESC LIMIT ?
+                """,
+                (_METRIC_WINDOW,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        lanes: Dict[str, Dict[str, Any]] = {
+            lane: {"workers": self.workers_for(lane), "by_status": {}, "oldest_pending_seconds": None}
+            for lane in self.lanes()
+        }
+        for row in counts:
+            lane = lanes.setdefault(
+                row["lane"], {"workers": self.workers_for(row["lane"]), "by_status": {}, "oldest_pending_seconds": None}
+            )
+            lane["by_status"][row["status"]] = row["n"]
+            if row["status"] == "PENDING":
+                lane["oldest_pending_seconds"] = round(now - row["oldest"], 1)
+        for name, lane in lanes.items():
+            waits = [r["wait"] for r in recent if r["lane"] == name and r["wait"] is not None]
+            runs = [r["run"] for r in recent if r["lane"] == name and r["run"] is not None]
+            lane["depth"] = lane["by_status"].get("PENDING", 0)
+            lane["wait_p50_seconds"] = percentile(waits, 50)
+            lane["wait_p99_seconds"] = percentile(waits, 99)
+            lane["run_p50_seconds"] = percentile(runs, 50)
+        return {"path": self.path, "running": bool(self._threads), "lanes": lanes}
+
+
+background_jobs = DurableJobQueue()
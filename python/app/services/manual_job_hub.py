@@ -1,34 +1,188 @@
 import asyncio
 import logging
+import time
+from collections import deque
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, Set
+from typing import Any, Deque, Dict, Optional, Set, Tuple
 
 from fastapi import WebSocket
 
+from app.config import optional_env_int, optional_env_float
 from app.services.cron_logger_service import _json_safe
+from app.utils.blocking import percentile
 
 logger = logging.getLogger(__name__)
 
+# Events that only report "where a job is now": a newer one replaces a queued older one
+COALESCE_EVENT_TYPES = {"job_progress"}
+_LAG_WINDOW = 256
+
+
+def _coalesce_key(event: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+    if event.get("type") not in COALESCE_EVENT_TYPES:
+        return None
+    return (event.get("type"), event.get("job_name"), event.get("log_id"))
+
+
+class _ClientChannel:
+    """
+    Outbound queue + sender task for one WebSocket.
+
+    The queue is bounded: progress events coalesce per job, anything else
+    that overflows drops the oldest queued event. The sender wakes, waits
+    ``batch_interval`` to gather a burst and ships up to ``max_batch``
+    events in one frame, so a slow client only ever delays itself.
+    """
+
+    def __init__(self, websocket: WebSocket, hub: "ManualJobHub"):
+        self.websocket = websocket
+        self.hub = hub
+        self.queue: Deque[Tuple[float, Dict[str, Any]]] = deque()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.lag_seconds: Deque[float] = deque(maxlen=_LAG_WINDOW)
+        self.stats = {
+            "frames": 0,
+            "events": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "send_failures": 0,
+        }
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+    def put(self, event: Dict[str, Any]):
+        key = _coalesce_key(event)
+        if key is not None:
+            for index, (_, queued) in enumerate(self.queue):
+                if _coalesce_key(queued) == key:
+                    # Keep the original enqueue time so lag reflects the oldest wait
+                    self.queue[index] = (self.queue[index][0], event)
+                    self.stats["coalesced"] += 1
+                    return
+        if len(self.queue) >= self.hub.queue_size:
+            self.queue.popleft()
+            self.stats["dropped"] += 1
+        self.queue.append((time.perf_counter(), event))
+        self.wakeup.set()
+
+    def _frame(self, batch) -> Dict[str, Any]:
+        if len(batch) == 1:
+            return batch[0][1]
+        return {
+            "type": "batch",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "count": len(batch),
+            "events": [event for _, event in batch],
+        }
+
+    async def _run(self):
+        while True:
+            await self.wakeup.wait()
+            if self.hub.batch_interval:
+                await asyncio.sleep(self.hub.batch_interval)
+            self.wakeup.clear()
+            while self.queue:
+                count = min(len(self.queue), self.hub.max_batch)
+                batch = [self.queue.popleft() for _ in range(count)]
+                try:
+                    await asyncio.wait_for(
+                        self.websocket.send_json(self._frame(batch)),
+                        timeout=self.hub.send_timeout,
+                    )
+                except Exception as exc:
+                    self.stats["send_failures"] += 1
+                    logger.info(f"ManualJobHub: dropping client after failed send: {exc!r}")
+                    # disconnect() cancels this task, so the close runs on its own
+                    self.hub.disconnect(self.websocket)
+                    self.hub._close_later(self.websocket)
+                    return
+                self.lag_seconds.append(time.perf_counter() - batch[0][0])
+                self.stats["frames"] += 1
+                self.stats["events"] += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        lags = list(self.lag_seconds)
+        return {
+            **self.stats,
+            "queued": len(self.queue),
+            "lag_p50_seconds": percentile(lags, 50),
+            "lag_p99_seconds": percentile(lags, 99),
+            "lag_max_seconds": round(max(lags), 4) if lags else None,
+        }
+
 
 class ManualJobHub:
-    """Broadcast manual cron job progress to connected WebSocket clients."""
+    """
+    Broadcast manual cron job progress to connected WebSocket clients.
+
+    ``emit`` is callable from any thread; it hands the event to the loop
+    once and the loop fans it out into every client's bounded channel
+    (MANUAL_JOB_WS_QUEUE_SIZE). Each client sends on its own task, in
+    frames of up to MANUAL_JOB_WS_MAX_BATCH events gathered over
+    MANUAL_JOB_WS_BATCH_MS. A frame holding several events is
+    ``{"type": "batch", "events": [...]}``; single events go out as-is.
+    """
 
-    def __init__(self):
-        self._connections: Set[WebSocket] = set()
+    def __init__(
+        self,
+        queue_size: Optional[int] = None,
+        batch_interval: Optional[float] = None,
+        max_batch: Optional[int] = None,
+        send_timeout: Optional[float] = None,
+    ):
+        self._connections: Dict[WebSocket, _ClientChannel] = {}
+        self._closing: Set[asyncio.Task] = set()
         self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue_size = queue_size or optional_env_int("MANUAL_JOB_WS_QUEUE_SIZE", 256, minimum=1)
+        self.batch_interval = (
+            batch_interval if batch_interval is not None
+            else optional_env_float("MANUAL_JOB_WS_BATCH_MS", 100) / 1000
+        )
+        self.max_batch = max_batch or optional_env_int("MANUAL_JOB_WS_MAX_BATCH", 50, minimum=1)
+        self.send_timeout = send_timeout or optional_env_float("MANUAL_JOB_WS_SEND_TIMEOUT", 5.0) or 5.0
+        self._stats = {"emitted": 0, "skipped_no_loop": 0, "disconnected": 0}
 
     def set_loop(self, loop: asyncio.AbstractEventLoop) -> None:
         self._loop = loop
 
     async def connect(self, websocket: WebSocket) -> None:
         await websocket.accept()
-        self._connections.add(websocket)
         await websocket.send_json(
             self._wrap("connected", {"message": "subscribed to manual job updates"})
         )
+        channel = _ClientChannel(websocket, self)
+        self._connections[websocket] = channel
+        channel.start()
 
     def disconnect(self, websocket: WebSocket) -> None:
-        self._connections.discard(websocket)
+        channel = self._connections.pop(websocket, None)
+        if channel is not None:
+            channel.stop()
+            self._stats["disconnected"] += 1
+
+    async def _close(self, websocket: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(websocket.close(code=1011), timeout=self.send_timeout)
+        except Exception as exc:
+            logger.debug(f"ManualJobHub: close after failed send also failed: {exc!r}")
+
+    def _close_later(self, websocket: WebSocket) -> None:
+        """Close a dropped client's socket so the browser notices and reconnects."""
+        task = asyncio.get_running_loop().create_task(self._close(websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def reply(self, websocket: WebSocket, payload: Dict[str, Any]) -> None:
+        """Queue a frame for one client (e.g. pong) behind its pending events."""
+        channel = self._connections.get(websocket)
+        if channel is not None:
+            channel.put(payload)
 
     def _wrap(self, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         return {
@@ -37,21 +191,16 @@ class ManualJobHub:
             **_json_safe(payload),
         }
 
-    async def _broadcast(self, event: Dict[str, Any]) -> None:
-        dead = []
-        for ws in list(self._connections):
-            try:
-                await ws.send_json(event)
-            except Exception:
-                dead.append(ws)
-        for ws in dead:
-            self.disconnect(ws)
+    def _fanout(self, event: Dict[str, Any]) -> None:
+        for channel in list(self._connections.values()):
+            channel.put(event)
 
     def emit(self, event_type: str, **payload: Any) -> None:
         """Thread-safe broadcast from sync code (cron threads, requests.post, etc.)."""
         event = self._wrap(event_type, payload)
         loop = self._loop
         if loop is None or not loop.is_running():
+            self._stats["skipped_no_loop"] += 1
             logger.warning(
                 "ManualJobHub: no event loop — skipped %s (clients=%s)",
                 event_type,
@@ -60,7 +209,21 @@ class ManualJobHub:
             return
         if not self._connections:
             logger.debug("ManualJobHub: emit %s with 0 clients", event_type)
-        asyncio.run_coroutine_threadsafe(self._broadcast(event), loop)
+        self._stats["emitted"] += 1
+        loop.call_soon_threadsafe(self._fanout, event)
+
+    def stats(self) -> Dict[str, Any]:
+        clients = [channel.snapshot() for channel in list(self._connections.values())]
+        lag_p99 = [c["lag_p99_seconds"] for c in clients if c["lag_p99_seconds"] is not None]
+        return {
+            **self._stats,
+            "clients": len(clients),
+            "queue_size": self.queue_size,
+            "batch_interval_seconds": self.batch_interval,
+            "max_batch": self.max_batch,
+            "worst_lag_p99_seconds": max(lag_p99) if lag_p99 else None,
+            "per_client": clients,
+        }
 
 
 manual_job_hub = ManualJobHub()
@@ -0,0 +1,137 @@
+import logging
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.config import config, optional_env_int, optional_env_float
+from app.database.connection import db_manager
+from app.services.ohlcv_sync import history_records, long_ohlcv
+from app.utils.rate_limiter import TokenBucket
+from app.utils.yf_download import yf_download
+
+logger = logging.getLogger(__name__)
+
+MARKET_DATA_COLUMNS = ["symbol", "date", "open", "high", "low", "close", "volume"]
+
+MARKET_DATA_UPSERT_SQL = """
+INSERT INTO market_data (
+    symbol, date, open, high, low, close, volume
+) VALUES (%s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    open = VALUES(open),
+    high = VALUES(high),
+    low = VALUES(low),
+    close = VALUES(close),
+    volume = VALUES(volume)
+"""
+
+
+def market_data_frame(frame: Optional[pd.DataFrame], tickers: List[str], latest_only: bool = False) -> pd.DataFrame:
+    """
+    ``yf.download(group_by="ticker")`` frame -> ``market_data`` rows, one
+    per (symbol, date). Infinite prices become NULL; ``latest_only`` keeps
+    each symbol's newest bar.
+    """
+    long = long_ohlcv(frame, tickers)[MARKET_DATA_COLUMNS]
+    prices = ["open", "high", "low", "close"]
+    long[prices] = long[prices].apply(pd.to_numeric, errors="coerce").replace([np.inf, -np.inf], np.nan)
+    long = long.dropna(subset=["close"])
+    if latest_only:
+        long = long.sort_values(["symbol", "date"]).groupby("symbol", sort=False).tail(1)
+    return long.reset_index(drop=True)
+
+
+class MarketDataBackfill:
+    """
+    Bulk loader for ``market_data``.
+
+    * MARKET_BACKFILL_BATCH_SIZE tickers (default 200) per ``yf.download``,
+      calls paced by MARKET_BACKFILL_RATE_PER_SECOND.
+    * The MultiIndex frame is reshaped with one ``stack``. Rows are never
+      looked up one symbol at a time.
+    * Each batch is written with a single ``executemany`` upsert on one
+      pooled connection.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        download: Optional[Callable[..., pd.DataFrame]] = None,
+    ):
+        self.batch_size = batch_size or optional_env_int("MARKET_BACKFILL_BATCH_SIZE", 200, minimum=1)
+        self.download = download or yf_download
+        self.limiter = TokenBucket(rate=optional_env_float("MARKET_BACKFILL_RATE_PER_SECOND", 0.5, minimum=0.01))
+
+    def fetch(
+        self,
+        tickers: List[str],
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        period: str = "5d",
+        latest_only: bool = False,
+    ) -> pd.DataFrame:
+        """Download one batch; ``end`` is inclusive."""
+        window = {"period": period} if start is None else {
+            "start": start.isoformat(),
+            "end": ((end or date.today()) + timedelta(days=1)).isoformat(),
+        }
+        self.limiter.acquire()
+        frame = self.download(
+            tickers=tickers,
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            threads=True,
+            progress=False,
+            **window,
+        )
+        return market_data_frame(frame, tickers, latest_only=latest_only)
+
+    def run(
+        self,
+        symbols: List[str],
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        period: str = "5d",
+        latest_only: bool = False,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        stats = {"symbols": len(symbols), "batches": 0, "symbols_with_data": 0,
+                 "failed_batches": 0, "rows_saved": 0}
+
+        conn = db_manager.get_connection(config.DB_STOCK_MARKET)
+        cursor = conn.cursor()
+        try:
+            for i in range(0, len(symbols), self.batch_size):
+                batch = symbols[i:i + self.batch_size]
+                stats["batches"] += 1
+                try:
+                    rows = self.fetch(batch, start, end, period, latest_only)
+                except Exception as e:
+                    logger.error(f"❌ Backfill download failed for batch starting {batch[0]}: {e}")
+                    stats["failed_batches"] += 1
+                    continue
+
+                records = history_records(rows)
+                if records:
+                    cursor.executemany(MARKET_DATA_UPSERT_SQL, records)
+                    conn.commit()
+                with_data = int(rows["symbol"].nunique())
+                stats["rows_saved"] += len(records)
+                stats["symbols_with_data"] += with_data
+                logger.info(
+                    f"Backfill batch {stats['batches']}: {len(records)} rows for "
+                    f"{with_data}/{len(batch)} symbols"
+                )
+        finally:
+            cursor.close()
+            conn.close()
+
+        elapsed = time.perf_counter() - started
+        stats["duration_seconds"] = round(elapsed, 3)
+        stats["rows_per_second"] = round(stats["rows_saved"] / elapsed, 2) if elapsed > 0 else None
+        logger.info(f"🏁 Market data backfill finished: {stats}")
+        return stats
@@ -4,7 +4,8 @@ import random
 import logging
 from urllib.parse import quote
 from datetime import datetime
-import yfinance as yf
+
+from app.services.nse_quote_fetcher import NSE_HEADERS, nse_quote_fetcher
 
 logger = logging.getLogger(__name__)
 
@@ -116,22 +117,7 @@ class NseFetchService:
             random_tls_extension_order=True
         )
 
-        self.headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            "Accept": "application/json,text/plain,*/*",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Referer": "https://www.nseindia.com/",
-            "Connection": "keep-alive",
-            "Host": "www.nseindia.com",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-origin",
-        }
+        self.headers = dict(NSE_HEADERS)
 
         self._warm_up()
 
@@ -280,104 +266,9 @@ class NseFetchService:
         )
         return DEFAULT_QUOTE_SYMBOLS[:limit]
 
-    def get_fast_value(self, fast_info, *keys):
-        for key in keys:
-            try:
-                value = fast_info.get(key)
-            except Exception:
-                value = None
-            if value is not None:
-                return value
-        return None
-
-    def fetch_yfinance_quote(self, symbol):
-        yf_symbol = symbol if symbol.endswith((".NS", ".BO")) else f"{symbol}.NS"
-
-        try:
-            ticker = yf.Ticker(yf_symbol)
-            fast = ticker.fast_info
-
-            last_price = self.get_fast_value(fast, "lastPrice", "last_price")
-            previous_close = self.get_fast_value(
-                fast,
-                "previousClose",
-                "previous_close",
-            )
-
-            if last_price is None and previous_close is None:
-                return None
-
-            price_change = None
-            change_percent = None
-            if last_price is not None and previous_close:
-                price_change = last_price - previous_close
-                change_percent = (price_change / previous_close) * 100
-
-            return {
-                "symbol": symbol,
-                "source": "yfinance_fallback",
-                "lastPrice": last_price,
-                "previousClose": previous_close,
-                "change": price_change,
-                "pChange": change_percent,
-                "open": self.get_fast_value(fast, "open"),
-                "dayHigh": self.get_fast_value(fast, "dayHigh", "day_high"),
-                "dayLow": self.get_fast_value(fast, "dayLow", "day_low"),
-                "lastVolume": self.get_fast_value(
-                    fast,
-                    "lastVolume",
-                    "last_volume",
-                ),
-                "marketCap": self.get_fast_value(
-                    fast,
-                    "marketCap",
-                    "market_cap",
-                ),
-                "fetchedAt": datetime.now().isoformat(),
-            }
-        except Exception as exc:
-            logger.warning("YFinance quote fallback failed %s: %s", symbol, exc)
-            return None
-
     def fetch_quote_batch(self, symbols):
-        results = []
-
-        for sym in symbols:
-            try:
-                encoded_symbol = quote(sym, safe="")
-                quote_page = (
-                    "https://www.nseindia.com/get-quotes/equity"
-                    f"?symbol={encoded_symbol}"
-                )
-                url = f"https://www.nseindia.com/api/quote-equity?symbol={encoded_symbol}"
-
-                try:
-                    self.session.get(
-                        quote_page,
-                        headers=self.get_headers("https://www.nseindia.com/"),
-                        timeout_seconds=10,
-                    )
-                    time.sleep(random.uniform(0.3, 0.7))
-                except Exception as warmup_error:
-                    logger.warning(
-                        "Quote page warmup failed %s: %s",
-                        sym,
-                        warmup_error,
-                    )
-
-                data = self.safe_get(url, retries=2, referer=quote_page)
-                data["symbol"] = sym
-                results.append(data)
-            except Exception as e:
-                logger.warning("Quote failed %s: %s", sym, e)
-                fallback_quote = self.fetch_yfinance_quote(sym)
-                if fallback_quote:
-                    logger.info("Using yfinance fallback quote for %s", sym)
-                    results.append(fallback_quote)
-
-            time.sleep(random.uniform(0.8, 1.4))
-
-        return results
+        """Live quotes via the shared concurrent fetcher (see NseQuoteFetcher)."""
+        return nse_quote_fetcher.fetch(symbols)
 
     def fetch_live_quotes(self, limit=25):
         symbols = self.get_quote_symbols(limit)
@@ -0,0 +1,271 @@
+import logging
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote
+
+import pandas as pd
+import tls_client
+import yfinance as yf
+
+from app.config import optional_env_int, optional_env_float
+from app.services.nse_session import nse_rate_limiter
+from app.services.ohlcv_sync import long_ohlcv
+from app.utils.rate_limiter import HostRateLimiter
+from app.utils.yf_download import yf_download
+
+logger = logging.getLogger(__name__)
+
+NSE_BASE_URL = "https://www.nseindia.com"
+NSE_QUOTE_PAGE_URL = "https://www.nseindia.com/get-quotes/equity?symbol={}"
+NSE_QUOTE_API_URL = "https://www.nseindia.com/api/quote-equity?symbol={}"
+
+NSE_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "application/json,text/plain,*/*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Referer": "https://www.nseindia.com/",
+    "Connection": "keep-alive",
+    "Host": "www.nseindia.com",
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin",
+}
+
+
+def new_tls_session():
+    return tls_client.Session(
+        client_identifier=random.choice([
+            "chrome_120",
+            "chrome_119",
+            "chrome_118"
+        ]),
+        random_tls_extension_order=True
+    )
+
+
+def fast_info_market_cap(yf_symbol: str) -> Optional[float]:
+    """Market cap from ``Ticker.fast_info``; None when Yahoo has none."""
+    try:
+        fast = yf.Ticker(yf_symbol).fast_info
+        for key in ("marketCap", "market_cap"):
+            value = fast.get(key)
+            if value is not None:
+                return value
+    except Exception as exc:
+        logger.warning("YFinance market cap lookup failed %s: %s", yf_symbol, exc)
+    return None
+
+
+def nse_headers(referer: Optional[str] = None) -> Dict[str, str]:
+    headers = dict(NSE_HEADERS)
+    if referer:
+        headers["Referer"] = referer
+    return headers
+
+
+class _QuoteSession:
+    """One tls_client session and when its home + quote-page cookies were fetched."""
+
+    def __init__(self, session):
+        self.session = session
+        self.warmed_at: Optional[float] = None
+
+
+class NseQuoteFetcher:
+    """
+    Live NSE equity quotes with bounded concurrency.
+
+    * NSE_QUOTE_WORKERS ``tls_client`` sessions (default 4), each used by
+      one worker at a time. A session visits the home page and one quote
+      page once, then reuses those cookies for NSE_QUOTE_WARM_TTL_SECONDS
+      (default 600) or until NSE answers 401/403.
+    * Every request, warmups included, passes ``nse_rate_limiter``, the
+      nseindia.com token bucket shared with ``NseSession``, instead of
+      fixed sleeps.
+    * Symbols NSE does not answer for are priced from one batched
+      ``yf.download`` call; only their market caps are looked up per
+      symbol (``fast_info``), in parallel.
+
+    The pool is process-wide, so warm sessions outlive the per-request
+    ``NseFetchService`` instances.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        session_factory: Optional[Callable[[], Any]] = None,
+        limiter: Optional[HostRateLimiter] = None,
+        download: Optional[Callable[..., pd.DataFrame]] = None,
+        market_cap: Optional[Callable[[str], Optional[float]]] = None,
+    ):
+        self.workers = workers or optional_env_int("NSE_QUOTE_WORKERS", 4, minimum=1)
+        self.session_factory = session_factory or new_tls_session
+        self.limiter = limiter or nse_rate_limiter
+        self.download = download or yf_download
+        self.market_cap = market_cap or fast_info_market_cap
+        self.retries = optional_env_int("NSE_QUOTE_RETRIES", 2, minimum=1)
+        self.retry_backoff = optional_env_float("NSE_QUOTE_RETRY_BACKOFF_SECONDS", 1.0)
+        self.warm_ttl = optional_env_float("NSE_QUOTE_WARM_TTL_SECONDS", 600)
+        self._sessions: "queue.Queue[_QuoteSession]" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._stats = {"warmups": 0, "requests": 0, "nse_quotes": 0, "fallback_quotes": 0, "failed": 0}
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+
+    @contextmanager
+    def _borrow(self):
+        try:
+            slot = self._sessions.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.workers
+                if create:
+                    self._created += 1
+            slot = _QuoteSession(self.session_factory()) if create else self._sessions.get()
+        try:
+            yield slot
+        finally:
+            self._sessions.put(slot)
+
+    def _get(self, slot: _QuoteSession, url: str, referer: Optional[str] = None, timeout: int = 15):
+        self.limiter.acquire(url)
+        self._count("requests")
+        return slot.session.get(url, headers=nse_headers(referer), timeout_seconds=timeout)
+
+    def _warm(self, slot: _QuoteSession, symbol: str):
+        if slot.warmed_at is not None and time.monotonic() - slot.warmed_at < self.warm_ttl:
+            return
+        quote_page = NSE_QUOTE_PAGE_URL.format(quote(symbol, safe=""))
+        try:
+            self._get(slot, NSE_BASE_URL, timeout=10)
+            self._get(slot, quote_page, referer=f"{NSE_BASE_URL}/", timeout=10)
+            slot.warmed_at = time.monotonic()
+            self._count("warmups")
+        except Exception as exc:
+            logger.warning("[NSE] quote session warmup failed: %s", exc)
+
+    def fetch_one(self, symbol: str) -> Optional[Dict[str, Any]]:
+        encoded = quote(symbol, safe="")
+        url = NSE_QUOTE_API_URL.format(encoded)
+        referer = NSE_QUOTE_PAGE_URL.format(encoded)
+
+        with self._borrow() as slot:
+            for attempt in range(self.retries):
+                self._warm(slot, symbol)
+                try:
+                    res = self._get(slot, url, referer=referer)
+                    if res.status_code == 200:
+                        data = res.json()
+                        data["symbol"] = symbol
+                        return data
+                    if res.status_code in (401, 403):
+                        slot.warmed_at = None
+                    logger.info("[NSE] %s -> %s", res.status_code, url)
+                except Exception as exc:
+                    logger.warning("[NSE] quote request failed (%s/%s) %s: %s",
+                                   attempt + 1, self.retries, symbol, exc)
+                if attempt + 1 < self.retries:
+                    time.sleep(self.retry_backoff * (attempt + 1))
+        return None
+
+    def fallback_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Quotes for ``symbols`` from a single ``yf.download`` call plus per-symbol market caps."""
+        if not symbols:
+            return {}
+        yf_symbols = {
+            (s if s.endswith((".NS", ".BO")) else f"{s}.NS"): s for s in symbols
+        }
+        try:
+            frame = self.download(
+                tickers=list(yf_symbols),
+                period="5d",
+                interval="1d",
+                group_by="ticker",
+                auto_adjust=False,
+                threads=True,
+                progress=False,
+            )
+        except Exception as exc:
+            logger.warning("YFinance quote fallback failed for %s symbols: %s", len(symbols), exc)
+            return {}
+
+        quotes = {}
+        priced = []
+        fetched_at = datetime.now().isoformat()
+        for yf_symbol, rows in long_ohlcv(frame, list(yf_symbols)).groupby("symbol", sort=False):
+            last = rows.iloc[-1]
+            previous_close = float(rows["close"].iloc[-2]) if len(rows) > 1 else None
+            last_price = float(last["close"])
+            change = last_price - previous_close if previous_close else None
+            symbol = yf_symbols[yf_symbol]
+            priced.append(yf_symbol)
+            quotes[symbol] = {
+                "symbol": symbol,
+                "source": "yfinance_fallback",
+                "lastPrice": last_price,
+                "previousClose": previous_close,
+                "change": change,
+                "pChange": (change / previous_close) * 100 if change is not None else None,
+                "open": None if pd.isna(last["open"]) else float(last["open"]),
+                "dayHigh": None if pd.isna(last["high"]) else float(last["high"]),
+                "dayLow": None if pd.isna(last["low"]) else float(last["low"]),
+                "lastVolume": None if pd.isna(last["volume"]) else int(last["volume"]),
+                "marketCap": None,
+                "fetchedAt": fetched_at,
+            }
+
+        if priced:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(priced)),
+                                    thread_name_prefix="yf-market-cap") as pool:
+                for yf_symbol, market_cap in zip(priced, pool.map(self.market_cap, priced)):
+                    quotes[yf_symbols[yf_symbol]]["marketCap"] = market_cap
+        return quotes
+
+    def fetch(self, symbols: List[str]) -> List[Dict[str, Any]]:
+        """Quotes in ``symbols`` order; symbols neither source could price are left out."""
+        if not symbols:
+            return []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(symbols)),
+                                thread_name_prefix="nse-quote") as pool:
+            results = list(pool.map(self.fetch_one, symbols))
+
+        missing = [s for s, r in zip(symbols, results) if r is None]
+        if missing:
+            logger.warning("Quote failed for %s symbols; using one yfinance fallback call", len(missing))
+            fallback = self.fallback_quotes(missing)
+            results = [r if r is not None else fallback.get(s) for s, r in zip(symbols, results)]
+            self._count("fallback_quotes", len(fallback))
+            self._count("failed", len(missing) - len(fallback))
+        self._count("nse_quotes", len(symbols) - len(missing))
+
+        logger.info(
+            "[NSE] %s quotes in %.1fs (%s missed by NSE, %s unpriced)",
+            len(symbols), time.perf_counter() - started, len(missing),
+            sum(1 for r in results if r is None),
+        )
+        return [r for r in results if r is not None]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["sessions"] = self._created
+        stats["rate_limits"] = self.limiter.stats()
+        return stats
+
+
+nse_quote_fetcher = NseQuoteFetcher()
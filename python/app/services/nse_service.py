@@ -7,6 +7,7 @@ from typing import Dict, Any
 
 from app.config import config
 from app.database.connection import db_manager
+from app.services.ohlcv_sync import OhlcvIncrementalSync, clean_symbol, symbol_formats
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +20,11 @@ class NSEService:
     All errors handled
     """
 
+    def __init__(self):
+        # listed symbol -> Yahoo spelling that returned data (yf_symbol_formats)
+        self._symbol_formats: Dict[str, str] = {}
+        self._formats_loaded = False
+
     # ----------------------------------------------------
     # TABLE SAFETY
     # ----------------------------------------------------
@@ -49,6 +55,16 @@ class NSEService:
                 )
             """)
 
+            # Yahoo symbol spelling that worked, per listed company
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS yf_symbol_formats (
+                    symbol VARCHAR(20) PRIMARY KEY,
+                    yf_symbol VARCHAR(24) NOT NULL,
+                    resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        ON UPDATE CURRENT_TIMESTAMP
+                )
+            """)
+
             # Failed symbols table
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS failed_symbols (
@@ -70,21 +86,78 @@ class NSEService:
             if conn:
                 conn.close()
 
+    # ----------------------------------------------------
+    # SYMBOL FORMAT CACHE
+    # ----------------------------------------------------
+    def load_symbol_formats(self) -> Dict[str, str]:
+        """
+        Resolved Yahoo symbol per listed company, read once per process
+        """
+        if self._formats_loaded:
+            return self._symbol_formats
+
+        conn = None
+        cur = None
+        try:
+            conn = db_manager.get_connection(config.DB_STOCK_MARKET)
+            cur = conn.cursor(pymysql.cursors.DictCursor)
+            cur.execute("SELECT symbol, yf_symbol FROM yf_symbol_formats")
+            self._symbol_formats.update({r["symbol"]: r["yf_symbol"] for r in cur.fetchall()})
+            self._formats_loaded = True
+        except Exception as e:
+            logger.error(f"❌ Failed to load symbol formats: {e}", exc_info=True)
+        finally:
+            if cur:
+                cur.close()
+            if conn:
+                conn.close()
+
+        return self._symbol_formats
+
+    def save_symbol_formats(self, formats: Dict[str, str]):
+        """
+        Remember working Yahoo symbols (listed symbol -> yf symbol)
+        """
+        formats = {s: f for s, f in formats.items() if self._symbol_formats.get(s) != f}
+        if not formats:
+            return
+        self._symbol_formats.update(formats)
+
+        conn = None
+        cur = None
+        try:
+            conn = db_manager.get_connection(config.DB_STOCK_MARKET)
+            cur = conn.cursor()
+            cur.executemany(
+                """
+                INSERT INTO yf_symbol_formats (symbol, yf_symbol) VALUES (%s,%s)
+                ON DUPLICATE KEY UPDATE yf_symbol=VALUES(yf_symbol)
+                """,
+                list(formats.items())
+            )
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to save symbol formats: {e}", exc_info=True)
+        finally:
+            if cur:
+                cur.close()
+            if conn:
+                conn.close()
+
     # ----------------------------------------------------
     # CORE FETCH LOGIC
     # ----------------------------------------------------
     def fetch_symbol_with_retry(self, symbol: str, period: str) -> Dict[str, Any]:
         """
-        Try multiple NSE/BSE formats with retry
+        Try multiple NSE/BSE formats with retry, the cached working one first
         """
-        clean_symbol = symbol.upper().replace(".NS", "").replace(".BO", "")
+        clean = clean_symbol(symbol)
 
-        formats_to_try = [
-            clean_symbol,
-            f"{clean_symbol}.NS",
-            f"{clean_symbol}.BO",
-            f"{clean_symbol}.NSE"
-        ]
+        formats_to_try = symbol_formats(clean)
+        cached = self._symbol_formats.get(clean)
+        if cached in formats_to_try:
+            formats_to_try.remove(cached)
+            formats_to_try.insert(0, cached)
 
         for sym_format in formats_to_try:
             try:
@@ -93,6 +166,8 @@ class NSEService:
                 df = ticker.history(period=period)
 
                 if not df.empty:
+                    if sym_format != cached:
+                        self.save_symbol_formats({clean: sym_format})
                     return {
                         "status": "success",
                         "used_symbol": sym_format,
@@ -236,9 +311,13 @@ class NSEService:
     # ----------------------------------------------------
     # FETCH ALL LISTED SYMBOLS
     # ----------------------------------------------------
-    def fetch_all_listed(self, period="1y", limit=None):
+    def fetch_all_listed(self, period="1y", limit=None, incremental=True):
         """
         Fetch and save data for all listed companies
+
+        incremental: only download bars after each symbol's latest stored
+        date (see OhlcvIncrementalSync); False re-downloads the full period
+        one symbol at a time
         """
         self.ensure_tables_exist()
 
@@ -266,6 +345,10 @@ class NSEService:
             if conn:
                 conn.close()
 
+        if incremental:
+            stats = OhlcvIncrementalSync(self).run(symbols, period)
+            return {"status": "completed", **stats}
+
         success, failed = 0, 0
         logger.info(f"📊 Processing {len(symbols)} symbols")
 
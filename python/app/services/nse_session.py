@@ -0,0 +1,198 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import requests
+
+from app.config import optional_env_float, optional_env_int
+from app.utils.rate_limiter import HostRateLimiter
+
+logger = logging.getLogger(__name__)
+
+NSE_WARMUP_URLS = (
+    "https://www.nseindia.com/",
+    "https://www.nseindia.com/all-reports",
+)
+
+# Re-warm this many seconds before the earliest cookie actually expires
+_EXPIRY_MARGIN_SECONDS = 30
+
+
+def _cookie_ttl_seconds() -> int:
+    return optional_env_int("NSE_COOKIE_TTL_SECONDS", 600, minimum=30)
+
+
+def _warmup_pause_seconds() -> float:
+    return optional_env_float("NSE_WARMUP_PAUSE_SECONDS", 1.0)
+
+
+# NSE throttles per client, so every NseSession in the process shares one limiter
+nse_rate_limiter = HostRateLimiter(
+    rate=optional_env_float("NSE_RATE_PER_SECOND", 2.0, minimum=0.01),
+    burst=optional_env_float("NSE_RATE_BURST", 2.0, minimum=0.01),
+)
+
+
+class NseSession:
+    """
+    Warmed NSE cookies shared across downloads and worker threads.
+
+    The warmup pages are only hit when the session is cold, when the
+    cookie TTL (NSE_COOKIE_TTL_SECONDS, capped by the earliest cookie
+    ``expires``) has run out, or after NSE answers 401/403. Warmup runs on
+    ``self.session``; each worker thread downloads through its own
+    ``requests.Session`` seeded with the warmed cookies. Every request
+    passes the per-host token bucket first. Warmup and download time are
+    tracked separately.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        warmup_urls: Iterable[str] = NSE_WARMUP_URLS,
+        timeout: int = 30,
+        limiter: Optional[HostRateLimiter] = None,
+    ):
+        self.headers = dict(headers or {})
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.warmup_urls = tuple(warmup_urls)
+        self.timeout = timeout
+        self.limiter = limiter or nse_rate_limiter
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._generation = 0
+        self._expires_at: Optional[float] = None
+        self._stats = {
+            "warmups": 0,
+            "warmup_failures": 0,
+            "auth_rewarms": 0,
+            "warmup_seconds": 0.0,
+            "downloads": 0,
+            "download_seconds": 0.0,
+            "rate_wait_seconds": 0.0,
+        }
+
+    def _cookie_expiry(self, warmed_at: float) -> float:
+        expires_at = warmed_at + _cookie_ttl_seconds()
+        for cookie in self.session.cookies:
+            if cookie.expires and cookie.expires > warmed_at:
+                expires_at = min(expires_at, cookie.expires - _EXPIRY_MARGIN_SECONDS)
+        return max(expires_at, warmed_at + _EXPIRY_MARGIN_SECONDS)
+
+    def _thread_session(self) -> requests.Session:
+        """This thread's session, re-seeded with cookies after every warmup."""
+        local = self._local
+        if getattr(local, "session", None) is None:
+            local.session = requests.Session()
+            local.session.headers.update(self.headers)
+            local.generation = -1
+        if local.generation != self._generation:
+            with self._lock:
+                local.session.cookies.update(self.session.cookies)
+                local.generation = self._generation
+        return local.session
+
+    def _throttle(self, url: str):
+        waited = self.limiter.acquire(url)
+        if waited:
+            with self._lock:
+                self._stats["rate_wait_seconds"] += waited
+
+    def is_warm(self) -> bool:
+        return self._expires_at is not None and time.time() < self._expires_at
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = None
+
+    def ensure_warm(self, force: bool = False, stale_generation: Optional[int] = None) -> float:
+        """
+        Warm the session if needed; returns the seconds spent warming (0.0 on reuse).
+
+        ``stale_generation`` skips a forced re-warm when another thread has
+        already re-warmed since that generation was observed.
+        """
+        with self._lock:
+            if stale_generation is not None and stale_generation != self._generation and self.is_warm():
+                return 0.0
+            if not force and stale_generation is None and self.is_warm():
+                return 0.0
+
+            started = time.perf_counter()
+            try:
+                logger.info("🍪 Getting NSE cookies...")
+                for index, warmup_url in enumerate(self.warmup_urls):
+                    if index:
+                        time.sleep(_warmup_pause_seconds())
+                    self.limiter.acquire(warmup_url)
+                    self.session.get(warmup_url, timeout=self.timeout)
+                self._expires_at = self._cookie_expiry(time.time())
+                self._generation += 1
+                self._stats["warmups"] += 1
+            except requests.exceptions.RequestException as exc:
+                logger.error(f"Failed to get NSE cookies: {exc}")
+                self._expires_at = None
+                self._stats["warmup_failures"] += 1
+            elapsed = time.perf_counter() - started
+            self._stats["warmup_seconds"] += elapsed
+            return elapsed
+
+    def get(self, url: str, timings: Optional[Dict[str, float]] = None, **kwargs) -> requests.Response:
+        """
+        GET through the warmed cookies, re-warming once on 401/403.
+
+        ``timings`` (if given) receives ``warmup_seconds`` and
+        ``download_seconds`` for this call only.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        timings = timings if timings is not None else {}
+        warmup_seconds = self.ensure_warm()
+        download_seconds = 0.0
+
+        for attempt in range(2):
+            generation = self._generation
+            session = self._thread_session()
+            self._throttle(url)
+            started = time.perf_counter()
+            resp = session.get(url, **kwargs)
+            download_seconds += time.perf_counter() - started
+            if resp.status_code not in (401, 403) or attempt:
+                break
+            logger.warning(f"🍪 NSE answered {resp.status_code} for {url}, re-warming cookies")
+            resp.close()
+            with self._lock:
+                self._stats["auth_rewarms"] += 1
+            warmup_seconds += self.ensure_warm(stale_generation=generation)
+
+        with self._lock:
+            self._stats["downloads"] += 1
+            self._stats["download_seconds"] += download_seconds
+        timings["warmup_seconds"] = round(timings.get("warmup_seconds", 0.0) + warmup_seconds, 3)
+        timings["download_seconds"] = round(timings.get("download_seconds", 0.0) + download_seconds, 3)
+        return resp
+
+    def record_transfer(self, seconds: float, timings: Optional[Dict[str, float]] = None):
+        """Add body transfer time (streamed responses) to the download latency."""
+        with self._lock:
+            self._stats["download_seconds"] += seconds
+        if timings is not None:
+            timings["download_seconds"] = round(timings.get("download_seconds", 0.0) + seconds, 3)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            expires_at = self._expires_at
+        stats["warm"] = expires_at is not None and time.time() < expires_at
+        stats["expires_in_seconds"] = round(expires_at - time.time(), 1) if expires_at else None
+        stats["avg_warmup_seconds"] = (
+            round(stats["warmup_seconds"] / stats["warmups"], 3) if stats["warmups"] else None
+        )
+        stats["avg_download_seconds"] = (
+            round(stats["download_seconds"] / stats["downloads"], 3) if stats["downloads"] else None
+        )
+        for key in ("warmup_seconds", "download_seconds", "rate_wait_seconds"):
+            stats[key] = round(stats[key], 3)
+        stats["rate_limits"] = self.limiter.stats()
+        return stats
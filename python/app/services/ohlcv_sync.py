@@ -0,0 +1,259 @@
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pymysql
+
+from app.config import config, optional_env_int, optional_env_float
+from app.database.connection import db_manager
+from app.utils.rate_limiter import TokenBucket
+from app.utils.yf_download import yf_download
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume", "dividends", "stock_splits"]
+
+_YF_COLUMNS = {
+    "Date": "date",
+    "Datetime": "date",
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+    "Dividends": "dividends",
+    "Stock Splits": "stock_splits",
+}
+
+_HISTORY_UPSERT_SQL = """
+INSERT INTO all_companies_data
+(symbol, date, open, high, low, close, volume, dividends, stock_splits)
+VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+ON DUPLICATE KEY UPDATE
+    open=VALUES(open),
+    high=VALUES(high),
+    low=VALUES(low),
+    close=VALUES(close),
+    volume=VALUES(volume),
+    dividends=VALUES(dividends),
+    stock_splits=VALUES(stock_splits)
+"""
+
+
+def clean_symbol(symbol: str) -> str:
+    return symbol.upper().replace(".NS", "").replace(".BO", "")
+
+
+def symbol_formats(symbol: str) -> List[str]:
+    """Yahoo spellings tried for a listed symbol, in probe order."""
+    clean = clean_symbol(symbol)
+    return [clean, f"{clean}.NS", f"{clean}.BO", f"{clean}.NSE"]
+
+
+def long_ohlcv(frame: Optional[pd.DataFrame], tickers: List[str]) -> pd.DataFrame:
+    """
+    Reshape a ``yf.download(group_by="ticker")`` (or ``Ticker.history``)
+    frame into one row per (symbol, date) with the ``OHLCV_COLUMNS``.
+    A one-ticker frame comes back with flat columns. Rows without a close
+    are dropped.
+    """
+    if frame is None or frame.empty:
+        return pd.DataFrame(columns=["symbol", "date"] + OHLCV_COLUMNS)
+
+    if isinstance(frame.columns, pd.MultiIndex):
+        long = frame.stack(level=0)
+        long.index = long.index.set_names(["date", "symbol"])
+        long = long.reset_index()
+    else:
+        long = frame.rename_axis("date").reset_index()
+        long.insert(0, "symbol", tickers[0])
+
+    long = long.rename(columns=_YF_COLUMNS)
+    for column in OHLCV_COLUMNS:
+        if column not in long:
+            long[column] = None
+    long = long[long["symbol"].isin(tickers)].dropna(subset=["close"])
+    long["date"] = pd.to_datetime(long["date"]).dt.date
+    long["volume"] = pd.to_numeric(long["volume"], errors="coerce").round().astype("Int64")
+    return long[["symbol", "date"] + OHLCV_COLUMNS].reset_index(drop=True)
+
+
+def history_records(long: pd.DataFrame) -> List[tuple]:
+    """Long OHLCV frame -> executemany tuples, NaN/NA as NULL."""
+    values = long.astype(object)
+    values = values.where(long.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+def corporate_action_symbols(long: pd.DataFrame) -> List[str]:
+    """Symbols with a non-zero dividend or split in ``long``."""
+    actions = long[["dividends", "stock_splits"]].apply(pd.to_numeric, errors="coerce").fillna(0)
+    return list(dict.fromkeys(long.loc[(actions != 0).any(axis=1), "symbol"]))
+
+
+def sync_window(last: Optional[date], today: date) -> Tuple[str, Optional[date]]:
+    """
+    What to fetch for a symbol whose newest stored bar is ``last``:
+    ("full", None) with no history, ("current", None) when the gap up to
+    ``today`` holds no weekday, else ("gap", first missing day).
+    """
+    if last is None:
+        return "full", None
+    start = last + timedelta(days=1)
+    if start > today or pd.bdate_range(start, today).empty:
+        return "current", None
+    return "gap", start
+
+
+class OhlcvIncrementalSync:
+    """
+    Brings ``all_companies_data`` up to date without re-downloading bars
+    already stored.
+
+    * One grouped ``MAX(date)`` query finds the newest bar per symbol;
+      only the gap after it is requested.
+    * Symbols are downloaded YF_HISTORY_BATCH_SIZE at a time (default 100)
+      in multi-ticker ``yf.download`` calls, grouped by gap start and paced
+      by YF_HISTORY_RATE_PER_SECOND.
+    * Prices are split/dividend adjusted, so a dividend or split inside a
+      gap rescales every older bar. Those symbols are downloaded again for
+      the full period, which rewrites their stored history on the new basis.
+    * The Yahoo spelling that worked for a company (``TCS`` / ``TCS.NS`` /
+      ``TCS.BO``) is kept in ``yf_symbol_formats``. Symbols with stored
+      history resolve from it, so the serial format probe only runs for
+      companies seen for the first time.
+    """
+
+    def __init__(
+        self,
+        service,
+        batch_size: Optional[int] = None,
+        download: Optional[Callable[..., pd.DataFrame]] = None,
+        today: Optional[date] = None,
+    ):
+        self.service = service
+        self.batch_size = batch_size or optional_env_int("YF_HISTORY_BATCH_SIZE", 100, minimum=1)
+        self.download = download or yf_download
+        self.today = today or datetime.now().date()
+        self.limiter = TokenBucket(rate=optional_env_float("YF_HISTORY_RATE_PER_SECOND", 0.5, minimum=0.01))
+
+    def _download(self, tickers: List[str], period: str, start: Optional[date]) -> pd.DataFrame:
+        window = {"period": period} if start is None else {
+            "start": start.isoformat(),
+            "end": (self.today + timedelta(days=1)).isoformat(),
+        }
+        self.limiter.acquire()
+        return self.download(
+            tickers=tickers,
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=True,
+            actions=True,
+            threads=True,
+            progress=False,
+            **window,
+        )
+
+    def _plan(self, symbols: List[str], latest: Dict[str, date], formats: Dict[str, str], stats: Dict[str, Any]):
+        """Split symbols into download groups keyed by gap start (None = full period) and ones to probe."""
+        groups: Dict[Optional[date], List[str]] = {}
+        to_probe: List[str] = []
+        resolved: Dict[str, str] = {}
+
+        for symbol in symbols:
+            clean = clean_symbol(symbol)
+            yf_symbol = formats.get(clean)
+            if yf_symbol is None:
+                yf_symbol = next((s for s in symbol_formats(clean) if s in latest), None)
+                if yf_symbol is None:
+                    to_probe.append(clean)
+                    continue
+                resolved[clean] = yf_symbol
+
+            kind, start = sync_window(latest.get(yf_symbol), self.today)
+            stats[kind] += 1
+            if kind != "current":
+                groups.setdefault(start, []).append(yf_symbol)
+
+        return groups, to_probe, resolved
+
+    def _write(self, cursor, conn, long: pd.DataFrame) -> int:
+        records = history_records(long)
+        if records:
+            cursor.executemany(_HISTORY_UPSERT_SQL, records)
+            conn.commit()
+        return len(records)
+
+    def _sync(self, tickers: List[str], period: str, start: Optional[date], cursor, conn,
+              stats: Dict[str, Any]) -> List[str]:
+        """Download and store ``tickers`` in batches; returns gap symbols that need a full re-download."""
+        readjust: List[str] = []
+        for i in range(0, len(tickers), self.batch_size):
+            batch = tickers[i:i + self.batch_size]
+            stats["downloads"] += 1
+            try:
+                long = long_ohlcv(self._download(batch, period, start), batch)
+                stats["rows_written"] += self._write(cursor, conn, long)
+            except Exception as e:
+                logger.error(f"❌ History batch starting {batch[0]} failed: {e}", exc_info=True)
+                stats["failed"] += len(batch)
+                continue
+
+            # An empty gap is a holiday; an empty full period means no data at all.
+            fetched = set(long["symbol"])
+            missing = 0 if start is not None else sum(1 for t in batch if t not in fetched)
+            moved = corporate_action_symbols(long) if start is not None else []
+            readjust.extend(moved)
+            stats["success"] += len(batch) - missing - len(moved)
+            stats["failed"] += missing
+        return readjust
+
+    def run(self, symbols: List[str], period: str = "1y") -> Dict[str, Any]:
+        started = time.perf_counter()
+        stats = {"total": len(symbols), "current": 0, "gap": 0, "full": 0, "probed": 0,
+                 "readjusted": 0, "downloads": 0, "rows_written": 0, "success": 0, "failed": 0}
+
+        conn = db_manager.get_connection(config.DB_STOCK_MARKET)
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        try:
+            cursor.execute("SELECT symbol, MAX(date) AS last_date FROM all_companies_data GROUP BY symbol")
+            latest = {row["symbol"]: row["last_date"] for row in cursor.fetchall()}
+            formats = self.service.load_symbol_formats()
+
+            groups, to_probe, resolved = self._plan(symbols, latest, formats, stats)
+            self.service.save_symbol_formats(resolved)
+            stats["success"] += stats["current"]
+            logger.info(
+                f"📊 History sync: {stats['current']} current, {stats['gap']} with gaps, "
+                f"{stats['full']} full, {len(to_probe)} to probe"
+            )
+
+            readjust: List[str] = []
+            for start, tickers in sorted(groups.items(), key=lambda g: g[0] or date.min):
+                readjust.extend(self._sync(tickers, period, start, cursor, conn, stats))
+
+            if readjust:
+                stats["readjusted"] = len(readjust)
+                logger.info(f"♻️ {len(readjust)} symbols had a dividend or split; re-downloading full history")
+                self._sync(readjust, period, None, cursor, conn, stats)
+
+            for clean in to_probe:
+                stats["probed"] += 1
+                result = self.service.fetch_symbol_with_retry(clean, period)
+                if result["status"] == "failed":
+                    self.service.save_failed_symbol(clean, result.get("reason"))
+                    stats["failed"] += 1
+                    continue
+                used = result["used_symbol"]
+                self.service.save_symbol_formats({clean: used})
+                stats["rows_written"] += self._write(cursor, conn, long_ohlcv(result["df"], [used]))
+                stats["success"] += 1
+        finally:
+            cursor.close()
+            conn.close()
+
+        stats["duration_seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"🏁 History sync finished: {stats}")
+        return stats
@@ -0,0 +1,158 @@
+import os
+import re
+
+from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+
+# Kept free of DB / config imports: parse_screener_html runs in
+# process-pool workers that import only this module.
+
+PARSER_BACKENDS = ("lxml", "bs4")
+
+# bs4's get_text() ignores these; keep the lxml backend's text identical
+_SKIP_TEXT_TAGS = frozenset(("script", "style", "template"))
+_CLASS_TOKEN = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+_RATIO_CARDS = etree.XPath("//div[" + _CLASS_TOKEN.format("flex-row") + "]")
+_RATIO_NAME = etree.XPath("(.//*[" + _CLASS_TOKEN.format("name") + "])[1]")
+_RATIO_NUMBER = etree.XPath("(.//*[" + _CLASS_TOKEN.format("number") + "])[1]")
+_HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
+def screener_parser_backend():
+    backend = os.getenv("SCREENER_PARSER", "lxml").strip().lower()
+    return backend if backend in PARSER_BACKENDS else "lxml"
+
+
+def sanitize_column(col):
+    col = col.strip()
+    col = re.sub(r'\W+', '_', col)
+    if col and col[0].isdigit():
+        col = "col_" + col
+    return col or "col_unknown"
+
+
+def parse_screener_html(html, backend=None):
+    """Company page HTML -> ``{"company_info", "financial_ratios", "tables"}``.
+
+    ``backend`` defaults to SCREENER_PARSER (``lxml``); ``bs4`` is the
+    original BeautifulSoup implementation and yields the same structure.
+    """
+    if (backend or screener_parser_backend()) == "bs4":
+        return parse_screener_html_bs4(html)
+    return parse_screener_html_lxml(html)
+
+
+def parse_screener_html_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    data = {
+        "company_info": {},
+        "financial_ratios": {},
+        "tables": {}
+    }
+
+    # ---------- RATIOS ----------
+    for card in soup.select("div.flex-row"):
+        name = card.select_one(".name")
+        value = card.select_one(".number")
+        if name:
+            data["financial_ratios"][
+                name.get_text(strip=True)
+            ] = value.get_text(strip=True) if value else ""
+
+    # ---------- TABLES ----------
+    for table in soup.find_all("table"):
+        title = table.find_previous("h2")
+        name = sanitize_column(
+            title.get_text(strip=True).lower()
+            if title else "unknown_table"
+        )
+
+        headers = [th.get_text(strip=True) for th in table.find_all("th")]
+        rows = []
+
+        for tr in table.find_all("tr")[1:]:
+            tds = tr.find_all("td")
+            values = [td.get_text(strip=True) for td in tds]
+            if len(headers) == len(values):
+                rows.append(dict(zip(headers, values)))
+
+        if rows:
+            data["tables"][name] = rows
+
+    return data
+
+
+# ----------------------------------------------------
+# LXML BACKEND
+# ----------------------------------------------------
+def _collect_text(el, parts):
+    if el.text:
+        text = el.text.strip()
+        if text:
+            parts.append(text)
+    for child in el:
+        # Comments / PIs have a non-str tag: skip their text, keep their tail
+        if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+            _collect_text(child, parts)
+        if child.tail:
+            text = child.tail.strip()
+            if text:
+                parts.append(text)
+
+
+def _text(el):
+    """Same result as bs4 ``get_text(strip=True)``."""
+    if not len(el):
+        return (el.text or "").strip()
+    parts = []
+    _collect_text(el, parts)
+    return "".join(parts)
+
+
+def parse_screener_html_lxml(html):
+    data = {
+        "company_info": {},
+        "financial_ratios": {},
+        "tables": {}
+    }
+
+    raw = html.encode("utf-8") if isinstance(html, str) else html
+    try:
+        root = lxml_html.document_fromstring(raw, parser=_HTML_PARSER)
+    except etree.ParserError:
+        return data  # empty document
+
+    # ---------- RATIOS ----------
+    for card in _RATIO_CARDS(root):
+        name = _RATIO_NAME(card)
+        if name:
+            value = _RATIO_NUMBER(card)
+            data["financial_ratios"][_text(name[0])] = _text(value[0]) if value else ""
+
+    # ---------- TABLES ----------
+    # One document-order pass: the latest <h2> seen is the table's title,
+    # which is what find_previous("h2") returns without walking back per table.
+    title = None
+    for el in root.iter("h2", "table"):
+        if el.tag == "h2":
+            title = el
+            continue
+
+        name = sanitize_column(_text(title).lower() if title is not None else "unknown_table")
+
+        headers = [_text(th) for th in el.iter("th")]
+        rows = []
+
+        for i, tr in enumerate(el.iter("tr")):
+            if i == 0:
+                continue
+            values = [_text(td) for td in tr.iter("td")]
+            if len(headers) == len(values):
+                rows.append(dict(zip(headers, values)))
+
+        if rows:
+            data["tables"][name] = rows
+
+    return data
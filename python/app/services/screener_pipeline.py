@@ -0,0 +1,268 @@
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.config import config, optional_env_int, optional_env_float
+from app.services.screener_parser import parse_screener_html
+from app.services.screener_refresh_state import (
+    in_results_season,
+    payload_hash,
+    prioritize,
+    screener_refresh_state,
+)
+from app.services.screener_service import iter_screener_tables, screener_fetch_workers, screener_service
+
+logger = logging.getLogger(__name__)
+
+
+class ScreenerCheckpoint:
+    """
+    Symbols the current scrape has finished (failures excluded, so they are
+    retried), persisted as JSON so a crashed or restarted run picks up
+    where it stopped. Written atomically
+    every SCREENER_CHECKPOINT_EVERY symbols; removed once a run completes.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_every: Optional[int] = None,
+                 max_age_hours: Optional[float] = None):
+        self.path = path or config.SCREENER_CHECKPOINT_PATH
+        self.flush_every = flush_every or optional_env_int("SCREENER_CHECKPOINT_EVERY", 25, minimum=1)
+        self.max_age_hours = (
+            max_age_hours if max_age_hours is not None
+            else optional_env_float("SCREENER_CHECKPOINT_MAX_AGE_HOURS", 20)
+        )
+        self.done = set()
+        self.started_at = time.time()
+        self.last_symbol = None
+        self._dirty = 0
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """Adopt a recent checkpoint; returns how many symbols it already covers."""
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                state = json.load(fh)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable screener checkpoint {self.path}: {e}")
+            return 0
+
+        started_at = float(state.get("started_at") or 0)
+        if time.time() - started_at > self.max_age_hours * 3600:
+            logger.info("🧹 Screener checkpoint is stale, starting a fresh run")
+            return 0
+
+        self.started_at = started_at
+        self.done = set(state.get("done") or [])
+        self.last_symbol = state.get("last_symbol")
+        return len(self.done)
+
+    def mark(self, symbol: str):
+        with self._lock:
+            self.done.add(symbol)
+            self.last_symbol = symbol
+            self._dirty += 1
+            due = self._dirty >= self.flush_every
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            state = {
+                "started_at": self.started_at,
+                "updated_at": time.time(),
+                "last_symbol": self.last_symbol,
+                "done": sorted(self.done),
+            }
+            self._dirty = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class ScreenerScrapeEngine:
+    """
+    Fetch → parse → compare → save pipeline for many Screener symbols.
+
+    * fetch: SCREENER_FETCH_WORKERS threads share the service's pooled
+      session; every request waits on one process-wide token bucket
+      (SCREENER_RATE_PER_SECOND), so more workers never means more load
+      on screener.in -- they only hide network latency. Requests carry the
+      stored ETag / Last-Modified, so a 304 skips parsing too.
+    * parse: SCREENER_PARSE_PROCESSES worker processes (0 = parse inline)
+      keep HTML parsing off the GIL the fetch threads need.
+    * compare / save: a single writer (the calling thread). Symbols whose
+      persisted tables hash the same as last time are not written at all.
+
+    Symbols are ordered by ``prioritize`` (results season first, stale
+    before fresh); those not due this run are reported as ``deferred``.
+    At most ``fetch_workers * 2`` symbols are in flight, bounding memory.
+    """
+
+    def __init__(
+        self,
+        service=None,
+        fetch_workers: Optional[int] = None,
+        parse_processes: Optional[int] = None,
+        checkpoint: Optional[ScreenerCheckpoint] = None,
+        statement_type: str = "consolidated",
+        context: Optional[Any] = None,
+        state=None,
+        recheck_days: Optional[int] = None,
+    ):
+        self.service = service or screener_service
+        self.fetch_workers = fetch_workers or screener_fetch_workers()
+        self.parse_processes = (
+            parse_processes if parse_processes is not None
+            else optional_env_int("SCREENER_PARSE_PROCESSES", min(2, os.cpu_count() or 1))
+        )
+        self.checkpoint = checkpoint if checkpoint is not None else ScreenerCheckpoint()
+        self.statement_type = statement_type
+        self.context = context
+        self.state = state or screener_refresh_state
+        self.recheck_days = recheck_days
+        self.progress_every = optional_env_int("SCREENER_PROGRESS_EVERY", 25, minimum=1)
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self._pending_state: List[Dict[str, Any]] = []
+
+    def _parse_pool(self):
+        if self.parse_processes <= 0:
+            return None
+        # spawn: workers import only app.services.screener_parser, never fork
+        # the parent's DB pools / scheduler threads.
+        return ProcessPoolExecutor(
+            max_workers=self.parse_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _flush_progress(self, stats: Dict[str, Any], total: int, symbol: str):
+        if self.context is not None:
+            self.context.flush_progress(phase="scraping", symbol=symbol, total_symbols=total, screener=dict(stats))
+
+    def _flush_state(self):
+        pending, self._pending_state = self._pending_state, []
+        try:
+            self.state.save(self.statement_type, pending)
+        except Exception as e:
+            logger.error(f"❌ Failed to save screener refresh state ({len(pending)} symbols): {e}")
+
+    def _fetch(self, symbol: str) -> Dict[str, Any]:
+        known = self.states.get(symbol) or {}
+        return self.service.fetch_screener_page(
+            symbol, self.statement_type, known.get("etag"), known.get("last_modified")
+        )
+
+    def _store(self, symbol: str, page: Dict[str, Any], data: Optional[Dict[str, Any]], stats: Dict[str, Any]):
+        entry = {"symbol": symbol, "etag": page.get("etag"), "last_modified": page.get("last_modified")}
+        if page["status"] == 304:
+            stats["unchanged"] += 1
+            stats["not_modified"] += 1
+        else:
+            digest = payload_hash(iter_screener_tables(data))
+            entry["content_hash"] = digest
+            if digest == (self.states.get(symbol) or {}).get("content_hash"):
+                stats["unchanged"] += 1
+            else:
+                stats["rows_written"] += self.service.save_screener_data(symbol, data) or 0
+                stats["changed"] += 1
+                entry["changed"] = True
+        self._pending_state.append(entry)
+
+    def run(self, symbols: Iterable[str]) -> Dict[str, Any]:
+        symbols = list(dict.fromkeys(symbols))
+        resumed = self.checkpoint.load()
+        self.states = self.state.load(self.statement_type)
+        stats = {
+            "total": len(symbols), "changed": 0, "unchanged": 0, "not_modified": 0, "rows_written": 0,
+            "not_found": 0, "failed": 0, "skipped": 0, "deferred": 0, "resumed": resumed,
+        }
+        candidates: List[str] = []
+        for symbol in symbols:
+            if symbol in self.checkpoint.done:
+                continue
+            if "-RE" in symbol:
+                stats["skipped"] += 1
+                continue
+            candidates.append(symbol)
+
+        queue, deferred = prioritize(candidates, self.states, recheck_days=self.recheck_days)
+        stats["deferred"] = len(deferred)
+        stats["results_season"] = in_results_season(date.today())
+
+        if resumed:
+            logger.info(
+                f"⏩ Resuming screener scrape after {self.checkpoint.last_symbol} "
+                f"({resumed} done, {len(queue)} left)"
+            )
+
+        started = time.perf_counter()
+        window = self.fetch_workers * 2
+        finished = 0
+        parse_pool = self._parse_pool()
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="screener-fetch") as fetch_pool:
+                in_flight: Dict[Any, tuple] = {}
+                position = 0
+                while position < len(queue) or in_flight:
+                    while position < len(queue) and len(in_flight) < window:
+                        symbol = queue[position]
+                        position += 1
+                        in_flight[fetch_pool.submit(self._fetch, symbol)] = ("fetch", symbol, None)
+
+                    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, symbol, page = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                            if stage == "fetch":
+                                page = result
+                                if page["status"] == 404:
+                                    stats["not_found"] += 1
+                                elif page["html"] is None:
+                                    self._store(symbol, page, None, stats)
+                                elif parse_pool is not None:
+                                    in_flight[parse_pool.submit(parse_screener_html, page["html"])] = ("parse", symbol, page)
+                                    continue
+                                else:
+                                    self._store(symbol, page, parse_screener_html(page["html"]), stats)
+                            else:
+                                self._store(symbol, page, result, stats)
+                            # Failed symbols stay out of the checkpoint so a resumed run retries them.
+                            self.checkpoint.mark(symbol)
+                        except Exception as e:
+                            stats["failed"] += 1
+                            logger.error(f"❌ Screener {stage} failed for {symbol}: {e}")
+
+                        finished += 1
+                        if finished % self.progress_every == 0:
+                            self._flush_state()
+                            logger.info(f"[{resumed + finished}/{len(symbols)}] Screener progress: {stats}")
+                            self._flush_progress(stats, len(symbols), symbol)
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown(cancel_futures=True)
+            self._flush_state()
+            if finished:
+                self.checkpoint.flush()
+
+        self.checkpoint.clear()
+        elapsed = time.perf_counter() - started
+        stats["duration_seconds"] = round(elapsed, 3)
+        stats["symbols_per_minute"] = round(finished * 60 / elapsed, 1) if elapsed > 0 else None
+        stats["rate_limit_wait_seconds"] = round(getattr(self.service.limiter, "waited_seconds", 0.0), 3)
+        return stats
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pymysql
+
+from app.config import config, optional_env_int
+from app.database.connection import db_manager
+
+logger = logging.getLogger(__name__)
+
+_STATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS screener_refresh_state (
+    symbol VARCHAR(64) NOT NULL,
+    statement_type VARCHAR(20) NOT NULL,
+    content_hash CHAR(64) NULL,
+    etag VARCHAR(255) NULL,
+    last_modified VARCHAR(64) NULL,
+    last_checked_at DATETIME NOT NULL,
+    last_changed_at DATETIME NULL,
+    PRIMARY KEY (symbol, statement_type),
+    INDEX idx_refresh_checked (statement_type, last_checked_at)
+)
+"""
+
+_STATE_UPSERT_SQL = """
+INSERT INTO screener_refresh_state
+    (symbol, statement_type, content_hash, etag, last_modified, last_checked_at, last_changed_at)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    content_hash = COALESCE(VALUES(content_hash), content_hash),
+    etag = VALUES(etag),
+    last_modified = VALUES(last_modified),
+    last_checked_at = VALUES(last_checked_at),
+    last_changed_at = COALESCE(VALUES(last_changed_at), last_changed_at)
+"""
+
+
+def payload_hash(tables: Iterable[Tuple[str, Any]]) -> str:
+    """SHA-256 of the (table_name, rows) pairs that would be written."""
+    body = json.dumps(list(tables), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+# -----------------------------------------------------
+# RESULTS SEASON
+# -----------------------------------------------------
+def last_quarter_end(today: date) -> date:
+    for month, day in ((12, 31), (9, 30), (6, 30), (3, 31)):
+        if (today.month, today.day) >= (month, day):
+            return date(today.year, month, day)
+    return date(today.year - 1, 12, 31)
+
+
+def in_results_season(today: date) -> bool:
+    """
+    Listed companies publish quarterly results within 45 days of quarter
+    end (60 for Q4); shareholding patterns within 21. Between
+    SCREENER_SEASON_START_DAYS and SCREENER_SEASON_END_DAYS after a
+    quarter end, Screener pages are expected to change.
+    """
+    days = (today - last_quarter_end(today)).days
+    return optional_env_int("SCREENER_SEASON_START_DAYS", 7) <= days <= optional_env_int("SCREENER_SEASON_END_DAYS", 62)
+
+
+def prioritize(
+    symbols: Iterable[str],
+    states: Dict[str, Dict[str, Any]],
+    today: Optional[date] = None,
+    recheck_days: Optional[int] = None,
+) -> Tuple[List[str], List[str]]:
+    """
+    Order symbols for a refresh run; returns ``(due, deferred)``.
+
+    Never-seen symbols go first. In results season every symbol that has
+    not changed since the last quarter end is due (oldest check first).
+    Symbols that already carry this quarter's numbers, and every symbol
+    off-season, are only due once their last check is SCREENER_RECHECK_DAYS
+    old (0 = check everything every run).
+    """
+    today = today or date.today()
+    recheck_days = optional_env_int("SCREENER_RECHECK_DAYS", 7) if recheck_days is None else recheck_days
+    season = in_results_season(today)
+    quarter_end = datetime.combine(last_quarter_end(today), datetime.min.time())
+    stale_before = datetime.combine(today, datetime.min.time()) - timedelta(days=recheck_days)
+
+    unseen, awaiting, stale, deferred = [], [], [], []
+    for symbol in symbols:
+        state = states.get(symbol)
+        if not state or not state.get("content_hash"):
+            unseen.append(symbol)
+            continue
+        checked = state.get("last_checked_at") or datetime.min
+        changed = state.get("last_changed_at") or datetime.min
+        if season and changed < quarter_end:
+            awaiting.append((checked, symbol))
+        elif recheck_days == 0 or checked < stale_before:
+            stale.append((checked, symbol))
+        else:
+            deferred.append(symbol)
+
+    due = unseen + [s for _, s in sorted(awaiting)] + [s for _, s in sorted(stale)]
+    return due, deferred
+
+
+# -----------------------------------------------------
+# STORE
+# -----------------------------------------------------
+class ScreenerRefreshState:
+    """Per-(symbol, statement_type) content hash and HTTP validators."""
+
+    def __init__(self):
+        self.ready = False
+
+    def _ensure_table(self, cursor):
+        if not self.ready:
+            cursor.execute(_STATE_TABLE_SQL)
+            self.ready = True
+
+    def load(self, statement_type: str) -> Dict[str, Dict[str, Any]]:
+        conn = db_manager.get_connection(config.DB_SCREENER)
+        cursor = None
+        try:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            self._ensure_table(cursor)
+            cursor.execute(
+                "SELECT symbol, content_hash, etag, last_modified, last_checked_at, last_changed_at "
+                "FROM screener_refresh_state WHERE statement_type = %s",
+                (statement_type,),
+            )
+            return {row["symbol"]: row for row in cursor.fetchall()}
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    def save(self, statement_type: str, entries: List[Dict[str, Any]]):
+        """Upsert check results; ``content_hash`` None keeps the stored hash (HTTP 304)."""
+        if not entries:
+            return
+        now = datetime.now()
+        conn = db_manager.get_connection(config.DB_SCREENER)
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.executemany(
+                _STATE_UPSERT_SQL,
+                [
+                    (
+                        e["symbol"], statement_type, e.get("content_hash"), e.get("etag"),
+                        e.get("last_modified"), now, now if e.get("changed") else None,
+                    )
+                    for e in entries
+                ],
+            )
+            conn.commit()
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+
+screener_refresh_state = ScreenerRefreshState()
@@ -1,93 +1,174 @@
 import pymysql
 import requests
-from bs4 import BeautifulSoup
-import re
-import time
+from requests.adapters import HTTPAdapter
 import logging
 from fastapi import HTTPException
 
-from app.config import config
+from app.config import config, optional_env_float, optional_env_int
 from app.database.connection import db_manager
+from app.database.metadata_cache import table_metadata_cache
+from app.services.screener_parser import parse_screener_html, sanitize_column
+from app.utils.rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+SCREENER_COMPANY_URL = "https://www.screener.in/company/{symbol}/{statement_type}/"
+
+
+def screener_fetch_workers():
+    return optional_env_int("SCREENER_FETCH_WORKERS", 4, minimum=1)
+
+
+# One politeness budget for every Screener request in the process, however
+# many fetch workers share it (replaces the fixed 1.5 s sleeps).
+screener_rate_limiter = TokenBucket(
+    rate=optional_env_float("SCREENER_RATE_PER_SECOND", 1.0, minimum=0.01),
+    burst=optional_env_float("SCREENER_RATE_BURST", 1.0, minimum=0.01),
+)
+
 
 # ----------------------------------------------------
 # HELPERS
 # ----------------------------------------------------
-def sanitize_column(col):
-    col = col.strip()
-    col = re.sub(r'\W+', '_', col)
-    if col and col[0].isdigit():
-        col = "col_" + col
-    return col or "col_unknown"
-
-
-def ensure_table(cursor, table_name, columns):
-    cols_sql = ", ".join([f"`{c}` TEXT" for c in columns])
-    cursor.execute(
-        f"CREATE TABLE IF NOT EXISTS `{table_name}` "
-        f"(symbol TEXT, {cols_sql})"
-    )
 
-    cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
-    existing = [c["Field"] for c in cursor.fetchall()]
+# Natural key of every Screener table: one row per (symbol, row label).
+# Screener tables are wide (periods are columns), so the row label -- the
+# table's first header, usually blank -> col_unknown -- identifies a row.
+# TEXT columns need prefix lengths in a key.
+ROW_KEY_INDEX = "uq_symbol_row"
+
+
+def _row_key_sql(key_column):
+    return f"UNIQUE KEY `{ROW_KEY_INDEX}` (symbol(64), `{key_column}`(191))"
 
-    for col in columns:
-        if col not in existing:
+
+def _upsert_sql(table_name, columns, key_column, source_table=None):
+    """Row upsert for executemany, or INSERT ... SELECT from ``source_table``."""
+    col_sql = ", ".join(f"`{c}`" for c in columns)
+    if source_table:
+        values_sql = f"SELECT {col_sql} FROM `{source_table}`"
+    else:
+        values_sql = "VALUES (" + ", ".join(["%s"] * len(columns)) + ")"
+    updates = ", ".join(
+        f"`{c}` = VALUES(`{c}`)" for c in columns
+        if c.lower() not in ("symbol", key_column.lower())
+    )
+    if not updates:
+        return f"INSERT IGNORE INTO `{table_name}` ({col_sql}) {values_sql}"
+    return f"INSERT INTO `{table_name}` ({col_sql}) {values_sql} ON DUPLICATE KEY UPDATE {updates}"
+
+
+def add_row_key(cursor, table_name, key_column):
+    """
+    Give a legacy keyless table its natural key.
+
+    Earlier runs appended a full copy of each company's rows every day, so
+    the table is copied into a keyed shadow (later rows win, i.e. the latest
+    scrape is kept) and swapped in with RENAME.
+    """
+    shadow = f"{table_name[:52]}__dedupe"
+    backup = f"{table_name[:52]}__dupes"
+    columns = table_metadata_cache.get_columns(config.DB_SCREENER, table_name)
+
+    cursor.execute(f"SELECT COUNT(*) AS n FROM `{table_name}`")
+    before = cursor.fetchone()["n"]
+
+    cursor.execute(f"DROP TABLE IF EXISTS `{shadow}`")
+    cursor.execute(f"CREATE TABLE `{shadow}` LIKE `{table_name}`")
+    cursor.execute(f"ALTER TABLE `{shadow}` ADD {_row_key_sql(key_column)}")
+    cursor.execute(_upsert_sql(shadow, columns, key_column, source_table=table_name))
+    cursor.execute(f"RENAME TABLE `{table_name}` TO `{backup}`, `{shadow}` TO `{table_name}`")
+    cursor.execute(f"DROP TABLE `{backup}`")
+
+    cursor.execute(f"SELECT COUNT(*) AS n FROM `{table_name}`")
+    after = cursor.fetchone()["n"]
+    table_metadata_cache.invalidate(config.DB_SCREENER, table_name)
+    logger.info(f"🧹 Deduplicated {table_name}: {before} → {after} rows, keyed on (symbol, {key_column})")
+
+
+def ensure_table(cursor, table_name, columns, key_column):
+    """
+    Create / widen ``table_name`` so it holds ``columns`` and has the
+    (symbol, ``key_column``) natural key. Schema comes from the in-process
+    metadata cache, so steady-state writes issue no DDL or SHOW queries.
+    """
+    existing = table_metadata_cache.get_column_names_lower(config.DB_SCREENER, table_name)
+
+    if not existing:
+        cols_sql = ", ".join([f"`{c}` TEXT" for c in columns])
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS `{table_name}` "
+            f"(symbol TEXT, {cols_sql}, {_row_key_sql(key_column)})"
+        )
+        table_metadata_cache.invalidate(config.DB_SCREENER, table_name)
+        existing = table_metadata_cache.get_column_names_lower(config.DB_SCREENER, table_name)
+
+    missing = [c for c in columns if c.lower() not in existing]
+    for col in missing:
+        try:
             cursor.execute(
                 f"ALTER TABLE `{table_name}` ADD COLUMN `{col}` TEXT"
             )
+        except pymysql.err.OperationalError as e:
+            if e.args[0] != 1060:  # added concurrently: duplicate column name
+                raise
+    if missing:
+        table_metadata_cache.invalidate(config.DB_SCREENER, table_name)
+
+    if ROW_KEY_INDEX not in table_metadata_cache.get_index_names(config.DB_SCREENER, table_name):
+        add_row_key(cursor, table_name, key_column)
 
 
 def create_and_insert_table(table_name, data, cursor, symbol):
+    """Upsert one symbol's rows for one table in a single executemany; returns rows sent."""
     if not data:
-        return
+        return 0
 
     # ---------- LIST OF DICTS ----------
     if isinstance(data, list) and isinstance(data[0], dict):
-        columns = set()
-        for row in data:
-            columns.update(row.keys())
-
-        columns = [sanitize_column(c) for c in columns]
-        ensure_table(cursor, table_name, columns)
-
+        key_column = sanitize_column(next(iter(data[0]), ""))
+        columns = list(dict.fromkeys(
+            sanitize_column(c) for row in data for c in row.keys()
+        ))
+        ensure_table(cursor, table_name, columns, key_column)
+
+        # Last occurrence of a row label wins, as the upsert would
+        by_label = {}
         for row in data:
             clean_row = {sanitize_column(k): v for k, v in row.items()}
-            clean_row["symbol"] = symbol
-
-            all_cols = ["symbol"] + columns
-            placeholders = ", ".join(["%s"] * len(all_cols))
-
-            query = (
-                f"INSERT INTO `{table_name}` "
-                f"({', '.join(all_cols)}) VALUES ({placeholders})"
-            )
-
-            cursor.execute(
-                query,
-                tuple(clean_row.get(c, "") for c in all_cols)
-            )
+            by_label[clean_row.get(key_column, "")] = clean_row
+
+        all_cols = ["symbol"] + columns
+        cursor.executemany(
+            _upsert_sql(table_name, all_cols, key_column),
+            [
+                (symbol,) + tuple(clean_row.get(c, "") for c in columns)
+                for clean_row in by_label.values()
+            ]
+        )
+        return len(by_label)
 
     # ---------- DICT ----------
     elif isinstance(data, dict):
-        cursor.execute(
-            f"""
-            CREATE TABLE IF NOT EXISTS `{table_name}` (
-                symbol TEXT,
-                `key` TEXT,
-                `value` TEXT
-            )
-            """
+        ensure_table(cursor, table_name, ["key", "value"], "key")
+
+        cursor.executemany(
+            _upsert_sql(table_name, ["symbol", "key", "value"], "key"),
+            [(symbol, k, v) for k, v in data.items()]
         )
+        return len(data)
+
+    return 0
 
-        for k, v in data.items():
-            cursor.execute(
-                f"INSERT INTO `{table_name}` (symbol, `key`, value) VALUES (%s,%s,%s)",
-                (symbol, k, v)
-            )
+
+def iter_screener_tables(data):
+    """(table_name, rows) for every section entry that is persisted."""
+    for section, content in data.items():
+        if isinstance(content, dict):
+            for name, rows in content.items():
+                if rows and isinstance(rows, (list, dict)):
+                    yield f"{section}_{sanitize_column(name)}", rows
 
 
 # ----------------------------------------------------
@@ -95,70 +176,85 @@ def create_and_insert_table(table_name, data, cursor, symbol):
 # ----------------------------------------------------
 class ScreenerService:
     def __init__(self):
+        # Shared keep-alive pool sized for the concurrent fetch workers
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=screener_fetch_workers())
+        self.session.mount("https://", adapter)
+        self.limiter = screener_rate_limiter
         logger.info("✅ ScreenerService initialized")
 
     # ----------------------------------------------------
     # SCRAPER
     # ----------------------------------------------------
-    def get_screener_data(self, symbol, statement_type):
-        url = f"https://www.screener.in/company/{symbol}/{statement_type}/"
-        headers = {"User-Agent": "Mozilla/5.0"}
-
-        time.sleep(1.5)
-        res = requests.get(url, headers=headers, timeout=20)
+    def fetch_screener_page(self, symbol, statement_type, etag=None, last_modified=None):
+        """
+        Conditional GET of a company page. Waits for the shared rate budget.
+        Returns ``{"status", "html", "etag", "last_modified"}``; ``html`` is
+        None for 404 and 304 (unchanged since ``etag`` / ``last_modified``).
+        """
+        url = SCREENER_COMPANY_URL.format(symbol=symbol, statement_type=statement_type)
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        self.limiter.acquire()
+        res = self.session.get(url, headers=headers, timeout=20)
         # --- HANDLE 404 ---
         if res.status_code == 404:
             logger.warning(f"Screener page not found for {symbol}")
-            return None
+            return {"status": 404, "html": None, "etag": None, "last_modified": None}
+        if res.status_code == 304:
+            return {"status": 304, "html": None, "etag": etag, "last_modified": last_modified}
     
         res.raise_for_status()
-
-        soup = BeautifulSoup(res.text, "html.parser")
-
-        data = {
-            "company_info": {},
-            "financial_ratios": {},
-            "tables": {}
+        return {
+            "status": res.status_code,
+            "html": res.text,
+            "etag": res.headers.get("ETag"),
+            "last_modified": res.headers.get("Last-Modified"),
         }
 
-        # ---------- RATIOS ----------
-        for card in soup.select("div.flex-row"):
-            name = card.select_one(".name")
-            value = card.select_one(".number")
-            if name:
-                data["financial_ratios"][
-                    name.get_text(strip=True)
-                ] = value.get_text(strip=True) if value else ""
-
-        # ---------- TABLES ----------
-        for table in soup.find_all("table"):
-            title = table.find_previous("h2")
-            name = sanitize_column(
-                title.get_text(strip=True).lower()
-                if title else "unknown_table"
-            )
-
-            headers = [th.get_text(strip=True) for th in table.find_all("th")]
-            rows = []
+    def fetch_screener_html(self, symbol, statement_type):
+        """Company page HTML, or None on 404."""
+        return self.fetch_screener_page(symbol, statement_type)["html"]
 
-            for tr in table.find_all("tr")[1:]:
-                tds = tr.find_all("td")
-                values = [td.get_text(strip=True) for td in tds]
-                if len(headers) == len(values):
-                    rows.append(dict(zip(headers, values)))
-
-            if rows:
-                data["tables"][name] = rows
-
-        return data
+    def get_screener_data(self, symbol, statement_type):
+        html = self.fetch_screener_html(symbol, statement_type)
+        if html is None:
+            return None
+        return parse_screener_html(html)
 
     # ----------------------------------------------------
     # SAVE
     # ----------------------------------------------------
-    def fetch_and_save(self, symbol, statement_type="consolidated"):
-        conn = None
+    def save_screener_data(self, symbol, data):
+        """Write one symbol's parsed payload (one connection, one commit)."""
+        conn = db_manager.get_connection(config.DB_SCREENER)
         cursor = None
+        try:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            written = 0
 
+            for table_name, rows in iter_screener_tables(data):
+                written += create_and_insert_table(
+                    table_name,
+                    rows,
+                    cursor,
+                    symbol
+                )
+
+            conn.commit()
+            logger.info(f"📥 Screener saved for {symbol} ({written} rows upserted)")
+            return written
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    def fetch_and_save(self, symbol, statement_type="consolidated"):
         try:
             if "-RE" in symbol:
                 logger.warning(f"Skipping rights issue symbol {symbol}")
@@ -168,35 +264,13 @@ class ScreenerService:
                 logger.warning(f"Skipping {symbol}, no Screener data")
                 return
 
-            conn = db_manager.get_connection(config.DB_SCREENER)
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-
-            for section, content in data.items():
-                if isinstance(content, dict):
-                    for name, rows in content.items():
-                        if rows:
-                            table_name = f"{section}_{sanitize_column(name)}"
-                            create_and_insert_table(
-                                table_name,
-                                rows,
-                                cursor,
-                                symbol
-                            )
-
-            conn.commit()
-            logger.info(f"📥 Screener saved for {symbol}")
+            self.save_screener_data(symbol, data)
 
         except Exception as e:
             logger.error(f"❌ Screener error for {symbol}: {e}", exc_info=True)
             # raise HTTPException(status_code=500, detail=str(e))
             return
 
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-
 
 # ✅ SINGLETON
 screener_service = ScreenerService()
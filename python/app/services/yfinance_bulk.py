@@ -0,0 +1,232 @@
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+import pymysql
+import yfinance as yf
+from yfinance import Ticker
+
+from app.config import config, optional_env_int, optional_env_float
+from app.database.connection import db_manager
+from app.utils.rate_limiter import TokenBucket
+from app.utils.yf_download import yf_download
+
+logger = logging.getLogger("yfinance_service")
+
+INFO_FIELDS = ("name", "sector", "industry", "currency", "exchange", "marketCap", "website")
+QUOTE_FIELDS = ("currentPrice", "previousClose", "change", "changePercent", "volume")
+
+# Info columns only overwrite when this run fetched them (COALESCE keeps
+# the stored value); quote columns are refreshed on every run.
+_COMPANY_UPSERT_SQL = """
+INSERT INTO companies
+(symbol,name,sector,industry,currency,exchange,marketCap,website,infoUpdatedAt,
+currentPrice,previousClose,`change`,changePercent,volume,addedAt)
+VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+ON DUPLICATE KEY UPDATE
+name=COALESCE(VALUES(name),name),
+sector=COALESCE(VALUES(sector),sector),
+industry=COALESCE(VALUES(industry),industry),
+currency=COALESCE(VALUES(currency),currency),
+exchange=COALESCE(VALUES(exchange),exchange),
+marketCap=COALESCE(VALUES(marketCap),marketCap),
+website=COALESCE(VALUES(website),website),
+infoUpdatedAt=COALESCE(VALUES(infoUpdatedAt),infoUpdatedAt),
+currentPrice=VALUES(currentPrice),
+previousClose=VALUES(previousClose),
+`change`=VALUES(`change`),
+changePercent=VALUES(changePercent),
+volume=VALUES(volume),
+addedAt=VALUES(addedAt)
+"""
+
+
+def _number(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) or math.isinf(value) else value
+
+
+def quotes_from_download(frame: Optional[pd.DataFrame], symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Last close vs the close before it, per symbol, from a
+    ``yf.download(group_by="ticker")`` frame. A one-ticker download comes
+    back with flat columns; symbols without two closes are left out.
+    """
+    quotes: Dict[str, Dict[str, Any]] = {}
+    if frame is None or frame.empty:
+        return quotes
+    multi = isinstance(frame.columns, pd.MultiIndex)
+
+    for symbol in symbols:
+        if multi:
+            if symbol not in frame.columns.get_level_values(0):
+                continue
+            sub = frame[symbol]
+        else:
+            sub = frame
+        if "Close" not in sub:
+            continue
+        closes = sub["Close"].dropna()
+        if len(closes) < 2:
+            continue
+        cp, pc = _number(closes.iloc[-1]), _number(closes.iloc[-2])
+        if not cp or not pc:
+            continue
+        volume = _number(sub["Volume"].get(closes.index[-1])) if "Volume" in sub else None
+        quotes[symbol] = {
+            "currentPrice": round(cp, 2),
+            "previousClose": round(pc, 2),
+            "change": round(cp - pc, 2),
+            "changePercent": round((cp - pc) / pc * 100, 2),
+            "volume": int(volume) if volume is not None else None,
+        }
+    return quotes
+
+
+def info_fields(info: Dict[str, Any]) -> Dict[str, Any]:
+    market_cap = _number(info.get("marketCap"))
+    return {
+        "name": info.get("longName") or info.get("shortName"),
+        "sector": info.get("sector"),
+        "industry": info.get("industry"),
+        "currency": info.get("currency") or "INR",
+        "exchange": info.get("exchange"),
+        "marketCap": int(market_cap) if market_cap is not None else None,
+        "website": info.get("website"),
+    }
+
+
+def info_due(
+    symbols: Iterable[str],
+    info_updated: Dict[str, Optional[datetime]],
+    ttl_days: int,
+    limit: int,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """Symbols whose info is missing or older than ``ttl_days``, stalest first, at most ``limit``."""
+    cutoff = (now or datetime.now()) - timedelta(days=ttl_days)
+    due = [
+        (info_updated.get(s) or datetime.min, s)
+        for s in symbols
+        if (info_updated.get(s) or datetime.min) < cutoff
+    ]
+    return [s for _, s in sorted(due)[:limit]]
+
+
+class YFinanceBulkRefresher:
+    """
+    Refreshes the ``companies`` table in batches.
+
+    * quotes: one ``yf.download`` per YF_QUOTE_BATCH_SIZE tickers (default
+      200), paced by YF_DOWNLOAD_RATE_PER_SECOND.
+    * info (name / sector / industry / website / market cap): the slow
+      per-ticker ``get_info()`` call, only for rows older than
+      YF_INFO_TTL_DAYS, stalest first, at most YF_INFO_MAX_PER_RUN per run,
+      paced by YF_INFO_RATE_PER_SECOND across YF_INFO_WORKERS threads.
+    * write: one multi-row upsert per batch on a single pooled connection.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        download: Optional[Callable[..., pd.DataFrame]] = None,
+        fetch_info: Optional[Callable[[str], Dict[str, Any]]] = None,
+    ):
+        self.batch_size = batch_size or optional_env_int("YF_QUOTE_BATCH_SIZE", 200, minimum=1)
+        self.info_ttl_days = optional_env_int("YF_INFO_TTL_DAYS", 30, minimum=1)
+        self.info_max_per_run = optional_env_int("YF_INFO_MAX_PER_RUN", 100, minimum=0)
+        self.info_workers = optional_env_int("YF_INFO_WORKERS", 2, minimum=1)
+        self.download = download or yf_download
+        self.fetch_info = fetch_info or (lambda symbol: Ticker(symbol).get_info())
+        self.download_limiter = TokenBucket(rate=optional_env_float("YF_DOWNLOAD_RATE_PER_SECOND", 0.2, minimum=0.01))
+        self.info_limiter = TokenBucket(rate=optional_env_float("YF_INFO_RATE_PER_SECOND", 0.5, minimum=0.01))
+
+    def _download_quotes(self, batch: List[str]) -> Dict[str, Dict[str, Any]]:
+        self.download_limiter.acquire()
+        try:
+            frame = self.download(
+                tickers=batch,
+                period="5d",
+                interval="1d",
+                group_by="ticker",
+                auto_adjust=False,
+                threads=True,
+                progress=False,
+            )
+        except Exception as e:
+            logger.error(f"yf.download failed for batch starting {batch[0]}: {e}")
+            return {}
+        return quotes_from_download(frame, batch)
+
+    def _info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        self.info_limiter.acquire()
+        try:
+            return info_fields(self.fetch_info(symbol) or {})
+        except Exception as e:
+            logger.error(f"{symbol} info error: {e}")
+            return None
+
+    @staticmethod
+    def upsert_rows(quotes: Dict[str, Dict[str, Any]], infos: Dict[str, Dict[str, Any]], now: datetime) -> List[tuple]:
+        rows = []
+        for symbol, quote in quotes.items():
+            info = infos.get(symbol)
+            rows.append(
+                (symbol,)
+                + tuple(info.get(f) if info else None for f in INFO_FIELDS)
+                + (now if info else None,)
+                + tuple(quote[f] for f in QUOTE_FIELDS)
+                + (now,)
+            )
+        return rows
+
+    def run(self, symbols: List[str]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        stats = {"symbols": len(symbols), "batches": 0, "quoted": 0, "missing": 0,
+                 "info_refreshed": 0, "rows_upserted": 0}
+
+        conn = db_manager.get_connection(config.DB_STOCK_MARKET)
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        try:
+            cursor.execute("SELECT symbol, infoUpdatedAt FROM companies")
+            info_updated = {row["symbol"]: row["infoUpdatedAt"] for row in cursor.fetchall()}
+            info_budget = set(info_due(symbols, info_updated, self.info_ttl_days, self.info_max_per_run))
+
+            with ThreadPoolExecutor(max_workers=self.info_workers, thread_name_prefix="yf-info") as info_pool:
+                for i in range(0, len(symbols), self.batch_size):
+                    batch = symbols[i:i + self.batch_size]
+                    stats["batches"] += 1
+
+                    quotes = self._download_quotes(batch)
+                    stale = [s for s in batch if s in quotes and s in info_budget]
+                    infos = {
+                        s: info for s, info in zip(stale, info_pool.map(self._info, stale)) if info
+                    }
+
+                    rows = self.upsert_rows(quotes, infos, datetime.now())
+                    if rows:
+                        cursor.executemany(_COMPANY_UPSERT_SQL, rows)
+                        conn.commit()
+
+                    stats["quoted"] += len(quotes)
+                    stats["missing"] += len(batch) - len(quotes)
+                    stats["info_refreshed"] += len(infos)
+                    stats["rows_upserted"] += len(rows)
+                    logger.info(
+                        f"Batch {stats['batches']}: {len(quotes)}/{len(batch)} quoted, "
+                        f"{len(infos)} info refreshed"
+                    )
+        finally:
+            cursor.close()
+            conn.close()
+
+        stats["duration_seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Bulk quote refresh finished: {stats}")
+        return stats
@@ -12,6 +12,7 @@ import pymysql
 
 from app.config import config
 from app.database.connection import db_manager
+from app.services.yfinance_bulk import YFinanceBulkRefresher
 
 
 # --------------------------------------------------
@@ -105,10 +106,16 @@ class YFINANCEService:
                     forwardPE FLOAT,
                     trailingPE FLOAT,
                     website VARCHAR(255),
+                    infoUpdatedAt DATETIME,
                     addedAt DATETIME
                 )
             """)
 
+            # infoUpdatedAt drives the info TTL of the bulk quote refresh
+            cursor.execute("SHOW COLUMNS FROM companies LIKE 'infoUpdatedAt'")
+            if not cursor.fetchall():
+                cursor.execute("ALTER TABLE companies ADD COLUMN infoUpdatedAt DATETIME NULL AFTER website")
+
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS listed_companies (
                     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -341,37 +348,30 @@ class YFINANCEService:
     # BULK FETCH
     # --------------------------------------------------
 
-    def fetch_and_store_listed_companies(self, batch_size=5):
+    def fetch_and_store_listed_companies(self, batch_size=None):
+        """
+        Batched quote mode: prices for hundreds of tickers per yf.download
+        call, info fields only on their TTL (see YFinanceBulkRefresher).
+        """
 
         logger.info("Starting bulk stock ingestion")
 
         conn = db_manager.get_connection(config.DB_STOCK_MARKET)
         cursor = conn.cursor(pymysql.cursors.DictCursor)
 
-        cursor.execute("SELECT symbol FROM listed_companies")
-        symbols = [row["symbol"] for row in cursor.fetchall()]
-
-        processed = 0
-
-        for i in range(0, len(symbols), batch_size):
-
-            batch = symbols[i:i + batch_size]
-
-            logger.info(f"Processing batch {i//batch_size + 1}")
-
-            for sym in batch:
-
-                data = self.fetch_company_info(sym)
-
-                if data:
-                    self.save_company_info(data)
-                    processed += 1
+        try:
+            cursor.execute("SELECT symbol FROM listed_companies ORDER BY id")
+            symbols = [row["symbol"] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
 
-            time.sleep(15)
+        result = YFinanceBulkRefresher(batch_size=batch_size).run(symbols)
+        result["processed"] = result["rows_upserted"]
 
-        logger.info(f"Finished ingestion. Processed: {processed}")
+        logger.info(f"Finished ingestion. Processed: {result['processed']}")
 
-        return {"processed": processed}
+        return result
 
 
 # --------------------------------------------------
@@ -0,0 +1,175 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Optional
+
+from app.config import optional_env_int
+
+# Default in-flight limit per endpoint family (override: API_CONCURRENCY_<FAMILY>)
+DEFAULT_FAMILY_LIMITS = {
+    "bhavcopy_ingest": 2,
+    "bhavcopy_read": 8,
+    "yfinance_bulk": 1,
+}
+_FALLBACK_FAMILY_LIMIT = 4
+_SAMPLE_WINDOW = 512
+
+
+def percentile(values: Iterable[float], pct: float) -> Optional[float]:
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return round(ordered[index], 4)
+
+
+class BlockingExecutor:
+    """
+    Runs blocking route work (requests, SQLAlchemy, pandas) off the event loop.
+
+    All calls share one bounded thread pool (API_BLOCKING_WORKERS); on top of
+    that each endpoint family has its own in-flight limit, so a burst of
+    range fetches queues behind its own semaphore instead of starving the
+    read endpoints, /health and the manual-jobs WebSocket.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._max_workers = max_workers or optional_env_int("API_BLOCKING_WORKERS", 16, minimum=1)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._families: Dict[str, Dict[str, Any]] = {}
+
+    def limit_for(self, family: str) -> int:
+        default = DEFAULT_FAMILY_LIMITS.get(family, _FALLBACK_FAMILY_LIMIT)
+        return optional_env_int(f"API_CONCURRENCY_{family.upper()}", default, minimum=1)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="api-blocking"
+                )
+            return self._executor
+
+    def _semaphore(self, family: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphores = {}
+            self._semaphore_loop = loop
+        semaphore = self._semaphores.get(family)
+        if semaphore is None:
+            semaphore = self._semaphores[family] = asyncio.Semaphore(self.limit_for(family))
+        return semaphore
+
+    def _family(self, family: str) -> Dict[str, Any]:
+        stats = self._families.get(family)
+        if stats is None:
+            stats = self._families[family] = {
+                "in_flight": 0,
+                "waiting": 0,
+                "completed": 0,
+                "failed": 0,
+                "wait_seconds": deque(maxlen=_SAMPLE_WINDOW),
+                "run_seconds": deque(maxlen=_SAMPLE_WINDOW),
+            }
+        return stats
+
+    async def run(self, family: str, fn: Callable, *args, **kwargs) -> Any:
+        stats = self._family(family)
+        stats["waiting"] += 1
+        queued = time.perf_counter()
+        async with self._semaphore(family):
+            stats["waiting"] -= 1
+            stats["in_flight"] += 1
+            started = time.perf_counter()
+            stats["wait_seconds"].append(started - queued)
+            try:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self._pool(), functools.partial(fn, *args, **kwargs)
+                )
+                stats["completed"] += 1
+                return result
+            except Exception:
+                stats["failed"] += 1
+                raise
+            finally:
+                stats["in_flight"] -= 1
+                stats["run_seconds"].append(time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        families = {}
+        for name, stats in list(self._families.items()):
+            waits = list(stats["wait_seconds"])
+            runs = list(stats["run_seconds"])
+            families[name] = {
+                "limit": self.limit_for(name),
+                "in_flight": stats["in_flight"],
+                "waiting": stats["waiting"],
+                "completed": stats["completed"],
+                "failed": stats["failed"],
+                "wait_p99_seconds": percentile(waits, 99),
+                "run_p50_seconds": percentile(runs, 50),
+                "run_p99_seconds": percentile(runs, 99),
+            }
+        return {"max_workers": self._max_workers, "families": families}
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+class LoopLagMonitor:
+    """
+    Samples event-loop scheduling lag: how late a periodic ``sleep`` wakes up.
+
+    Any request handled by the loop (/health, WebSocket pings) is delayed by
+    at least this much, so its p99 is the responsiveness number to watch
+    while a backfill runs.
+    """
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self._samples: Deque[float] = deque(maxlen=_SAMPLE_WINDOW * 2)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._sample())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, time.perf_counter() - expected))
+
+    def stats(self) -> Dict[str, Any]:
+        samples = list(self._samples)
+        return {
+            "samples": len(samples),
+            "interval_seconds": self.interval,
+            "lag_p50_seconds": percentile(samples, 50),
+            "lag_p99_seconds": percentile(samples, 99),
+            "lag_max_seconds": round(max(samples), 4) if samples else None,
+        }
+
+
+blocking_executor = BlockingExecutor()
+loop_lag_monitor = LoopLagMonitor()
+
+
+async def run_blocking(family: str, fn: Callable, *args, **kwargs) -> Any:
+    """Await ``fn(*args, **kwargs)`` on the bounded API executor under ``family``'s limit."""
+    return await blocking_executor.run(family, fn, *args, **kwargs)
\ No newline at end of file
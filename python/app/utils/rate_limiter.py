@@ -0,0 +1,145 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, at most ``burst`` banked."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = max(rate, 0.001)
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.acquired += 1
+                    self.waited_seconds += waited
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    ``TokenBucket`` whose rate reacts to upstream throttling (AIMD).
+
+    ``throttled()`` (an observed HTTP 429) halves the rate down to
+    ``min_rate`` and pauses every caller for a cooldown that doubles with
+    each consecutive 429 (``cooldown`` .. ``max_cooldown`` seconds);
+    ``succeeded()`` adds ``increase`` tokens/s back, up to ``max_rate``.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        increase: Optional[float] = None,
+        cooldown: float = 30.0,
+        max_cooldown: float = 600.0,
+    ):
+        super().__init__(rate, burst)
+        self.min_rate = min(self.rate, min_rate or self.rate / 10)
+        self.max_rate = max(self.rate, max_rate or self.rate)
+        self.increase = increase if increase is not None else self.rate / 20
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._cooldown_until = 0.0
+        self._consecutive = 0
+        self.throttled_count = 0
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        waited = 0.0
+        while True:
+            with self._lock:
+                pause = self._cooldown_until - time.monotonic()
+            if pause <= 0:
+                break
+            time.sleep(pause)
+            waited += pause
+        if waited:
+            with self._lock:
+                self.waited_seconds += waited
+        return waited + super().acquire(tokens)
+
+    def throttled(self) -> float:
+        """Record a 429; returns the cooldown applied (seconds)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            self._consecutive += 1
+            self.throttled_count += 1
+            pause = min(self.max_cooldown, self.cooldown * 2 ** (self._consecutive - 1))
+            self._cooldown_until = max(self._cooldown_until, now + pause)
+            return pause
+
+    def succeeded(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self._consecutive = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_per_second": round(self.rate, 4),
+                "acquired": self.acquired,
+                "throttled": self.throttled_count,
+                "waited_seconds": round(self.waited_seconds, 3),
+            }
+
+
+class HostRateLimiter:
+    """One ``TokenBucket`` per host name, created on first use."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def acquire(self, url: str) -> float:
+        host = urlparse(url).hostname or url
+        return self.bucket(host).acquire()
+
+    def stats(self, host: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            name: {
+                "rate_per_second": b.rate,
+                "burst": b.burst,
+                "acquired": b.acquired,
+                "waited_seconds": round(b.waited_seconds, 3),
+            }
+            for name, b in buckets.items()
+            if host is None or name == host
+        }
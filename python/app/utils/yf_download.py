@@ -0,0 +1,15 @@
+import threading
+
+import yfinance as yf
+
+# yfinance 0.2.x collects each download()'s per-ticker frames in the module
+# globals yfinance.shared._DFS / _ERRORS and resets them on entry, so two
+# overlapping calls lose or swap each other's tickers. Run one download at a
+# time and get parallelism from threads=True inside the call.
+yf_download_lock = threading.Lock()
+
+
+def yf_download(*args, **kwargs):
+    """``yf.download`` under the process-wide ``yf_download_lock``."""
+    with yf_download_lock:
+        return yf.download(*args, **kwargs)
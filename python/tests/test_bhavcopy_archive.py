@@ -0,0 +1,74 @@
+"""Unit tests for the on-disk content-addressed bhavcopy zip archive."""
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from datetime import date
+
+from app.services.bhavcopy_archive import BhavcopyArchiveCache
+
+
+def _zip(text: str) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("Pd200726.csv", text)
+    buffer.seek(0)
+    return buffer
+
+
+class ArchiveCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_store_then_open_round_trips_and_dedupes(self):
+        cache = BhavcopyArchiveCache(root=self.root, max_bytes=10 ** 6)
+        body = _zip("SYMBOL\nABC\n")
+
+        first = cache.store(date(2026, 7, 20), body, "https://x/PR200726.zip")
+        cache.store(date(2026, 7, 21), _zip("SYMBOL\nABC\n"), "https://x/PR210726.zip")
+
+        entry, handle = cache.open(date(2026, 7, 20))
+        with handle:
+            self.assertEqual(handle.read(), body.getvalue())
+        self.assertEqual(entry["sha256"], first["sha256"])
+        self.assertEqual(cache.stats()["objects"], 1)
+        # index survives a fresh instance
+        reloaded = BhavcopyArchiveCache(root=self.root)
+        self.assertEqual(reloaded.dates_in_range(date(2026, 7, 1), date(2026, 7, 31)),
+                         [date(2026, 7, 20), date(2026, 7, 21)])
+
+    def test_least_recently_used_date_is_evicted(self):
+        size = len(_zip("SYMBOL\nA\n").getvalue())
+        cache = BhavcopyArchiveCache(root=self.root, max_bytes=size * 2 + 10)
+
+        cache.store(date(2026, 7, 20), _zip("SYMBOL\nA\n"), "u1")
+        cache.store(date(2026, 7, 21), _zip("SYMBOL\nB\n"), "u2")
+        cache._entries()["2026-07-20"]["last_access"] = "2000-01-01T00:00:00"
+        cache.store(date(2026, 7, 22), _zip("SYMBOL\nC\n"), "u3")
+
+        self.assertFalse(cache.has(date(2026, 7, 20)))
+        self.assertTrue(cache.has(date(2026, 7, 22)))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_non_zip_is_rejected_and_corrupt_object_is_a_miss(self):
+        cache = BhavcopyArchiveCache(root=self.root)
+        self.assertIsNone(cache.store(date(2026, 7, 20), io.BytesIO(b"<html>"), "u"))
+
+        entry = cache.store(date(2026, 7, 20), _zip("SYMBOL\nA\n"), "u")
+        with open(cache._object_path(entry["sha256"]), "ab") as handle:
+            handle.write(b"tampered")
+
+        self.assertIsNone(cache.open(date(2026, 7, 20)))
+        self.assertFalse(cache.has(date(2026, 7, 20)))
+        self.assertFalse(os.path.exists(cache._object_path(entry["sha256"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
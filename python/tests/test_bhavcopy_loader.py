@@ -0,0 +1,72 @@
+"""Unit tests for the bhavcopy bulk loader (DB connection is mocked)."""
+from __future__ import annotations
+
+import math
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from app.services.bhavcopy_loader import BhavcopyBulkLoader, chunk_to_rows
+
+
+class ChunkToRowsTests(unittest.TestCase):
+    def test_missing_and_infinite_values_become_null(self):
+        df = pd.DataFrame({
+            "SYMBOL": ["ABC", None],
+            "CLOSE_PRICE": [1.5, float("inf")],
+            "TRADES": [float("nan"), 3.0],
+        })
+
+        rows = chunk_to_rows(df)
+
+        self.assertEqual(rows[0][0], "ABC")
+        self.assertEqual(rows[0][1], 1.5)
+        self.assertIsNone(rows[0][2])
+        self.assertIsNone(rows[1][0])
+        self.assertIsNone(rows[1][1])
+        self.assertFalse(any(isinstance(v, float) and math.isnan(v) for v in rows[1]))
+
+
+class BulkLoaderTests(unittest.TestCase):
+    def _mock_connection(self):
+        conn = MagicMock()
+        cursor = MagicMock()
+        cursor.rowcount = 7
+        conn.cursor.return_value = cursor
+        return conn, cursor
+
+    def test_load_stages_in_chunks_and_merges_once(self):
+        conn, cursor = self._mock_connection()
+        frame = pd.DataFrame({"SYMBOL": [f"S{i}" for i in range(1200)], "source_date": "2026-07-20"})
+        prepare = MagicMock()
+
+        with patch("app.services.bhavcopy_loader.db_manager") as manager, \
+                patch.dict("os.environ", {"BHAVCOPY_BULK_CHUNK_ROWS": "500"}):
+            manager.get_connection.return_value = conn
+            metrics = BhavcopyBulkLoader("bhav").load("pd", iter([frame]), prepare=prepare)
+
+        prepare.assert_called_once()
+        self.assertEqual(metrics["rows"], 1200)
+        self.assertEqual(metrics["chunks"], 3)
+        self.assertEqual(cursor.executemany.call_count, 3)
+
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        merges = [s for s in statements if s.startswith("INSERT INTO `pd`")]
+        self.assertEqual(len(merges), 1)
+        self.assertIn("ON DUPLICATE KEY UPDATE `SYMBOL` = VALUES(`SYMBOL`)", merges[0])
+        self.assertNotIn("`source_date` = VALUES", merges[0])
+        self.assertTrue(statements[-1].startswith("DROP TEMPORARY TABLE"))
+        conn.commit.assert_called_once()
+        conn.close.assert_called_once()
+
+    def test_empty_input_never_opens_connection(self):
+        with patch("app.services.bhavcopy_loader.db_manager") as manager:
+            metrics = BhavcopyBulkLoader("bhav").load("pd", iter([pd.DataFrame()]))
+
+        manager.get_connection.assert_not_called()
+        self.assertEqual(metrics["rows"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""Unit tests for the staged bhavcopy range pipeline (service is mocked)."""
+from __future__ import annotations
+
+import io
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from app.services.bhavcopy_pipeline import BhavcopyRangePipeline
+
+SETTINGS = {"download_workers": 2, "parse_workers": 2, "write_workers": 1, "queue_size": 1}
+
+
+def _parsed(segments):
+    return {"segments": iter(segments), "found": set(), "is_zip": True, "data": {}}
+
+
+def _service():
+    service = MagicMock()
+    service.session_skip_result.return_value = None
+    service.download_bhavcopy.side_effect = lambda d, t: (MagicMock(), f"https://x/PR{d:%d%m%y}.zip")
+    service.open_downloaded_body.side_effect = lambda *a, **k: io.BytesIO(b"zip")
+    service.parse_bhavcopy_file.side_effect = lambda body, url, d, f: _parsed([])
+    service.processed_result.side_effect = (
+        lambda started, d, processed, url, origin, timings: {"date": str(d.date()), "status": "SUCCESS"}
+    )
+    service.error_result.side_effect = lambda started, d, exc: {"date": str(d.date()), "status": "ERROR"}
+    service.not_found_result.side_effect = lambda started, d, t: {"date": str(d.date()), "status": "NOT_FOUND"}
+    return service
+
+
+class RangePipelineTests(unittest.TestCase):
+    def test_every_date_gets_one_result_in_input_order(self):
+        service = _service()
+        bad_day = datetime(2026, 7, 22)
+
+        def write(parsed, date_obj, force):
+            if date_obj == bad_day:
+                raise RuntimeError("deadlock")
+            return {"files_processed": 1, "data": {}}
+
+        service.write_parsed_bhavcopy.side_effect = write
+        dates = [datetime(2026, 7, d) for d in range(20, 25)]
+        seen = []
+
+        with patch("app.services.bhavcopy_pipeline.config") as cfg:
+            cfg.BHAVCOPY_ARCHIVE_ENABLED = False
+            run = BhavcopyRangePipeline(service, SETTINGS, on_result=seen.append).run(dates)
+
+        statuses = [r["status"] for r in run["results"]]
+        self.assertEqual([r["date"] for r in run["results"]], [str(d.date()) for d in dates])
+        self.assertEqual(statuses, ["SUCCESS", "SUCCESS", "ERROR", "SUCCESS", "SUCCESS"])
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(run["pipeline"]["stages"]["download"]["items"], 5)
+        self.assertEqual(run["pipeline"]["stages"]["write"]["items"], 5)
+
+    def test_raising_callbacks_and_handlers_do_not_hang_the_run(self):
+        service = _service()
+        service.write_parsed_bhavcopy.return_value = {"files_processed": 1, "data": {}}
+        broken_day = datetime(2026, 7, 21)
+
+        def parse(body, url, d, force):
+            if d == broken_day:
+                raise ValueError("bad csv")
+            return _parsed([])
+
+        def error_result(started, d, exc):
+            raise RuntimeError("error_result blew up")
+
+        def on_result(result):
+            raise RuntimeError("websocket closed")
+
+        service.parse_bhavcopy_file.side_effect = parse
+        service.error_result.side_effect = error_result
+        dates = [datetime(2026, 7, d) for d in range(20, 25)]
+        runs = []
+
+        with patch("app.services.bhavcopy_pipeline.config") as cfg:
+            cfg.BHAVCOPY_ARCHIVE_ENABLED = False
+            settings = dict(SETTINGS, parse_workers=1)
+            worker = threading.Thread(
+                target=lambda: runs.append(BhavcopyRangePipeline(service, settings, on_result=on_result).run(dates)),
+                daemon=True,
+            )
+            worker.start()
+            worker.join(timeout=10)
+
+        self.assertFalse(worker.is_alive(), "pipeline hung")
+        run = runs[0]
+        self.assertEqual(len(run["results"]), 4)  # the broken day has no result to report
+        self.assertEqual(run["pipeline"]["stages"]["parse"]["errors"], 1)
+
+    def test_parsed_chunks_stream_to_the_writer_with_bounded_memory(self):
+        service = _service()
+        lock = threading.Lock()
+        counts = {"live": 0, "peak": 0}
+        truncated_day, abandoned_day = datetime(2026, 7, 21), datetime(2026, 7, 23)
+        produced = {}
+
+        def parse(body, url, d, force):
+            def frames():
+                for i in range(20):
+                    if d == truncated_day and i == 5:
+                        raise ValueError("truncated csv")
+                    with lock:
+                        produced[d] = produced.get(d, 0) + 1
+                        counts["live"] += 1
+                        counts["peak"] = max(counts["peak"], counts["live"])
+                    yield i
+            return _parsed([{"table": "pr", "frames": frames(), "sample": []}])
+
+        def write(parsed, d, force):
+            rows = 0
+            for segment in parsed["segments"]:
+                for _ in segment["frames"]:
+                    with lock:
+                        counts["live"] -= 1
+                    if d == abandoned_day:
+                        raise RuntimeError("lost connection")
+                    time.sleep(0.001)
+                    rows += 1
+            return {"files_processed": 1, "data": {"rows": rows}}
+
+        service.parse_bhavcopy_file.side_effect = parse
+        service.write_parsed_bhavcopy.side_effect = write
+        service.processed_result.side_effect = (
+            lambda started, d, processed, url, origin, timings: {"date": str(d.date()), **processed["data"]}
+        )
+        dates = [datetime(2026, 7, d) for d in range(20, 25)]
+        runs = []
+
+        with patch("app.services.bhavcopy_pipeline.config") as cfg:
+            cfg.BHAVCOPY_ARCHIVE_ENABLED = False
+            settings = dict(SETTINGS, queue_size=4, parse_buffer_chunks=1)
+            worker = threading.Thread(
+                target=lambda: runs.append(BhavcopyRangePipeline(service, settings).run(dates)), daemon=True,
+            )
+            worker.start()
+            worker.join(timeout=10)
+
+        self.assertFalse(worker.is_alive(), "pipeline hung")
+        self.assertEqual(
+            [r.get("rows", r.get("status")) for r in runs[0]["results"]],
+            [20, "ERROR", 20, "ERROR", 20],
+        )
+        # two parse workers, each holding one buffered chunk plus the one it is putting
+        self.assertLessEqual(counts["peak"], 2 * (1 + 1))
+        self.assertLess(produced[abandoned_day], 20)
+
+    def test_not_found_short_circuits_parse_and_write(self):
+        service = _service()
+        service.download_bhavcopy.side_effect = lambda d, t: (None, None)
+
+        with patch("app.services.bhavcopy_pipeline.config") as cfg:
+            cfg.BHAVCOPY_ARCHIVE_ENABLED = False
+            run = BhavcopyRangePipeline(service, SETTINGS).run([datetime(2026, 7, 20)])
+
+        self.assertEqual(run["results"][0]["status"], "NOT_FOUND")
+        service.parse_bhavcopy_file.assert_not_called()
+        service.write_parsed_bhavcopy.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
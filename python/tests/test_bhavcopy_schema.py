@@ -0,0 +1,74 @@
+"""Unit tests for the typed bhavcopy segment schema registry."""
+from __future__ import annotations
+
+import unittest
+from datetime import date
+
+import pandas as pd
+
+from app.services.bhavcopy_schema import (
+    build_create_table_sql,
+    coerce_frame,
+    column_definition,
+    natural_key_name,
+)
+
+
+class SchemaDdlTests(unittest.TestCase):
+    def test_create_table_has_natural_key_and_typed_columns(self):
+        sql = build_create_table_sql("pd", ["SYMBOL", "EXTRA_COL"])
+
+        self.assertIn(f"UNIQUE KEY `{natural_key_name('pd')}`", sql)
+        self.assertIn("`CLOSE_PRICE` DECIMAL(18,4) NULL", sql)
+        self.assertIn("`SYMBOL` VARCHAR(64) NOT NULL DEFAULT ''", sql)
+        self.assertIn("`source_date` DATE NOT NULL", sql)
+        self.assertIn("`EXTRA_COL` TEXT NULL", sql)
+        self.assertIn("KEY `idx_pd_date_symbol` (`source_date`, `SYMBOL`)", sql)
+
+    def test_unknown_segment_columns_stay_text(self):
+        self.assertEqual(column_definition("tt", "ANYTHING"), "`ANYTHING` TEXT NULL")
+
+    def test_unregistered_segment_cannot_build_typed_table(self):
+        with self.assertRaises(ValueError):
+            build_create_table_sql("tt")
+
+
+class CoerceFrameTests(unittest.TestCase):
+    def test_numeric_text_and_key_columns_are_normalised(self):
+        df = pd.DataFrame({
+            "MKT": ["N", "N"],
+            "SYMBOL": [" ABC ", None],
+            "SERIES": ["EQ", "EQ"],
+            "CLOSE_PRICE": ["1,234.50", "-"],
+            "NET_TRDQTY": ["100", ""],
+            "source_date": [date(2026, 7, 20)] * 2,
+        })
+
+        out = coerce_frame("pd", df)
+
+        self.assertEqual(out["SYMBOL"].tolist(), ["ABC", ""])
+        self.assertEqual(out["CLOSE_PRICE"].iloc[0], 1234.5)
+        self.assertTrue(pd.isna(out["CLOSE_PRICE"].iloc[1]))
+        self.assertEqual(int(out["NET_TRDQTY"].iloc[0]), 100)
+        # SECURITY is part of the key but absent from the file
+        self.assertEqual(out["SECURITY"].tolist(), ["", ""])
+
+    def test_date_columns_parse_nse_formats(self):
+        df = pd.DataFrame({"SYMBOL": ["ABC"], "RECORD_DT": ["28-Jul-2025"], "EX_DT": [" "]})
+
+        out = coerce_frame("bc", df)
+
+        self.assertEqual(out["RECORD_DT"].iloc[0], date(2025, 7, 28))
+        self.assertIsNone(out["EX_DT"].iloc[0])
+
+    def test_udiff_headers_map_to_canonical_key(self):
+        df = pd.DataFrame({"TckrSymb": ["ABC"], "SctySrs": ["EQ"]})
+
+        out = coerce_frame("eq", df)
+
+        self.assertEqual(out["SYMBOL"].iloc[0], "ABC")
+        self.assertEqual(out["SERIES"].iloc[0], "EQ")
+
+
+if __name__ == "__main__":
+    unittest.main()
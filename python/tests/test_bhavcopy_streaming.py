@@ -0,0 +1,82 @@
+"""Unit tests for streamed bhavcopy download handling (no network / DB)."""
+from __future__ import annotations
+
+import io
+import unittest
+import zipfile
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from app.services.bhavcopy_service import BhavcopyService
+
+
+def _zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, text in members.items():
+            archive.writestr(name, text)
+    return buffer.getvalue()
+
+
+class SpoolResponseTests(unittest.TestCase):
+    def test_large_body_spills_to_disk_and_closes_response(self):
+        resp = MagicMock()
+        resp.iter_content.return_value = [b"x" * 1024] * 2048
+
+        with patch.dict("os.environ", {"BHAVCOPY_SPOOL_MEMORY_MB": "1"}):
+            spool = BhavcopyService().spool_response(resp)
+
+        with spool:
+            self.assertTrue(spool._rolled)
+            self.assertEqual(len(spool.read()), 2 * 1024 * 1024)
+        resp.close.assert_called_once()
+
+
+class ArchiveStreamingTests(unittest.TestCase):
+    def test_members_are_parsed_from_streams_in_chunks(self):
+        service = BhavcopyService()
+        body = io.BytesIO(_zip_bytes({
+            "Pd200726.csv": "SYMBOL,CLOSE_PRICE\nABC,1\nXYZ,2\n",
+            "readme.txt": "ignored",
+        }))
+        seen = []
+
+        def fake_stream(stream, file_name, *args, **kwargs):
+            seen.append((file_name, sum(len(c) for c in service.read_csv_chunks(stream))))
+            return 1
+
+        with patch.object(service, "process_csv_stream", side_effect=fake_stream), \
+                patch.object(service, "is_date_processed", return_value=True):
+            result = service.process_bhavcopy_file(
+                body, "https://x/PR200726.zip", datetime(2026, 7, 20)
+            )
+
+        self.assertEqual(seen, [("Pd200726.csv", 2)])
+        self.assertEqual(result["files_processed"], 1)
+
+    def test_parse_reads_nothing_until_the_writer_drains_it(self):
+        service = BhavcopyService()
+        body = io.BytesIO(_zip_bytes({
+            "Pd200726.csv": "SYMBOL,CLOSE_PRICE\nABC,1\nXYZ,2\n",
+            "Bc200726.csv": "SYMBOL,SERIES\nABC,EQ\n",
+        }))
+        loaded = []
+
+        def load_segment(table_name, frames, date_key, sample, result_data):
+            loaded.append((table_name, sum(len(chunk) for chunk in frames)))
+            return 1
+
+        with patch.object(service, "is_date_processed", return_value=False), \
+                patch.object(service, "read_csv_chunks", wraps=service.read_csv_chunks) as reads, \
+                patch.object(service, "load_segment", side_effect=load_segment), \
+                patch.object(service, "write_missing_markers"):
+            parsed = service.parse_bhavcopy_file(body, "https://x/PR200726.zip", datetime(2026, 7, 20))
+            reads.assert_not_called()
+            result = service.write_parsed_bhavcopy(parsed, datetime(2026, 7, 20))
+
+        self.assertEqual([rows for _, rows in loaded], [2, 1])
+        self.assertEqual(result["files_processed"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Unit tests for the bounded executor used by blocking route handlers."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from app.utils.blocking import BlockingExecutor, LoopLagMonitor, percentile
+
+
+class BlockingExecutorTests(unittest.IsolatedAsyncioTestCase):
+    async def test_family_limit_caps_concurrent_calls(self):
+        executor = BlockingExecutor(max_workers=4)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+            return threading.current_thread().name
+
+        with patch.dict("os.environ", {"API_CONCURRENCY_BHAVCOPY_INGEST": "1"}):
+            names = await asyncio.gather(*[executor.run("bhavcopy_ingest", work) for _ in range(3)])
+
+        self.assertEqual(max(peak), 1)
+        self.assertTrue(all(n.startswith("api-blocking") for n in names))
+        stats = executor.stats()["families"]["bhavcopy_ingest"]
+        self.assertEqual((stats["completed"], stats["in_flight"], stats["waiting"]), (3, 0, 0))
+        executor.shutdown()
+
+    async def test_event_loop_stays_responsive_while_work_blocks(self):
+        executor = BlockingExecutor(max_workers=2)
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+
+        await executor.run("bhavcopy_ingest", time.sleep, 0.2)
+        monitor.stop()
+
+        self.assertGreater(monitor.stats()["samples"], 5)
+        self.assertLess(monitor.stats()["lag_p99_seconds"], 0.1)
+        executor.shutdown()
+
+    async def test_failures_are_counted_and_reraised(self):
+        executor = BlockingExecutor(max_workers=1)
+
+        with self.assertRaises(ValueError):
+            await executor.run("bhavcopy_read", int, "not-a-number")
+
+        self.assertEqual(executor.stats()["families"]["bhavcopy_read"]["failed"], 1)
+        executor.shutdown()
+
+
+class PercentileTests(unittest.TestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 99))
+
+
+if __name__ == "__main__":
+    unittest.main()
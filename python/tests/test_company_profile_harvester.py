@@ -0,0 +1,91 @@
+"""Unit tests for the parallel company-profile harvester (Yahoo and MySQL are faked)."""
+from __future__ import annotations
+
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from app.services.company_profile_harvester import CompanyProfileHarvester, stale_first
+from app.utils.rate_limiter import AdaptiveTokenBucket
+
+
+class FakeService:
+    def __init__(self):
+        self.batches = []
+
+    def save_company_profiles(self, profiles):
+        self.batches.append([p["symbol"] for p in profiles])
+
+
+class AdaptiveTokenBucketTests(unittest.TestCase):
+    def test_throttle_halves_rate_and_success_recovers(self):
+        bucket = AdaptiveTokenBucket(rate=1.0, min_rate=0.1, max_rate=2.0, increase=0.25, cooldown=0.01)
+
+        self.assertEqual(bucket.throttled(), 0.01)
+        self.assertEqual(bucket.throttled(), 0.02)  # consecutive 429s back off harder
+        self.assertEqual(bucket.rate, 0.25)
+        bucket.succeeded()
+        self.assertEqual(bucket.rate, 0.5)
+        self.assertEqual(bucket.throttled(), 0.01)  # streak reset by the success
+        self.assertEqual(bucket.stats()["throttled"], 3)
+
+
+class CompanyProfileHarvesterTests(unittest.TestCase):
+    def _harvester(self, service, fetch_info, workers=3):
+        limiter = AdaptiveTokenBucket(rate=1000, burst=1000, cooldown=0.01)
+        harvester = CompanyProfileHarvester(service, workers=workers, limiter=limiter, fetch_info=fetch_info)
+        harvester.min_age_hours = 6
+        harvester.write_batch = 2
+        return harvester
+
+    def test_stale_first_skips_fresh_profiles(self):
+        now = datetime(2026, 10, 18, 12)
+        targets = [
+            ("FRESH.NS", now - timedelta(hours=1)),
+            ("OLD.NS", now - timedelta(days=3)),
+            ("NEW.NS", None),
+            ("OLDER.NS", now - timedelta(days=9)),
+        ]
+        self.assertEqual(stale_first(targets, 6, now=now), (["NEW.NS", "OLDER.NS", "OLD.NS"], 1))
+
+    def test_429_is_retried_after_backoff_and_rows_are_batched(self):
+        calls, lock = {}, threading.Lock()
+
+        def fetch_info(symbol):
+            with lock:
+                calls[symbol] = calls.get(symbol, 0) + 1
+                first = calls[symbol] == 1
+            if symbol == "B.NS" and first:
+                raise Exception("429 Client Error: Too Many Requests")
+            if symbol == "EMPTY.NS":
+                return {}
+            if symbol == "BAD.NS":
+                raise ValueError("boom")
+            return {"symbol": symbol, "longName": symbol}
+
+        service = FakeService()
+        harvester = self._harvester(service, fetch_info)
+        stats = harvester.run([(s, None) for s in ("A.NS", "B.NS", "C.NS", "EMPTY.NS", "BAD.NS")])
+
+        self.assertEqual(calls["B.NS"], 2)
+        self.assertEqual(sorted(s for batch in service.batches for s in batch), ["A.NS", "B.NS", "C.NS"])
+        self.assertTrue(all(len(batch) <= 2 for batch in service.batches))
+        self.assertEqual(
+            {k: stats[k] for k in ("success", "failed", "no_data", "throttled")},
+            {"success": 3, "failed": 1, "no_data": 1, "throttled": 1},
+        )
+        self.assertLess(harvester.limiter.rate, 1000)
+
+    def test_time_budget_defers_the_rest(self):
+        service = FakeService()
+        harvester = self._harvester(service, lambda s: {"symbol": s}, workers=1)
+        harvester.max_run_seconds = 0
+
+        stats = harvester.run([(f"S{i}.NS", None) for i in range(5)])
+
+        self.assertEqual(stats["deferred"], 5)
+        self.assertEqual(service.batches, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+"""Unit tests for the optional env helpers in app.config."""
+from __future__ import annotations
+
+import os
+import unittest
+from unittest.mock import patch
+
+from app.config import optional_env_float, optional_env_int
+
+
+class OptionalEnvTests(unittest.TestCase):
+    def test_unset_empty_and_malformed_fall_back_to_default(self):
+        with patch.dict(os.environ, {"X_EMPTY": "", "X_BAD": "lots"}):
+            os.environ.pop("X_UNSET", None)
+            for key in ("X_UNSET", "X_EMPTY", "X_BAD"):
+                self.assertEqual(optional_env_int(key, 4, minimum=1), 4)
+                self.assertEqual(optional_env_float(key, 0.5, minimum=0.01), 0.5)
+
+    def test_values_and_defaults_are_clamped_to_minimum(self):
+        with patch.dict(os.environ, {"X_INT": "0", "X_FLOAT": "-3", "X_BAD": "?"}):
+            self.assertEqual(optional_env_int("X_INT", 4, minimum=1), 1)
+            self.assertEqual(optional_env_int("X_INT", 4), 0)
+            self.assertEqual(optional_env_float("X_FLOAT", 1.0, minimum=0.01), 0.01)
+            self.assertEqual(optional_env_int("X_BAD", 0, minimum=1), 1)
+        with patch.dict(os.environ, {"X_FLOAT": "2.5"}):
+            self.assertEqual(optional_env_float("X_FLOAT", 1.0), 2.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""Unit tests for write-behind cron progress logging (DB is mocked)."""
+from __future__ import annotations
+
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.services.cron_logger_service import CronLoggerService, CronProgressBuffer
+
+
+class ProgressBufferTests(unittest.TestCase):
+    def test_updates_coalesce_per_log_id(self):
+        writer = MagicMock(return_value=1)
+        buffer = CronProgressBuffer(writer, interval=60)
+
+        buffer.put(7, {"records_processed": 1}, {"phase": "download", "nested": {"a": 1}})
+        buffer.put(7, {"records_processed": 5}, {"phase": "parse", "nested": {"b": 2}})
+        buffer.flush()
+
+        batch = writer.call_args.args[0]
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(batch[0]["counters"], {"records_processed": 5})
+        self.assertEqual(batch[0]["data"], {"phase": "parse", "nested": {"a": 1, "b": 2}})
+        self.assertEqual(buffer.stats()["coalesced"], 1)
+
+    def test_failed_flush_is_requeued_under_newer_updates(self):
+        writer = MagicMock(side_effect=[RuntimeError("db down"), 1])
+        buffer = CronProgressBuffer(writer, interval=60)
+
+        buffer.put(7, {"records_processed": 1}, {"phase": "old", "keep": True})
+        buffer.flush()
+        buffer.put(7, {"records_processed": 9}, {"phase": "new"})
+        buffer.flush()
+
+        entry = writer.call_args.args[0][0]
+        self.assertEqual(entry["counters"]["records_processed"], 9)
+        self.assertEqual(entry["data"], {"phase": "new", "keep": True})
+        self.assertEqual(buffer.stats()["failures"], 1)
+
+    def test_full_buffer_drops_instead_of_blocking(self):
+        buffer = CronProgressBuffer(MagicMock(), interval=60)
+
+        with patch.dict("os.environ", {"CRON_PROGRESS_MAX_PENDING": "1"}):
+            self.assertTrue(buffer.put(1, {}, {"x": 1}))
+            self.assertFalse(buffer.put(2, {}, {"x": 1}))
+            self.assertTrue(buffer.put(1, {}, {"x": 2}))
+
+        self.assertEqual(buffer.stats()["dropped"], 1)
+
+
+class EndJobTests(unittest.TestCase):
+    def test_end_job_folds_pending_progress_into_one_update(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        with patch("app.services.cron_logger_service.db_manager") as manager:
+            manager.get_connection.return_value = conn
+            service = CronLoggerService()
+            service.table_created = True
+            service.update_running_job(3, records_processed=2, additional_data={"phase": "writing"})
+            service.end_job(3, records_processed=4, additional_data={"phase": "done", "rows": 10})
+
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        self.assertFalse(any("FROM cron_job_logs" in s for s in statements))
+        self.assertIn("JSON_MERGE_PATCH", statements[-1])
+        params = cursor.execute.call_args.args[1]
+        self.assertEqual(json.loads(params[8]), {"phase": "done", "rows": 10})
+        self.assertEqual(service.progress.stats()["pending"], 0)
+
+
+class RollupTests(unittest.TestCase):
+    def _service(self):
+        service = CronLoggerService()
+        service.table_created = True
+        service.rollup_ready = True
+        return service
+
+    def test_end_job_folds_the_run_into_the_daily_rollup(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.rowcount = 1
+        with patch("app.services.cron_logger_service.db_manager") as manager:
+            manager.get_connection.return_value = conn
+            self._service().end_job(5, status="FAILED")
+
+        update, rollup = [c.args for c in cursor.execute.call_args_list[-2:]]
+        self.assertTrue(update[0].strip().startswith("UPDATE cron_job_logs"))
+        self.assertIn("INSERT INTO cron_job_daily_rollup", rollup[0])
+        self.assertIn("WHERE id = %s", rollup[0])
+        self.assertEqual(rollup[1], (5,))
+        conn.commit.assert_called_once()
+
+    def test_end_job_after_clear_stuck_running_is_not_rolled_up_twice(self):
+        row = {"status": "RUNNING"}
+        rollups = []
+
+        def execute(sql, params=None):
+            if sql.lstrip().startswith("SELECT id"):
+                cursor.fetchall.return_value = [(9,)] if row["status"] == "RUNNING" else []
+            elif sql.lstrip().startswith("UPDATE cron_job_logs"):
+                closing = row["status"] == "RUNNING"
+                if closing:
+                    row["status"] = "FAILED" if "'FAILED'" in sql else params[2]
+                cursor.rowcount = int(closing)
+            elif "cron_job_daily_rollup" in sql:
+                rollups.append(row["status"])
+
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.execute.side_effect = execute
+        with patch("app.services.cron_logger_service.db_manager") as manager:
+            manager.get_connection.return_value = conn
+            service = self._service()
+            self.assertEqual(service.clear_stuck_running()["cleared"], 1)
+            service.end_job(9, status="SUCCESS")
+            service.end_job(9, status="SUCCESS")
+
+        self.assertEqual(row["status"], "FAILED")
+        self.assertEqual(rollups, ["FAILED"])
+
+    def test_stats_read_rollup_with_separate_filtered_shape(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        with patch("app.services.cron_logger_service.db_manager") as manager:
+            manager.get_connection.return_value = conn
+            service = self._service()
+            service.get_job_stats("bhavcopy", days=30)
+            filtered = cursor.execute.call_args.args
+            service.get_job_stats(None, days=30)
+            unfiltered = cursor.execute.call_args.args
+
+        self.assertIn("FROM cron_job_daily_rollup", filtered[0])
+        self.assertIn("job_name = %s AND run_date >=", filtered[0])
+        self.assertEqual(filtered[1], ("bhavcopy", 30))
+        self.assertNotIn("IS NULL", unfiltered[0])
+        self.assertNotIn("job_name = %s", unfiltered[0])
+        self.assertEqual(unfiltered[1], (30,))
+
+
+if __name__ == "__main__":
+    unittest.main()
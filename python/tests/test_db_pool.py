@@ -0,0 +1,63 @@
+"""Unit tests for the pooled engine registry (no live MySQL required)."""
+from __future__ import annotations
+
+import unittest
+from unittest.mock import MagicMock
+
+from app.database.connection import DatabaseManager, PooledConnection
+
+
+class EngineRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.manager = DatabaseManager()
+
+    def tearDown(self):
+        self.manager.dispose_engines()
+
+    def test_engine_is_cached_per_database(self):
+        first = self.manager.get_sqlalchemy_engine("bhav")
+        second = self.manager.get_sqlalchemy_engine("bhav")
+        other = self.manager.get_sqlalchemy_engine("sm")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(self.manager.get_pool_metrics()["engines_created"], 2)
+
+    def test_pool_metrics_reports_each_pool(self):
+        self.manager.get_sqlalchemy_engine("bhav")
+        self.manager.get_sqlalchemy_engine(None)
+
+        pools = self.manager.get_pool_metrics()["pools"]
+
+        self.assertEqual(set(pools), {"bhav", "<server>"})
+        self.assertEqual(pools["bhav"]["checked_out"], 0)
+        self.assertEqual(pools["bhav"]["pool_size"], self.manager.config.DB_POOL_SIZE)
+
+    def test_dispose_clears_registry(self):
+        engine = self.manager.get_sqlalchemy_engine("bhav")
+        self.manager.dispose_engines()
+        self.assertIsNot(engine, self.manager.get_sqlalchemy_engine("bhav"))
+
+
+class PooledConnectionTests(unittest.TestCase):
+    def test_close_returns_to_pool_once(self):
+        pooled = MagicMock()
+        conn = PooledConnection(pooled, cursorclass=object)
+
+        with conn:
+            pass
+        conn.close()
+
+        pooled.close.assert_called_once()
+
+    def test_cursor_uses_default_cursorclass(self):
+        pooled = MagicMock()
+        conn = PooledConnection(pooled, cursorclass="dict")
+
+        conn.cursor()
+
+        pooled.driver_connection.cursor.assert_called_once_with("dict")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Unit tests for the DAG-aware formula refresh scheduler (Node is faked)."""
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from app.services.formula_scheduler import ROLLING_FORMULAS, FormulaRefreshScheduler
+
+
+class FakeNode:
+    """Records every call; answers in the batched response shape."""
+
+    def __init__(self, delay: float = 0.02, fail_dates=()):
+        self.delay = delay
+        self.fail_dates = set(fail_dates)
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, trigger_source, trade_dates=None, job_meta=None, formulas=None, exclude_formulas=None):
+        phase = "rolling" if formulas else "independent"
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            call = {"phase": phase, "dates": list(trade_dates), "start": time.perf_counter()}
+            self.calls.append(call)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+            call["end"] = time.perf_counter()
+        results = [
+            {"trade_date": d, "success": d not in self.fail_dates, "duration_ms": 1500}
+            for d in trade_dates
+        ]
+        return {"success": True, "duration_seconds": self.delay, "response": {"results": results}}
+
+
+DATES = [f"2025-01-{day:02d}" for day in (2, 3, 6, 7, 8, 9, 10)]
+
+
+class FormulaSchedulerTests(unittest.TestCase):
+    def test_independent_batches_overlap_and_rolling_chain_stays_ordered(self):
+        node = FakeNode()
+        outcome = FormulaRefreshScheduler("test", concurrency=3, batch_size=2, trigger=node).run(DATES)
+
+        independent = [c for c in node.calls if c["phase"] == "independent"]
+        rolling = [c for c in node.calls if c["phase"] == "rolling"]
+        self.assertEqual(len(independent), 4)
+        self.assertGreater(node.max_in_flight, 1)
+        self.assertEqual([d for c in rolling for d in c["dates"]], DATES)
+        for previous, current in zip(rolling, rolling[1:]):
+            self.assertGreaterEqual(current["start"], previous["end"])
+        for call in rolling:
+            covering = [c for c in independent if c["dates"][0] <= call["dates"][-1]]
+            self.assertTrue(all(call["start"] >= c["end"] for c in covering))
+
+        self.assertTrue(all(r["success"] for r in outcome["results"]))
+        schedule = outcome["schedule"]
+        self.assertEqual(schedule["requests"], 8)
+        self.assertEqual(schedule["latency"]["per_date"]["count"], len(DATES))
+        self.assertEqual(schedule["latency"]["per_date"]["p50_seconds"], 3.0)
+
+    def test_failed_independent_date_is_not_sent_to_rolling(self):
+        node = FakeNode(delay=0, fail_dates={"2025-01-03"})
+        outcome = FormulaRefreshScheduler("test", concurrency=2, batch_size=5, trigger=node).run(DATES[:3])
+
+        rolling_dates = [d for c in node.calls if c["phase"] == "rolling" for d in c["dates"]]
+        self.assertEqual(rolling_dates, ["2025-01-02", "2025-01-06"])
+        failed = {r["trade_date"]: r for r in outcome["results"] if not r["success"]}
+        self.assertEqual(list(failed), ["2025-01-03"])
+        self.assertTrue(failed["2025-01-03"]["phases"]["rolling"]["skipped"])
+
+    def test_rolling_formulas_are_excluded_from_independent_requests(self):
+        seen = []
+
+        def trigger(source, **kwargs):
+            seen.append((kwargs.get("formulas"), kwargs.get("exclude_formulas")))
+            return {"success": True, "duration_seconds": 0.1}
+
+        FormulaRefreshScheduler("test", concurrency=1, batch_size=5, trigger=trigger).run(DATES[:2])
+
+        self.assertEqual(seen, [(None, list(ROLLING_FORMULAS)), (list(ROLLING_FORMULAS), None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Unit tests for the SQLite-backed background job queue."""
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from app.services.job_queue import DurableJobQueue
+
+
+class DurableJobQueueTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "jobs.sqlite3")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _queue(self, **handlers):
+        queue = DurableJobQueue(path=self.path, poll_interval=0.01)
+        for job_type, fn in handlers.items():
+            queue.register(job_type, fn, lane="bhavcopy")
+        return queue
+
+    def _wait_for(self, queue, job_id, status, timeout=2.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if queue.get(job_id)["status"] == status:
+                return
+            time.sleep(0.01)
+        self.fail(f"job {job_id} never reached {status}")
+
+    def test_identical_pending_jobs_are_deduplicated(self):
+        queue = self._queue(fetch_range=lambda *a: None)
+
+        first = queue.enqueue("fetch_range", "2026-07-01", "2026-07-03", False)
+        again = queue.enqueue("fetch_range", "2026-07-01", "2026-07-03", False)
+        other = queue.enqueue("fetch_range", "2026-07-01", "2026-07-04", False)
+
+        self.assertFalse(first["deduplicated"])
+        self.assertTrue(again["deduplicated"])
+        self.assertEqual(again["id"], first["id"])
+        self.assertNotEqual(other["id"], first["id"])
+        self.assertEqual(other["position"], 2)
+        self.assertEqual(queue.stats()["lanes"]["bhavcopy"]["depth"], 2)
+
+    def test_lane_runs_jobs_one_at_a_time(self):
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def handler(_):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+        queue = self._queue(fetch=handler)
+        ids = [queue.enqueue("fetch", day)["id"] for day in range(4)]
+        queue.start()
+        try:
+            for job_id in ids:
+                self._wait_for(queue, job_id, "SUCCESS")
+        finally:
+            queue.stop()
+
+        self.assertEqual(peak[0], 1)
+        lane = queue.stats()["lanes"]["bhavcopy"]
+        self.assertEqual(lane["by_status"], {"SUCCESS": 4})
+        self.assertIsNotNone(lane["wait_p99_seconds"])
+
+    def test_interrupted_job_resumes_after_restart(self):
+        crashed = self._queue(fetch=lambda day: None)
+        job_id = crashed.enqueue("fetch", "2026-07-01")["id"]
+        self.assertEqual(crashed._claim("bhavcopy")["id"], job_id)  # process dies mid-run
+
+        ran = []
+        restarted = self._queue(fetch=ran.append)
+        restarted.start()
+        try:
+            self._wait_for(restarted, job_id, "SUCCESS")
+        finally:
+            restarted.stop()
+
+        self.assertEqual(ran, ["2026-07-01"])
+        self.assertEqual(restarted.get(job_id)["attempts"], 2)
+
+    def test_failed_handler_records_error(self):
+        def boom(_):
+            raise RuntimeError("nse down")
+
+        queue = self._queue(fetch=boom)
+        job_id = queue.enqueue("fetch", "2026-07-01")["id"]
+        queue.run_job(queue._claim("bhavcopy"))
+
+        job = queue.get(job_id)
+        self.assertEqual(job["status"], "FAILED")
+        self.assertEqual(job["error"], "nse down")
+
+
+if __name__ == "__main__":
+    unittest.main()
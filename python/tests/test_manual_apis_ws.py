@@ -104,9 +104,11 @@ async def ws_listen_for(
                     data = json.loads(raw)
                 except Exception:
                     continue
-                et = data.get("type")
-                if et and et != "pong":
-                    seen.append(et)
+                # Bursts arrive as one {"type": "batch", "events": [...]} frame
+                for event in data.get("events", []) if data.get("type") == "batch" else [data]:
+                    et = event.get("type")
+                    if et and et != "pong":
+                        seen.append(et)
                 if any(t in seen for t in expected_types):
                     return True, seen, "got expected event"
             return (
@@ -130,6 +132,14 @@ def main() -> int:
     ok, code, body = http("GET", f"{BACKEND_BASE}/vap/", expect_status=[200, 404])
     record("Backend reachable", ok or code in (200, 404), f"HTTP {code}")
 
+    ok, code, body = http("GET", f"{PYTHON_BASE}/loop-health")
+    lag = body.get("event_loop", {}) if isinstance(body, dict) else {}
+    record(
+        "GET /loop-health",
+        ok and "lag_p99_seconds" in lag,
+        f"HTTP {code} lag_p99={lag.get('lag_p99_seconds')}",
+    )
+
     # --- WebSocket core ---
     ok, detail = asyncio.run(ws_roundtrip())
     record("WebSocket connect + ping/pong", ok, detail)
@@ -8,6 +8,14 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from app.services.manual_job_hub import ManualJobHub
 
 
+def _client():
+    ws = MagicMock()
+    ws.accept = AsyncMock()
+    ws.send_json = AsyncMock()
+    ws.close = AsyncMock()
+    return ws
+
+
 class ManualJobHubTests(unittest.IsolatedAsyncioTestCase):
     async def test_connect_sends_connected(self):
         hub = ManualJobHub()
@@ -22,11 +30,12 @@ class ManualJobHubTests(unittest.IsolatedAsyncioTestCase):
         payload = ws.send_json.await_args.args[0]
         self.assertEqual(payload["type"], "connected")
         self.assertIn(ws, hub._connections)
+        hub.disconnect(ws)
 
     async def test_disconnect_removes_client(self):
         hub = ManualJobHub()
-        ws = MagicMock()
-        hub._connections.add(ws)
+        ws = _client()
+        await hub.connect(ws)
         hub.disconnect(ws)
         self.assertNotIn(ws, hub._connections)
 
@@ -36,13 +45,12 @@ class ManualJobHubTests(unittest.IsolatedAsyncioTestCase):
         hub.emit("job_queued", job_label="test")
 
     async def test_emit_broadcasts_to_clients(self):
-        hub = ManualJobHub()
+        hub = ManualJobHub(batch_interval=0.01)
         loop = asyncio.get_running_loop()
         hub.set_loop(loop)
 
-        ws = MagicMock()
-        ws.send_json = AsyncMock()
-        hub._connections.add(ws)
+        ws = _client()
+        await hub.connect(ws)
 
         hub.emit("job_started", job_name="formula_manual_range", log_id=1)
         await asyncio.sleep(0.05)
@@ -51,6 +59,49 @@ class ManualJobHubTests(unittest.IsolatedAsyncioTestCase):
         payload = ws.send_json.await_args.args[0]
         self.assertEqual(payload["type"], "job_started")
         self.assertEqual(payload["job_name"], "formula_manual_range")
+        hub.disconnect(ws)
+
+    async def test_progress_bursts_coalesce_into_one_batched_frame(self):
+        hub = ManualJobHub(batch_interval=0.02)
+        hub.set_loop(asyncio.get_running_loop())
+        ws = _client()
+        await hub.connect(ws)
+
+        hub.emit("job_started", job_name="bhavcopy_manual_range", log_id=4)
+        for i in range(20):
+            hub.emit("job_progress", job_name="bhavcopy_manual_range", log_id=4, step=i)
+        await asyncio.sleep(0.1)
+
+        frame = ws.send_json.await_args.args[0]
+        self.assertEqual(frame["type"], "batch")
+        self.assertEqual([e["type"] for e in frame["events"]], ["job_started", "job_progress"])
+        self.assertEqual(frame["events"][1]["step"], 19)
+        client = hub.stats()["per_client"][0]
+        self.assertEqual(client["coalesced"], 19)
+        self.assertEqual(client["frames"], 1)
+        hub.disconnect(ws)
+
+    async def test_slow_client_does_not_stall_others(self):
+        hub = ManualJobHub(queue_size=2, batch_interval=0, send_timeout=0.05)
+        hub.set_loop(asyncio.get_running_loop())
+        fast, slow = _client(), _client()
+        await hub.connect(fast)
+        await hub.connect(slow)
+
+        async def hang(_):
+            await asyncio.sleep(10)
+
+        slow.send_json.side_effect = hang
+        hub.emit("job_finished", job_name="x", log_id=1)
+        await asyncio.sleep(0.02)
+
+        self.assertEqual(fast.send_json.await_args.args[0]["type"], "job_finished")
+        await asyncio.sleep(0.1)
+        self.assertNotIn(slow, hub._connections)
+        self.assertIn(fast, hub._connections)
+        slow.close.assert_awaited_once_with(code=1011)
+        hub.disconnect(fast)
+        fast.close.assert_not_awaited()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,73 @@
+"""Unit tests for the vectorized market_data backfill (yfinance and MySQL are faked)."""
+from __future__ import annotations
+
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from app.services.market_data_backfill import MarketDataBackfill, market_data_frame
+
+DAYS = pd.to_datetime(["2026-10-14", "2026-10-15", "2026-10-16"])
+
+
+def _download_frame(tickers):
+    frames = {}
+    for n, symbol in enumerate(tickers, start=1):
+        frames[symbol] = pd.DataFrame(
+            {"Open": [1.0 * n] * 3, "High": [2.0 * n] * 3, "Low": [0.5 * n] * 3,
+             "Close": [1.5 * n, 1.6 * n, 1.7 * n], "Adj Close": [1.5 * n] * 3, "Volume": [10.0, 20.0, 30.0]},
+            index=DAYS,
+        )
+    return pd.concat(frames, axis=1)
+
+
+class MarketDataBackfillTests(unittest.TestCase):
+    def test_frame_reshape_and_latest_only(self):
+        frame = _download_frame(["A.NS", "B.NS"])
+        frame.loc[DAYS[2], ("B.NS", "Close")] = np.nan
+        frame.loc[DAYS[0], ("A.NS", "High")] = np.inf
+
+        rows = market_data_frame(frame, ["A.NS", "B.NS"])
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(pd.isna(rows.loc[(rows.symbol == "A.NS") & (rows.date == date(2026, 10, 14)), "high"]).all())
+
+        latest = market_data_frame(frame, ["A.NS", "B.NS"], latest_only=True)
+        self.assertEqual(
+            list(zip(latest["symbol"], latest["date"])),
+            [("A.NS", date(2026, 10, 16)), ("B.NS", date(2026, 10, 15))],
+        )
+
+    def test_run_writes_one_upsert_per_batch_and_reports_throughput(self):
+        calls = []
+
+        def download(tickers, **kwargs):
+            calls.append((list(tickers), kwargs.get("start"), kwargs.get("end")))
+            if "BAD.NS" in tickers:
+                raise RuntimeError("yahoo down")
+            return _download_frame(tickers)
+
+        cursor = MagicMock()
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        engine = MarketDataBackfill(batch_size=2, download=download)
+        engine.limiter.rate = 1000
+        with patch("app.services.market_data_backfill.db_manager") as db:
+            db.get_connection.return_value = conn
+            stats = engine.run(["A.NS", "B.NS", "C.NS", "BAD.NS"], start=date(2026, 10, 14), end=date(2026, 10, 16))
+
+        self.assertEqual(calls[0], (["A.NS", "B.NS"], "2026-10-14", "2026-10-17"))  # end is inclusive
+        self.assertEqual(cursor.executemany.call_count, 1)
+        self.assertEqual(len(cursor.executemany.call_args.args[1]), 6)
+        self.assertEqual(cursor.executemany.call_args.args[1][0], ("A.NS", date(2026, 10, 14), 1.0, 2.0, 0.5, 1.5, 10))
+        self.assertEqual(
+            {k: stats[k] for k in ("batches", "failed_batches", "rows_saved", "symbols_with_data")},
+            {"batches": 2, "failed_batches": 1, "rows_saved": 6, "symbols_with_data": 2},
+        )
+        self.assertIsNotNone(stats["rows_per_second"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Unit tests for the batched market_data refresh (yfinance, MySQL and cron logging are faked)."""
+from __future__ import annotations
+
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from app.services.company_profile_service import CompanyProfileService
+
+DAYS = pd.to_datetime(["2026-10-15", "2026-10-16"])
+
+
+def _download_frame(tickers):
+    frames = {
+        symbol: pd.DataFrame(
+            {"Open": [1.0, 2.0], "High": [3.0, 4.0], "Low": [0.5, 1.5], "Close": [2.0, 3.0], "Volume": [10, 20]},
+            index=DAYS,
+        )
+        for symbol in tickers
+        if symbol != "GONE.NS"
+    }
+    return pd.concat(frames, axis=1)
+
+
+class MarketDataBatchTests(unittest.TestCase):
+    def test_one_executemany_per_batch_on_one_connection(self):
+        service = CompanyProfileService()
+        service.ensure_tables_exist = lambda: None
+        service.get_symbols = lambda: ["A.NS", "B.NS", "GONE.NS", "C.NS", "D.NS"]
+
+        cursor = MagicMock()
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        empty_history = MagicMock()
+        empty_history.history.return_value = pd.DataFrame()
+
+        env = {"MARKET_FETCH_RATE_PER_SECOND": "1000", "MARKET_FETCH_DOWNLOAD_WORKERS": "2"}
+        with patch.dict(os.environ, env), \
+                patch("app.services.company_profile_service.config.MARKET_FETCH_BATCH_SIZE", 2, create=True), \
+                patch("app.services.company_profile_service.db_manager") as db, \
+                patch("app.services.company_profile_service.CronJobContext"), \
+                patch("app.services.company_profile_service.yf") as yf:
+            db.get_connection.return_value = conn
+            yf.download.side_effect = lambda tickers, **kwargs: _download_frame(tickers)
+            yf.Ticker.return_value = empty_history
+            result = service.fetch_and_save_market_data()
+
+        self.assertEqual(db.get_connection.call_count, 1)
+        self.assertEqual(yf.download.call_count, 3)
+        self.assertEqual(cursor.executemany.call_count, 3)
+        self.assertEqual(conn.commit.call_count, 3)
+        written = sorted(row for call in cursor.executemany.call_args_list for row in call.args[1])
+        self.assertEqual([row[0] for row in written], ["A.NS", "B.NS", "C.NS", "D.NS"])
+        self.assertEqual(written[0][2:], (2.0, 4.0, 1.5, 3.0, 20.0))
+        self.assertEqual((result["success"], result["failed"]), (4, 1))
+        self.assertIsNotNone(result["rows_per_second"])
+        conn.close.assert_called_once()
+
+    def test_failed_batch_write_is_rolled_back_and_the_run_continues(self):
+        service = CompanyProfileService()
+        service.ensure_tables_exist = lambda: None
+        service.get_symbols = lambda: ["A.NS", "B.NS", "C.NS", "D.NS"]
+
+        cursor = MagicMock()
+        written = []
+
+        def executemany(sql, rows):
+            if any(row[0] == "A.NS" for row in rows):
+                raise RuntimeError("deadlock")
+            written.extend(row[0] for row in rows)
+
+        cursor.executemany.side_effect = executemany
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        env = {"MARKET_FETCH_RATE_PER_SECOND": "1000", "MARKET_FETCH_DOWNLOAD_WORKERS": "1"}
+        with patch.dict(os.environ, env), \
+                patch("app.services.company_profile_service.config.MARKET_FETCH_BATCH_SIZE", 2, create=True), \
+                patch("app.services.company_profile_service.db_manager") as db, \
+                patch("app.services.company_profile_service.CronJobContext"), \
+                patch("app.services.company_profile_service.yf") as yf:
+            db.get_connection.return_value = conn
+            yf.download.side_effect = lambda tickers, **kwargs: _download_frame(tickers)
+            result = service.fetch_and_save_market_data()
+
+        self.assertEqual(sorted(written), ["C.NS", "D.NS"])
+        conn.rollback.assert_called_once()
+        self.assertEqual((result["success"], result["failed"]), (2, 2))
+
+    def test_overlapping_batches_each_get_only_their_own_tickers(self):
+        # Mimics yfinance 0.2.x: every download() resets and refills one module-level dict.
+        shared = {}
+
+        def download(tickers, **kwargs):
+            shared.clear()
+            for symbol in tickers:
+                time.sleep(0.002)
+                shared[symbol] = _download_frame([symbol])[symbol]
+            time.sleep(0.01)
+            return pd.concat(dict(shared), axis=1)
+
+        service = CompanyProfileService()
+        limiter = MagicMock()
+        batches = [[f"A{i}.NS" for i in range(20)], [f"B{i}.NS" for i in range(20)]]
+        results = {}
+
+        def run(batch):
+            tickers, df, error = service._download_market_batch(batch, limiter)
+            results[tickers[0]] = (sorted(df.columns.get_level_values(0).unique()), error)
+
+        with patch("app.services.company_profile_service.yf") as yf:
+            yf.download.side_effect = download
+            workers = [threading.Thread(target=run, args=(batch,)) for batch in batches]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join(timeout=10)
+
+        for batch in batches:
+            self.assertEqual(results[batch[0]], (sorted(batch), None))
+
+
+if __name__ == "__main__":
+    unittest.main()
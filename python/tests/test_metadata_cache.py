@@ -0,0 +1,61 @@
+"""Unit tests for the (db, table) metadata cache (inspector is mocked)."""
+from __future__ import annotations
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.database.metadata_cache import TableMetadataCache
+
+
+def _inspector(columns, indexes=()):
+    inspector = MagicMock()
+    inspector.has_table.return_value = True
+    inspector.get_columns.return_value = [{"name": c} for c in columns]
+    inspector.get_indexes.return_value = [{"name": i} for i in indexes]
+    return inspector
+
+
+class TableMetadataCacheTests(unittest.TestCase):
+    def test_second_lookup_is_a_hit(self):
+        cache = TableMetadataCache()
+        inspector = _inspector(["id", "SYMBOL"], ["uq_pd_natural"])
+
+        with patch("app.database.metadata_cache.inspect", return_value=inspector), \
+                patch("app.database.metadata_cache.db_manager"):
+            self.assertEqual(cache.get_column_names_lower("bhav", "pd"), {"id", "symbol"})
+            self.assertIn("uq_pd_natural", cache.get_index_names("bhav", "PD"))
+
+        self.assertEqual(inspector.get_columns.call_count, 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_invalidate_forces_reload(self):
+        cache = TableMetadataCache()
+        inspector = _inspector(["id"])
+
+        with patch("app.database.metadata_cache.inspect", return_value=inspector), \
+                patch("app.database.metadata_cache.db_manager"):
+            cache.get_columns("bhav", "pd")
+            inspector.get_columns.return_value = [{"name": "id"}, {"name": "NEW_COL"}]
+            cache.invalidate("bhav", "pd")
+            columns = cache.get_columns("bhav", "pd")
+
+        self.assertEqual(columns, ["id", "NEW_COL"])
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+    def test_missing_table_is_not_cached(self):
+        cache = TableMetadataCache()
+        inspector = _inspector([])
+        inspector.has_table.return_value = False
+
+        with patch("app.database.metadata_cache.inspect", return_value=inspector), \
+                patch("app.database.metadata_cache.db_manager"):
+            self.assertFalse(cache.has_table("bhav", "pd"))
+            self.assertFalse(cache.has_table("bhav", "pd"))
+
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(inspector.has_table.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
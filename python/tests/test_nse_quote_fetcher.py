@@ -0,0 +1,102 @@
+"""Unit tests for the concurrent NSE quote fetcher (tls_client and yfinance are faked)."""
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+from app.services.nse_quote_fetcher import NseQuoteFetcher
+from app.utils.rate_limiter import HostRateLimiter
+
+DAYS = pd.to_datetime(["2026-10-15", "2026-10-16"])
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return dict(self._payload)
+
+
+class FakeTlsSession:
+    def __init__(self, log, blocked, expired):
+        self.log = log
+        self.blocked = blocked
+        self.expired = expired
+
+    def get(self, url, headers=None, timeout_seconds=None):
+        with self.log["lock"]:
+            self.log["urls"].append((id(self), url))
+        if "/api/quote-equity" not in url:
+            return FakeResponse(200)
+        time.sleep(0.01)
+        symbol = url.rsplit("=", 1)[1]
+        if symbol in self.blocked:
+            return FakeResponse(503)
+        if symbol in self.expired:
+            self.expired.discard(symbol)
+            return FakeResponse(403)
+        return FakeResponse(200, {"priceInfo": {"lastPrice": 100.0}})
+
+
+class NseQuoteFetcherTests(unittest.TestCase):
+    def _fetcher(self, blocked=(), expired=(), workers=2):
+        self.log = {"lock": threading.Lock(), "urls": []}
+        self.downloads = []
+        blocked, expired = set(blocked), set(expired)
+
+        def download(tickers, **kwargs):
+            self.downloads.append(list(tickers))
+            return pd.concat({
+                t: pd.DataFrame({"Open": [9.0, 10.0], "High": [11.0, 12.0], "Low": [8.0, 9.0],
+                                 "Close": [10.0, 11.0], "Volume": [5.0, 7.0]}, index=DAYS)
+                for t in tickers if t != "GONE.NS"
+            }, axis=1)
+
+        fetcher = NseQuoteFetcher(
+            workers=workers,
+            session_factory=lambda: FakeTlsSession(self.log, blocked, expired),
+            limiter=HostRateLimiter(rate=1000, burst=1000),
+            download=download,
+            market_cap=lambda yf_symbol: {"DOWN.NS": 5.0e9}.get(yf_symbol),
+        )
+        fetcher.retry_backoff = 0
+        return fetcher
+
+    def test_sessions_are_warmed_once_and_reused(self):
+        fetcher = self._fetcher()
+        symbols = ["TCS", "INFY", "M&M", "SBIN", "LT"]
+
+        quotes = fetcher.fetch(symbols)
+        fetcher.fetch(["WIPRO"])
+
+        self.assertEqual([q["symbol"] for q in quotes], symbols)
+        stats = fetcher.stats()
+        self.assertEqual(stats["sessions"], 2)
+        self.assertEqual(stats["warmups"], 2)
+        self.assertEqual(stats["requests"], 2 * 2 + 6)
+        self.assertIn("symbol=M%26M", " ".join(url for _, url in self.log["urls"]))
+        self.assertEqual(self.downloads, [])
+
+    def test_403_rewarms_and_failures_share_one_yfinance_call(self):
+        fetcher = self._fetcher(blocked={"DOWN", "GONE"}, expired={"TCS"}, workers=1)
+
+        quotes = fetcher.fetch(["TCS", "DOWN", "INFY", "GONE"])
+
+        self.assertEqual([q["symbol"] for q in quotes], ["TCS", "DOWN", "INFY"])
+        self.assertEqual(self.downloads, [["DOWN.NS", "GONE.NS"]])
+        fallback = quotes[1]
+        self.assertEqual(fallback["source"], "yfinance_fallback")
+        self.assertEqual((fallback["lastPrice"], fallback["previousClose"], fallback["lastVolume"]), (11.0, 10.0, 7))
+        self.assertEqual(fallback["marketCap"], 5.0e9)
+        stats = fetcher.stats()
+        self.assertEqual(stats["warmups"], 2)  # initial + after the 403
+        self.assertEqual((stats["nse_quotes"], stats["fallback_quotes"], stats["failed"]), (2, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
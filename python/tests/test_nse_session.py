@@ -0,0 +1,78 @@
+"""Unit tests for NSE cookie warmup reuse (HTTP is mocked)."""
+from __future__ import annotations
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.services.nse_session import NseSession
+from app.utils.rate_limiter import HostRateLimiter, TokenBucket
+
+
+def _response(status):
+    resp = MagicMock()
+    resp.status_code = status
+    return resp
+
+
+class NseSessionTests(unittest.TestCase):
+    def setUp(self):
+        self.nse = NseSession(
+            warmup_urls=("https://warm/a", "https://warm/b"),
+            limiter=HostRateLimiter(rate=1000, burst=1000),
+        )
+        self.nse.session = MagicMock()
+        self.nse.session.cookies = []
+        self.nse._thread_session = lambda: self.nse.session
+        sleep = patch("app.services.nse_session.time.sleep")
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def _urls(self):
+        return [c.args[0] for c in self.nse.session.get.call_args_list]
+
+    def test_warm_session_is_reused_across_downloads(self):
+        self.nse.session.get.return_value = _response(200)
+
+        self.nse.get("https://file/1")
+        self.nse.get("https://file/2")
+
+        self.assertEqual(self._urls(), ["https://warm/a", "https://warm/b", "https://file/1", "https://file/2"])
+        self.assertEqual(self.nse.stats()["warmups"], 1)
+
+    def test_forbidden_rewarms_once_and_retries(self):
+        self.nse.session.get.side_effect = [
+            _response(200), _response(200),  # initial warmup
+            _response(403),
+            _response(200), _response(200),  # re-warm
+            _response(200),
+        ]
+        timings = {}
+
+        resp = self.nse.get("https://file/1", timings=timings)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self._urls().count("https://file/1"), 2)
+        self.assertEqual(self.nse.stats()["auth_rewarms"], 1)
+        self.assertEqual(set(timings), {"warmup_seconds", "download_seconds"})
+
+    def test_expired_ttl_triggers_rewarm(self):
+        self.nse.session.get.return_value = _response(200)
+        self.nse.get("https://file/1")
+
+        self.nse._expires_at = 0
+        self.nse.get("https://file/2")
+
+        self.assertEqual(self.nse.stats()["warmups"], 2)
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_empty_bucket_blocks_until_refilled(self):
+        bucket = TokenBucket(rate=200, burst=1)
+
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertGreater(bucket.acquire(), 0.0)
+        self.assertEqual(bucket.acquired, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
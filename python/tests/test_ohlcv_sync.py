@@ -0,0 +1,137 @@
+"""Unit tests for the incremental all_companies_data sync (yfinance and MySQL are faked)."""
+from __future__ import annotations
+
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from app.services.ohlcv_sync import OhlcvIncrementalSync, history_records, long_ohlcv, sync_window
+
+DAYS = pd.to_datetime(["2026-10-15", "2026-10-16"])
+
+
+def _history(close=(10.0, 11.0)):
+    return pd.DataFrame(
+        {"Open": [9.0, 10.0], "High": [11.0, 12.0], "Low": [8.0, 9.0], "Close": list(close),
+         "Volume": [100.0, 200.0], "Dividends": [0.0, 0.0], "Stock Splits": [0.0, 0.0]},
+        index=DAYS.rename("Date"),
+    )
+
+
+def _download_frame(tickers):
+    return pd.concat({t: _history() for t in tickers}, axis=1)
+
+
+class FakeNseService:
+    def __init__(self, formats=None):
+        self.formats = dict(formats or {})
+        self.probed, self.failed = [], []
+
+    def load_symbol_formats(self):
+        return self.formats
+
+    def save_symbol_formats(self, formats):
+        self.formats.update(formats)
+
+    def fetch_symbol_with_retry(self, symbol, period):
+        self.probed.append(symbol)
+        if symbol == "NOPE":
+            return {"status": "failed", "reason": "no data"}
+        return {"status": "success", "used_symbol": f"{symbol}.NS", "df": _history()}
+
+    def save_failed_symbol(self, symbol, reason):
+        self.failed.append(symbol)
+
+
+class OhlcvSyncTests(unittest.TestCase):
+    def test_long_ohlcv_reshapes_multi_and_single_ticker_frames(self):
+        frame = _download_frame(["A.NS", "B.NS"])
+        frame.loc[DAYS[1], ("B.NS", "Close")] = np.nan
+
+        long = long_ohlcv(frame, ["A.NS", "B.NS"])
+
+        self.assertEqual(list(zip(long["symbol"], long["date"])), [
+            ("A.NS", date(2026, 10, 15)), ("B.NS", date(2026, 10, 15)), ("A.NS", date(2026, 10, 16)),
+        ])
+        self.assertEqual(history_records(long)[0], ("A.NS", date(2026, 10, 15), 9.0, 11.0, 8.0, 10.0, 100, 0.0, 0.0))
+        self.assertEqual(len(long_ohlcv(_history(), ["TCS"])), 2)
+
+    def test_sync_window(self):
+        friday, sunday = date(2026, 10, 16), date(2026, 10, 18)
+        self.assertEqual(sync_window(None, sunday), ("full", None))
+        self.assertEqual(sync_window(friday, sunday), ("current", None))   # only a weekend missing
+        self.assertEqual(sync_window(date(2026, 10, 14), sunday), ("gap", date(2026, 10, 15)))
+
+    def test_run_downloads_only_gaps_and_probes_unknown_symbols_once(self):
+        latest = [
+            {"symbol": "A.NS", "last_date": date(2026, 10, 14)},
+            {"symbol": "B", "last_date": date(2026, 10, 14)},
+            {"symbol": "C.NS", "last_date": date(2026, 10, 16)},
+        ]
+        cursor = MagicMock()
+        cursor.fetchall.return_value = latest
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        downloads = []
+
+        def download(tickers, **kwargs):
+            downloads.append((list(tickers), kwargs.get("start"), kwargs.get("period")))
+            return _download_frame(tickers)
+
+        service = FakeNseService({"A": "A.NS"})
+        sync = OhlcvIncrementalSync(service, batch_size=50, download=download, today=date(2026, 10, 18))
+        sync.limiter.rate = 1000
+        with patch("app.services.ohlcv_sync.db_manager") as db:
+            db.get_connection.return_value = conn
+            stats = sync.run(["A", "B.NS", "C", "NEW", "NOPE"], period="1y")
+
+        self.assertEqual(downloads, [(["A.NS", "B"], "2026-10-15", None)])
+        self.assertEqual(service.probed, ["NEW", "NOPE"])
+        self.assertEqual(service.failed, ["NOPE"])
+        self.assertEqual(service.formats, {"A": "A.NS", "B": "B", "C": "C.NS", "NEW": "NEW.NS"})
+        self.assertEqual(cursor.executemany.call_count, 2)
+        self.assertEqual(
+            {k: stats[k] for k in ("current", "gap", "probed", "rows_written", "success", "failed")},
+            {"current": 1, "gap": 2, "probed": 2, "rows_written": 6, "success": 4, "failed": 1},
+        )
+
+    def test_dividend_or_split_in_a_gap_rewrites_full_history(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [
+            {"symbol": s, "last_date": date(2026, 10, 14)} for s in ("A.NS", "B.NS", "C.NS")
+        ]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        downloads = []
+
+        def download(tickers, **kwargs):
+            downloads.append((list(tickers), kwargs.get("start"), kwargs.get("period")))
+            frame = _download_frame(tickers)
+            if kwargs.get("start"):
+                for ticker, column in (("A.NS", "Dividends"), ("C.NS", "Stock Splits")):
+                    if ticker in tickers:
+                        frame.loc[DAYS[1], (ticker, column)] = 2.0
+            return frame
+
+        service = FakeNseService({"A": "A.NS", "B": "B.NS", "C": "C.NS"})
+        sync = OhlcvIncrementalSync(service, batch_size=50, download=download, today=date(2026, 10, 18))
+        sync.limiter.rate = 1000
+        with patch("app.services.ohlcv_sync.db_manager") as db:
+            db.get_connection.return_value = conn
+            stats = sync.run(["A", "B", "C"], period="1y")
+
+        self.assertEqual(downloads, [
+            (["A.NS", "B.NS", "C.NS"], "2026-10-15", None),
+            (["A.NS", "C.NS"], None, "1y"),
+        ])
+        self.assertEqual(
+            {k: stats[k] for k in ("gap", "readjusted", "success", "failed")},
+            {"gap": 3, "readjusted": 2, "success": 3, "failed": 0},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
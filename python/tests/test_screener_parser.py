@@ -0,0 +1,69 @@
+"""The lxml Screener parser must produce exactly what the bs4 parser produces."""
+from __future__ import annotations
+
+import os
+import unittest
+from unittest import mock
+
+from app.services.screener_parser import (
+    parse_screener_html,
+    parse_screener_html_bs4,
+    parse_screener_html_lxml,
+)
+
+PAGE = """<html><head><script>var h2 = "<h2>no</h2>";</script></head><body>
+<table><tr><th>Orphan</th></tr><tr><td>before any h2</td></tr></table>
+<div class="flex-row  flex-space-between">
+  <span class="name">Market Cap</span>
+  <span class="value">₹ <span class="number">12,34,567</span> Cr.</span>
+</div>
+<div class="flex-row"><span class="name">Face Value</span></div>
+<div class="flex-rowish"><span class="name">Ignored</span><span class="number">1</span></div>
+<section id="quarters">
+  <div class="flex-row"><div><h2>Quarterly <!-- beta -->Results</h2></div></div>
+  <table class="data-table">
+    <thead><tr><th></th><th>Jun 2026</th><th>Sep 2026</th></tr></thead>
+    <tbody>
+      <tr><td class="text"><button>Sales&nbsp;<span>+</span></button></td><td>1,200</td><td>1,310</td></tr>
+      <tr><td>short row</td><td>1</td></tr>
+      <tr><td>OPM %</td><td>21%</td><td><style>.x{}</style>22%</td></tr>
+    </tbody>
+  </table>
+</section>
+<section id="peers"><h2>Peer comparison</h2><p>Loading…</p></section>
+<section id="shareholding">
+  <h2>Shareholding Pattern</h2>
+  <table><tr><th>Holder</th><th>Mar 2026</th></tr>
+    <tr><td>Promoters</td><td>72.30%</td></tr></table>
+  <table><tr><th>Holder</th><th>Jun 2026</th></tr>
+    <tr><td>FIIs</td><td>12.10%</td></tr></table>
+</section>
+</body></html>"""
+
+
+class ScreenerParserTests(unittest.TestCase):
+    def test_lxml_matches_bs4(self):
+        expected = parse_screener_html_bs4(PAGE)
+
+        self.assertEqual(parse_screener_html_lxml(PAGE), expected)
+        self.assertEqual(
+            list(expected["tables"]), ["unknown_table", "quarterlyresults", "shareholding_pattern"]
+        )
+        self.assertEqual(
+            expected["financial_ratios"], {"Market Cap": "12,34,567", "Face Value": ""}
+        )
+
+    def test_empty_page(self):
+        empty = {"company_info": {}, "financial_ratios": {}, "tables": {}}
+        self.assertEqual(parse_screener_html_lxml(""), empty)
+        self.assertEqual(parse_screener_html_bs4(""), empty)
+
+    def test_backend_switch(self):
+        with mock.patch.dict(os.environ, {"SCREENER_PARSER": "bs4"}), \
+                mock.patch("app.services.screener_parser.parse_screener_html_bs4") as bs4:
+            parse_screener_html(PAGE)
+        bs4.assert_called_once_with(PAGE)
+
+
+if __name__ == "__main__":
+    unittest.main()
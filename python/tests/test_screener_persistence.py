@@ -0,0 +1,117 @@
+"""Unit tests for keyed, batched Screener table writes (MySQL is faked)."""
+from __future__ import annotations
+
+import unittest
+from unittest.mock import patch
+
+from app.services import screener_service
+from app.services.screener_service import ROW_KEY_INDEX, create_and_insert_table
+
+
+class FakeSchema:
+    """Stands in for table_metadata_cache."""
+
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+
+    def get_column_names_lower(self, db, table):
+        return {c.lower() for c in self.tables.get(table, {}).get("columns", [])}
+
+    def get_index_names(self, db, table):
+        return set(self.tables.get(table, {}).get("indexes", []))
+
+    def get_columns(self, db, table):
+        return list(self.tables[table]["columns"])
+
+    def invalidate(self, db, table=None):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, schema):
+        self.schema = schema
+        self.statements = []
+        self.batches = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if sql.startswith("CREATE TABLE IF NOT EXISTS"):
+            table = sql.split("`")[1]
+            self.schema.tables[table] = {
+                "columns": ["symbol"] + [c for c in sql.split("`")[3::2] if c != ROW_KEY_INDEX][:-1],
+                "indexes": [ROW_KEY_INDEX],
+            }
+        elif " ADD COLUMN " in sql:
+            self.schema.tables[sql.split("`")[1]]["columns"].append(sql.split("`")[3])
+        elif sql.startswith("RENAME TABLE"):
+            self.schema.tables[sql.split("`")[1]]["indexes"] = [ROW_KEY_INDEX]
+
+    def executemany(self, sql, rows):
+        self.batches.append((sql, list(rows)))
+
+    def fetchone(self):
+        return {"n": 3}
+
+
+ROWS = [
+    {"": "Sales", "Mar 2025": "100", "Mar 2026": "120"},
+    {"": "Net Profit", "Mar 2025": "10", "Mar 2026": "14"},
+    {"": "Sales", "Mar 2025": "101", "Mar 2026": "121"},
+]
+
+
+class ScreenerPersistenceTests(unittest.TestCase):
+    def _write(self, schema, table="tables_profit_loss", rows=ROWS):
+        cursor = FakeCursor(schema)
+        with patch.object(screener_service, "table_metadata_cache", schema):
+            written = create_and_insert_table(table, rows, cursor, "TCS")
+        return cursor, written
+
+    def test_new_table_gets_natural_key_and_one_batched_upsert(self):
+        cursor, written = self._write(FakeSchema())
+
+        create = cursor.statements[0]
+        self.assertIn(f"UNIQUE KEY `{ROW_KEY_INDEX}` (symbol(64), `col_unknown`(191))", create)
+        self.assertEqual(written, 2)
+        (sql, rows), = cursor.batches
+        self.assertIn("ON DUPLICATE KEY UPDATE `Mar_2025` = VALUES(`Mar_2025`)", sql)
+        self.assertNotIn("`col_unknown` = VALUES", sql)
+        self.assertEqual(rows, [("TCS", "Sales", "101", "121"), ("TCS", "Net Profit", "10", "14")])
+
+    def test_known_table_issues_no_ddl(self):
+        schema = FakeSchema({
+            "tables_profit_loss": {
+                "columns": ["symbol", "col_unknown", "Mar_2025", "Mar_2026"],
+                "indexes": [ROW_KEY_INDEX],
+            }
+        })
+        cursor, _ = self._write(schema)
+
+        self.assertEqual(cursor.statements, [])
+        self.assertEqual(len(cursor.batches), 1)
+
+    def test_keyless_legacy_table_is_deduplicated_once(self):
+        schema = FakeSchema({
+            "tables_profit_loss": {"columns": ["symbol", "col_unknown", "Mar_2025"], "indexes": []}
+        })
+        cursor, _ = self._write(schema)
+
+        ddl = [s.split(" `")[0] for s in cursor.statements if not s.startswith("SELECT")]
+        self.assertEqual(ddl, [
+            "ALTER TABLE",            # Mar_2026 column
+            "DROP TABLE IF EXISTS",   # stale shadow
+            "CREATE TABLE",           # shadow LIKE table
+            "ALTER TABLE",            # shadow gets the unique key
+            "INSERT INTO",            # copy, later rows win
+            "RENAME TABLE",
+            "DROP TABLE",             # duplicates
+        ])
+        self.assertIn("SELECT `symbol`, `col_unknown`, `Mar_2025`, `Mar_2026` FROM `tables_profit_loss` ON DUPLICATE",
+                      cursor.statements[5])
+
+        again, _ = self._write(schema)
+        self.assertEqual(again.statements, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
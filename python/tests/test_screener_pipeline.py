@@ -0,0 +1,186 @@
+"""Unit tests for the concurrent Screener scrape pipeline (network and DB are faked)."""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, datetime
+from unittest.mock import patch
+
+from app.services.screener_parser import parse_screener_html
+from app.services.screener_pipeline import ScreenerCheckpoint, ScreenerScrapeEngine
+from app.services.screener_refresh_state import payload_hash, prioritize
+from app.services.screener_service import iter_screener_tables
+from app.utils.rate_limiter import TokenBucket
+
+PAGE = """
+<div class="flex-row"><span class="name">Stock P/E</span><span class="number">21.4</span></div>
+<h2>Quarterly Results</h2>
+<table>
+  <tr><th></th><th>Jun 2026</th></tr>
+  <tr><td>Sales</td><td>1,200</td></tr>
+  <tr><td>Net Profit</td><td>140</td></tr>
+</table>
+"""
+
+
+class FakeScreener:
+    def __init__(self, missing=(), broken=(), etag=None):
+        self.missing = set(missing)
+        self.broken = set(broken)
+        self.etag = etag
+        self.limiter = TokenBucket(rate=1000, burst=1000)
+        self.fetched = []
+        self.saved = {}
+        self.writer_threads = set()
+        self._lock = threading.Lock()
+
+    def fetch_screener_page(self, symbol, statement_type, etag=None, last_modified=None):
+        self.limiter.acquire()
+        time.sleep(0.005)
+        with self._lock:
+            self.fetched.append(symbol)
+        if symbol in self.missing:
+            return {"status": 404, "html": None}
+        if self.etag and etag == self.etag:
+            return {"status": 304, "html": None, "etag": etag}
+        return {"status": 200, "html": PAGE, "etag": self.etag}
+
+    def save_screener_data(self, symbol, data):
+        if symbol in self.broken:
+            raise RuntimeError("db down")
+        self.writer_threads.add(threading.get_ident())
+        self.saved[symbol] = data
+        return 2
+
+
+class FakeState:
+    def __init__(self, states=None):
+        self.states = states or {}
+        self.saved = []
+
+    def load(self, statement_type):
+        return dict(self.states)
+
+    def save(self, statement_type, entries):
+        self.saved.extend(entries)
+
+
+PAGE_HASH = payload_hash(iter_screener_tables(parse_screener_html(PAGE)))
+
+
+class ScreenerPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "checkpoint.json")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _engine(self, service, state=None, flush_every=1):
+        checkpoint = ScreenerCheckpoint(path=self.path, flush_every=flush_every, max_age_hours=1)
+        return ScreenerScrapeEngine(
+            service=service, fetch_workers=3, parse_processes=0, checkpoint=checkpoint,
+            state=state or FakeState(), recheck_days=0,
+        )
+
+    def test_parser_extracts_ratios_and_tables(self):
+        data = parse_screener_html(PAGE)
+
+        self.assertEqual(data["financial_ratios"], {"Stock P/E": "21.4"})
+        self.assertEqual(
+            data["tables"]["quarterly_results"],
+            [{"": "Sales", "Jun 2026": "1,200"}, {"": "Net Profit", "Jun 2026": "140"}],
+        )
+
+    def test_run_saves_from_a_single_writer_and_counts_outcomes(self):
+        service = FakeScreener(missing={"GONE"}, broken={"BAD"})
+        symbols = ["TCS", "INFY", "GONE", "BAD", "ABC-RE", "HDFCBANK"]
+
+        stats = self._engine(service).run(symbols)
+
+        self.assertEqual(set(service.saved), {"TCS", "INFY", "HDFCBANK"})
+        self.assertEqual(service.writer_threads, {threading.get_ident()})
+        self.assertNotIn("ABC-RE", service.fetched)
+        self.assertEqual(
+            (stats["changed"], stats["not_found"], stats["failed"], stats["skipped"]),
+            (3, 1, 1, 1),
+        )
+        self.assertEqual(stats["rows_written"], 6)
+        self.assertFalse(os.path.exists(self.path))  # completed runs drop the checkpoint
+
+    def test_run_resumes_from_checkpoint(self):
+        with open(self.path, "w", encoding="utf-8") as fh:
+            json.dump({"started_at": time.time(), "last_symbol": "INFY", "done": ["TCS", "INFY"]}, fh)
+        service = FakeScreener()
+
+        stats = self._engine(service).run(["TCS", "INFY", "WIPRO", "LT"])
+
+        self.assertEqual(sorted(service.fetched), ["LT", "WIPRO"])
+        self.assertEqual(stats["resumed"], 2)
+        self.assertEqual(stats["changed"], 2)
+
+    def test_failed_symbols_are_left_for_the_resumed_run(self):
+        service = FakeScreener(missing={"GONE"}, broken={"BAD"})
+        symbols = ["TCS", "GONE", "BAD"]
+
+        with patch.object(ScreenerCheckpoint, "clear"):  # the run "crashes" before completing
+            self._engine(service).run(symbols)
+        with open(self.path, encoding="utf-8") as fh:
+            self.assertEqual(json.load(fh)["done"], ["GONE", "TCS"])
+
+        service.broken.clear()
+        service.fetched.clear()
+        stats = self._engine(service).run(symbols)
+
+        self.assertEqual(service.fetched, ["BAD"])
+        self.assertEqual((stats["resumed"], stats["changed"], stats["failed"]), (2, 1, 0))
+
+    def test_stale_checkpoint_is_ignored(self):
+        with open(self.path, "w", encoding="utf-8") as fh:
+            json.dump({"started_at": time.time() - 7200, "done": ["TCS"]}, fh)
+        service = FakeScreener()
+
+        self._engine(service).run(["TCS", "INFY"])
+
+        self.assertEqual(sorted(service.fetched), ["INFY", "TCS"])
+
+    def test_unchanged_pages_skip_writes(self):
+        seen = {"symbol": "TCS", "content_hash": PAGE_HASH, "etag": None,
+                "last_checked_at": datetime(2026, 1, 1), "last_changed_at": datetime(2026, 1, 1)}
+        cached = dict(seen, content_hash="old", etag='"v7"')
+        state = FakeState({"TCS": seen, "INFY": cached, "WIPRO": dict(seen, content_hash="old")})
+        service = FakeScreener(etag='"v7"')
+
+        stats = self._engine(service, state).run(["TCS", "INFY", "WIPRO"])
+
+        self.assertEqual(list(service.saved), ["WIPRO"])
+        self.assertEqual((stats["changed"], stats["unchanged"], stats["not_modified"]), (1, 2, 1))
+        recorded = {e["symbol"]: e for e in state.saved}
+        self.assertTrue(recorded["WIPRO"]["changed"])
+        self.assertIsNone(recorded["INFY"].get("content_hash"))  # 304: keep the stored hash
+        self.assertEqual(recorded["TCS"]["content_hash"], PAGE_HASH)
+
+    def test_results_season_priority(self):
+        def state(checked, changed):
+            return {"content_hash": "h", "last_checked_at": checked, "last_changed_at": changed}
+
+        states = {
+            "FRESH": state(datetime(2026, 8, 9), datetime(2026, 8, 1)),   # has Q1 numbers
+            "OLD": state(datetime(2026, 8, 1), datetime(2026, 5, 20)),    # awaiting Q1
+            "OLDER": state(datetime(2026, 7, 20), datetime(2026, 5, 2)),  # awaiting Q1
+        }
+        due, deferred = prioritize(["FRESH", "OLD", "NEW", "OLDER"], states, today=date(2026, 8, 10), recheck_days=7)
+        self.assertEqual((due, deferred), (["NEW", "OLDER", "OLD"], ["FRESH"]))
+
+        off_season = {s: state(datetime(2026, 12, 5), datetime(2026, 11, 1)) for s in ("A", "B")}
+        off_season["B"]["last_checked_at"] = datetime(2026, 11, 20)
+        due, deferred = prioritize(["A", "B"], off_season, today=date(2026, 12, 10), recheck_days=7)
+        self.assertEqual((due, deferred), (["B"], ["A"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Unit tests for the batched yfinance quote refresh (yfinance and MySQL are faked)."""
+from __future__ import annotations
+
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from app.services.yfinance_bulk import (
+    YFinanceBulkRefresher,
+    info_due,
+    quotes_from_download,
+)
+
+DAYS = pd.to_datetime(["2026-10-13", "2026-10-14", "2026-10-15"])
+
+
+def _download_frame(symbols):
+    """Shape of ``yf.download(group_by="ticker")`` for several tickers."""
+    frames = {}
+    for n, symbol in enumerate(symbols, start=1):
+        frames[symbol] = pd.DataFrame(
+            {"Close": [100.0 * n, 110.0 * n, 121.0 * n], "Volume": [5, 6, 7 * n]}, index=DAYS
+        )
+    return pd.concat(frames, axis=1)
+
+
+class YFinanceBulkTests(unittest.TestCase):
+    def test_quotes_from_multi_ticker_frame(self):
+        frame = _download_frame(["TCS.NS", "INFY.NS", "DEAD.NS"])
+        frame.loc[DAYS[1]:, ("DEAD.NS", "Close")] = np.nan
+
+        quotes = quotes_from_download(frame, ["TCS.NS", "INFY.NS", "DEAD.NS", "GONE.NS"])
+
+        self.assertEqual(list(quotes), ["TCS.NS", "INFY.NS"])
+        self.assertEqual(
+            quotes["INFY.NS"],
+            {"currentPrice": 242.0, "previousClose": 220.0, "change": 22.0, "changePercent": 10.0, "volume": 14},
+        )
+
+    def test_quotes_from_single_ticker_frame(self):
+        flat = _download_frame(["TCS.NS"])["TCS.NS"]
+        self.assertEqual(quotes_from_download(flat, ["TCS.NS"])["TCS.NS"]["currentPrice"], 121.0)
+
+    def test_info_due_is_stale_first_and_capped(self):
+        now = datetime(2026, 10, 18)
+        updated = {"A": datetime(2026, 10, 1), "B": datetime(2026, 8, 1), "C": datetime(2026, 9, 1)}
+
+        self.assertEqual(info_due(["A", "B", "C", "NEW"], updated, ttl_days=30, limit=2, now=now), ["NEW", "B"])
+
+    def test_run_downloads_in_batches_and_upserts_once_per_batch(self):
+        symbols = [f"S{i}.NS" for i in range(5)]
+        downloads, info_calls = [], []
+
+        def download(tickers, **kwargs):
+            downloads.append(list(tickers))
+            return _download_frame(tickers)
+
+        def fetch_info(symbol):
+            info_calls.append(symbol)
+            return {"longName": symbol, "sector": "IT"}
+
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [{"symbol": "S0.NS", "infoUpdatedAt": datetime.now()}]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        refresher = YFinanceBulkRefresher(batch_size=2, download=download, fetch_info=fetch_info)
+        refresher.download_limiter.rate = refresher.info_limiter.rate = 1000
+        with patch("app.services.yfinance_bulk.db_manager") as db:
+            db.get_connection.return_value = conn
+            stats = refresher.run(symbols)
+
+        self.assertEqual(downloads, [symbols[0:2], symbols[2:4], symbols[4:5]])
+        self.assertEqual(sorted(info_calls), symbols[1:])  # S0 info is fresh
+        self.assertEqual(cursor.executemany.call_count, 3)
+        first_batch = cursor.executemany.call_args_list[0].args[1]
+        self.assertIsNone(first_batch[0][1])          # S0: stored name kept (COALESCE)
+        self.assertEqual(first_batch[1][1:3], ("S1.NS", "IT"))
+        self.assertEqual(
+            {k: stats[k] for k in ("batches", "quoted", "info_refreshed", "rows_upserted")},
+            {"batches": 3, "quoted": 5, "info_refreshed": 4, "rows_upserted": 5},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
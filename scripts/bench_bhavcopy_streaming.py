@@ -0,0 +1,141 @@
+"""
+Benchmark bhavcopy zip handling: buffered download vs streamed/spooled.
+
+Builds a synthetic multi-member PR-style zip, then parses it twice - each
+mode in its own subprocess so peak RSS is measured independently:
+
+  buffered   old path: whole body as bytes -> member.read() -> read_csv
+  streaming  new path: iter_content -> spooled temp file -> zip member
+             stream -> chunked read_csv
+
+Nothing touches MySQL; parsed chunks go through coerce_frame and are dropped.
+
+Usage (from repo root):
+  python scripts/bench_bhavcopy_streaming.py --size-mb 400 --members 4
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "python"))
+
+HEADER = "MKT,SERIES,SYMBOL,SECURITY,PREV_CL_PR,OPEN_PRICE,HIGH_PRICE,LOW_PRICE,CLOSE_PRICE,NET_TRDVAL,NET_TRDQTY,TRADES\n"
+
+
+def build_zip(path, size_mb, members):
+    rng = random.Random(7)
+    per_member = size_mb * 1024 * 1024 // members
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for m in range(members):
+            with archive.open(f"Pd{m:02d}0726.csv", "w") as out:
+                out.write(HEADER.encode())
+                written = 0
+                row = 0
+                while written < per_member:
+                    lines = []
+                    for _ in range(2000):
+                        price = rng.uniform(1, 5000)
+                        lines.append(
+                            f"N,EQ,SYM{row % 50000},SECURITY NAME {row},{price:.2f},{price * 1.01:.2f},"
+                            f"{price * 1.03:.2f},{price * 0.98:.2f},{price * 1.02:.2f},"
+                            f"{rng.uniform(1e4, 1e9):.2f},{rng.randint(1, 10**7)},{rng.randint(1, 10**5)}\n"
+                        )
+                        row += 1
+                    block = "".join(lines).encode()
+                    out.write(block)
+                    written += len(block)
+
+
+class _FileResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(self, path):
+        self._handle = open(path, "rb")
+
+    def iter_content(self, chunk_size=1024 * 1024):
+        while True:
+            block = self._handle.read(chunk_size)
+            if not block:
+                return
+            yield block
+
+    @property
+    def content(self):
+        return self._handle.read()
+
+    def close(self):
+        self._handle.close()
+
+
+def run_mode(mode, path):
+    import io
+
+    from app.services.bhavcopy_schema import coerce_frame
+    from app.services.bhavcopy_service import bhavcopy_service
+
+    started = time.perf_counter()
+    rows = 0
+    resp = _FileResponse(path)
+
+    if mode == "buffered":
+        with zipfile.ZipFile(io.BytesIO(resp.content)) as archive:
+            for name in archive.namelist():
+                with archive.open(name) as member:
+                    for chunk in bhavcopy_service.read_csv_chunks(member.read()):
+                        rows += len(coerce_frame("pd", chunk))
+        resp.close()
+    else:
+        with bhavcopy_service.spool_response(resp) as body, zipfile.ZipFile(body) as archive:
+            for _, member in bhavcopy_service.iter_archive_csv(archive):
+                for chunk in bhavcopy_service.read_csv_chunks(member):
+                    rows += len(coerce_frame("pd", chunk))
+
+    seconds = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(rows / seconds) if seconds else None,
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=400, help="uncompressed CSV size across all members")
+    parser.add_argument("--members", type=int, default=4)
+    parser.add_argument("--zip", help="reuse an existing zip instead of generating one")
+    parser.add_argument("--run-mode", choices=("buffered", "streaming"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        run_mode(args.run_mode, args.zip)
+        return
+
+    path = args.zip
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), f"bhavcopy_bench_{args.size_mb}mb.zip")
+        if not os.path.exists(path):
+            print(f"Building {args.size_mb} MB synthetic bhavcopy -> {path}")
+            build_zip(path, args.size_mb, args.members)
+    print(f"Zip size: {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+
+    for mode in ("buffered", "streaming"):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-mode", mode, "--zip", path],
+            capture_output=True, text=True, check=True,
+        )
+        print(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
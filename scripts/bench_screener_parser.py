@@ -0,0 +1,133 @@
+"""
+Benchmark Screener company-page parsing: BeautifulSoup vs lxml backend.
+
+Parses every page with both backends of app.services.screener_parser:
+
+  bs4   original path: BeautifulSoup(html.parser) + find_previous("h2")
+        per table
+  lxml  lxml.html + precompiled XPath for ratio cards and one
+        document-order pass over <h2>/<table>
+
+Each page's two outputs are compared first; a mismatch fails the run.
+Pages come from --fixtures (saved screener.in pages, *.html). Without it,
+a synthetic page shaped like a consolidated company page is used.
+Nothing touches the network or MySQL.
+
+Saving fixtures (one-off, respects the site's rate limits):
+  curl -A "Mozilla/5.0" -o fixtures/TCS.html https://www.screener.in/company/TCS/consolidated/
+
+Usage (from repo root):
+  python scripts/bench_screener_parser.py --fixtures fixtures/ --repeat 20
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "python"))
+
+from app.services.screener_parser import parse_screener_html_bs4, parse_screener_html_lxml  # noqa: E402
+
+BACKENDS = {"bs4": parse_screener_html_bs4, "lxml": parse_screener_html_lxml}
+
+SECTIONS = [
+    ("quarters", "Quarterly Results", 13),
+    ("profit-loss", "Profit & Loss", 13),
+    ("balance-sheet", "Balance Sheet", 13),
+    ("cash-flow", "Cash Flows", 13),
+    ("ratios", "Ratios", 13),
+    ("shareholding", "Shareholding Pattern", 12),
+]
+ROW_LABELS = [
+    "Sales", "Expenses", "Operating Profit", "OPM %", "Other Income", "Interest",
+    "Depreciation", "Profit before tax", "Tax %", "Net Profit", "EPS in Rs",
+    "Dividend Payout %", "Borrowings", "Reserves", "Total Assets",
+]
+
+
+def synthetic_page(seed=7):
+    rng = random.Random(seed)
+    out = ["<html><head><title>Company</title><script>var x = 1;</script></head><body>"]
+    out.append('<div class="company-ratios"><ul id="top-ratios">')
+    for label in ("Market Cap", "Current Price", "High / Low", "Stock P/E", "Book Value",
+                  "Dividend Yield", "ROCE", "ROE", "Face Value"):
+        out.append(
+            f'<div class="flex-row flex-space-between"><span class="name">{label}</span>'
+            f'<span class="nowrap value">₹ <span class="number">{rng.uniform(1, 99999):,.2f}</span> Cr.</span></div>'
+        )
+    out.append("</ul></div>")
+    # Navigation / commentary noise between sections, as on the real page
+    for _ in range(300):
+        out.append(f'<div class="sub"><a href="/x/{rng.randint(1, 9999)}/">link</a><p>{"lorem " * 8}</p></div>')
+    for section_id, title, periods in SECTIONS:
+        out.append(f'<section id="{section_id}" class="card card-large"><div class="flex-row">')
+        out.append(f"<div><h2>{title}</h2><p class=\"sub\">Consolidated Figures in Rs. Crores</p></div></div>")
+        out.append('<div class="responsive-holder"><table class="data-table"><thead><tr><th class="text"></th>')
+        out.extend(f"<th>Mar {2014 + i}</th>" for i in range(periods))
+        out.append("</tr></thead><tbody>")
+        for label in ROW_LABELS:
+            out.append(f'<tr><td class="text"><button class="button-plain">{label}&nbsp;<span>+</span></button></td>')
+            out.extend(f"<td>{rng.uniform(-999, 99999):,.0f}</td>" for _ in range(periods))
+            out.append("</tr>")
+        out.append("</tbody></table></div></section>")
+    out.append("</body></html>")
+    return "".join(out)
+
+
+def load_pages(fixtures):
+    if not fixtures:
+        return {"synthetic": synthetic_page()}
+    paths = sorted(glob.glob(os.path.join(fixtures, "*.html")))
+    if not paths:
+        sys.exit(f"no *.html fixtures in {fixtures}")
+    pages = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as fh:
+            pages[os.path.splitext(os.path.basename(path))[0]] = fh.read()
+    return pages
+
+
+def time_backend(fn, html, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="directory of saved screener.in company pages (*.html)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages(args.fixtures)
+    report = {"pages": {}, "repeat": args.repeat}
+    totals = {name: [] for name in BACKENDS}
+
+    for page, html in pages.items():
+        outputs = {name: fn(html) for name, fn in BACKENDS.items()}
+        if outputs["bs4"] != outputs["lxml"]:
+            sys.exit(f"{page}: lxml output differs from bs4")
+
+        row = {"kb": round(len(html.encode()) / 1024, 1), "tables": len(outputs["lxml"]["tables"])}
+        for name, fn in BACKENDS.items():
+            samples = time_backend(fn, html, args.repeat)
+            totals[name].extend(samples)
+            row[f"{name}_median_ms"] = round(statistics.median(samples), 2)
+        row["speedup"] = round(row["bs4_median_ms"] / row["lxml_median_ms"], 1)
+        report["pages"][page] = row
+
+    report["median_ms"] = {name: round(statistics.median(s), 2) for name, s in totals.items()}
+    report["speedup"] = round(report["median_ms"]["bs4"] / report["median_ms"]["lxml"], 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()